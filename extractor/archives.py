@@ -0,0 +1,335 @@
+import atexit
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class ArchiveError(OSError):
+    """An archive could not be read (corrupt, truncated or still being written)."""
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """
+    A regular file inside a zip/tar archive.
+
+    Members are addressed by a virtual path, archive/name, so they flow
+    through scanning, sharding and target folder mapping like files in a
+    directory of the same name.
+    """
+    archive: Path
+    name: str
+    size: int
+    mtime_ns: int
+
+    @property
+    def path(self) -> Path:
+        return self.archive / self.name
+
+    def lineage(self) -> Dict[str, str]:
+        return {"path": str(self.archive.absolute()), "member": self.name}
+
+
+def is_archive(path: Path) -> bool:
+    return Path(path).name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _safe_name(name: str) -> Optional[str]:
+    """Normalises a member name; rejects absolute and parent-relative names."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or ".." in parts:
+        return None
+    parts = [part for part in parts if part != "."]
+    return "/".join(parts) or None
+
+
+def _zip_mtime_ns(info: zipfile.ZipInfo) -> int:
+    try:
+        return int(datetime(*info.date_time).timestamp() * 1_000_000_000)
+    except (ValueError, OverflowError):
+        return 0
+
+
+@lru_cache(maxsize=16)
+def _load(archive: str, size: int, mtime_ns: int) -> Dict[str, Tuple[Any, int, int]]:
+    """
+    Reads an archive's member table once per (path, size, mtime), so
+    members can be looked up without re-walking the central directory or
+    tar headers.
+    """
+    members: Dict[str, Tuple[Any, int, int]] = {}
+    try:
+        if archive.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    name = None if info.is_dir() else _safe_name(info.filename)
+                    if name is not None:
+                        members[name] = (info, info.file_size, _zip_mtime_ns(info))
+            return members
+
+        with tarfile.open(archive) as tf:
+            for info in tf:
+                name = _safe_name(info.name) if info.isfile() else None
+                if name is not None:
+                    members[name] = (info, info.size, int(info.mtime) * 1_000_000_000)
+        return members
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise ArchiveError(f"Cannot read archive {archive}: {e}") from e
+
+
+def _key(archive: Path) -> Tuple[str, int, int]:
+    st = os.stat(archive)
+    return str(archive), st.st_size, st.st_mtime_ns
+
+
+def _index(archive: Path) -> Dict[str, Tuple[Any, int, int]]:
+    return _load(*_key(archive))
+
+
+# Members are read from the hashing, prefetch and worker threads at once,
+# and a ZipFile must not be shared between threads: each thread keeps its
+# own open handles (opening one re-parses the central directory).
+ZIP_HANDLES_PER_THREAD = 8
+_zip_handles = threading.local()
+
+
+def _zip_handle(key: Tuple[str, int, int]) -> zipfile.ZipFile:
+    handles = getattr(_zip_handles, "handles", None)
+    if handles is None:
+        handles = _zip_handles.handles = OrderedDict()
+    handle = handles.get(key)
+    if handle is None:
+        handle = handles[key] = zipfile.ZipFile(key[0])
+        while len(handles) > ZIP_HANDLES_PER_THREAD:
+            handles.popitem(last=False)[1].close()
+    handles.move_to_end(key)
+    return handle
+
+
+def _is_compressed_tar(archive: Path) -> bool:
+    name = Path(archive).name.lower()
+    return is_archive(archive) and not name.endswith((".zip", ".tar"))
+
+
+class _TarSpool:
+    """
+    Compressed tars cannot seek: reading a member decompresses everything
+    before it, so reading each member through its own handle is quadratic.
+    Instead, the first read of a member unpacks all of the archive's
+    members into a temporary directory in a single streaming pass, and
+    members are read from there.
+
+    Only the main process spools: workers are handed the unpacked path in
+    their job (see spooled_path) and otherwise stream the member (see
+    disable_spooling), so they never leave spools behind. Spools pinned by
+    a job in flight are kept; of the others, those of the last max_archives
+    archives are kept and the rest are deleted.
+    """
+
+    def __init__(self, max_archives: int = 4):
+        self.max_archives = max_archives
+        self.owned = True
+        self._lock = threading.Lock()
+        self._spools: "OrderedDict[Tuple[str, int, int], Path]" = OrderedDict()
+        self._pins: Dict[Tuple[str, int, int], int] = {}
+        self._unpacking: Dict[Tuple[str, int, int], threading.Lock] = {}
+        atexit.register(self.clear)
+
+    def path(self, member: "ArchiveMember", pin: bool = False) -> Path:
+        key = _key(member.archive)
+        with self._lock:
+            spool = self._spools.get(key)
+            if spool is not None:
+                self._use(key, pin)
+                return spool / member.name
+            unpacking = self._unpacking.setdefault(key, threading.Lock())
+        with unpacking:
+            with self._lock:
+                spool = self._spools.get(key)
+            if spool is None:
+                spool = self._unpack(member.archive, _load(*key))
+                with self._lock:
+                    self._spools[key] = spool
+                    self._unpacking.pop(key, None)
+            with self._lock:
+                self._use(key, pin)
+        return spool / member.name
+
+    def _use(self, key, pin: bool):
+        self._spools.move_to_end(key)
+        if pin:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        self._evict()
+
+    def unpin(self, member: "ArchiveMember"):
+        key = _key(member.archive)
+        with self._lock:
+            if self._pins.get(key, 0) <= 1:
+                self._pins.pop(key, None)
+            else:
+                self._pins[key] -= 1
+            self._evict()
+
+    def _evict(self):
+        unpinned = [key for key in self._spools if key not in self._pins]
+        for key in unpinned[:max(0, len(unpinned) - self.max_archives)]:
+            shutil.rmtree(self._spools.pop(key), ignore_errors=True)
+
+    @staticmethod
+    def _unpack(archive: Path, members: Dict[str, Tuple[Any, int, int]]) -> Path:
+        spool = Path(tempfile.mkdtemp(prefix="extractor-tar-"))
+        logger.info(f"Unpacking {archive} into {spool}")
+        try:
+            with tarfile.open(archive, "r|*") as tf:
+                for info in tf:
+                    name = _safe_name(info.name) if info.isfile() else None
+                    if name is None or name not in members:
+                        continue
+                    dest = spool / name
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    with tf.extractfile(info) as src, open(dest, "wb") as out:
+                        shutil.copyfileobj(src, out, 1024 * 1024)
+        except (tarfile.TarError, EOFError, OSError) as e:
+            shutil.rmtree(spool, ignore_errors=True)
+            raise ArchiveError(f"Cannot unpack archive {archive}: {e}") from e
+        return spool
+
+    def clear(self):
+        """Deletes every spool (a no-op in workers, which have none of their own)."""
+        if not self.owned:
+            return
+        with self._lock:
+            self._pins.clear()
+            while self._spools:
+                shutil.rmtree(self._spools.popitem()[1], ignore_errors=True)
+
+
+_tar_spool = _TarSpool()
+
+
+def spooled_path(path: Path) -> Optional[Path]:
+    """
+    For a member of a compressed tar, unpacks the archive (once) and
+    returns the member's unpacked copy, pinned until release_spooled; None
+    for any other path. Lets a job hand workers a plain file to read.
+    """
+    member = resolve_member(path)
+    if member is None or not _is_compressed_tar(member.archive) or not _tar_spool.owned:
+        return None
+    return _tar_spool.path(member, pin=True)
+
+
+def release_spooled(path: Path):
+    """Unpins a spooled_path copy, so its spool can be deleted."""
+    member = resolve_member(path)
+    if member is not None and _is_compressed_tar(member.archive):
+        _tar_spool.unpin(member)
+
+
+def disable_spooling():
+    """
+    Called in worker processes: compressed tar members are streamed
+    instead of unpacked, and spools inherited from a fork are left to the
+    main process that owns them.
+    """
+    _tar_spool.owned = False
+
+
+def clear_spools():
+    """Deletes every unpacked compressed tar (at the end of a run)."""
+    _tar_spool.clear()
+
+
+def iter_members(archive: Path) -> Iterator[ArchiveMember]:
+    """Yields the regular files in an archive, sorted by name."""
+    archive = Path(archive)
+    members = _index(archive)
+    for name in sorted(members):
+        _, size, mtime_ns = members[name]
+        yield ArchiveMember(archive, name, size, mtime_ns)
+
+
+def split_member_path(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Splits a virtual path into (archive, member name), or returns None if
+    the path does not lie inside an archive file.
+    """
+    path = Path(path)
+    for parent in path.parents:
+        if is_archive(parent) and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def resolve_member(path: Path) -> Optional[ArchiveMember]:
+    """
+    Returns the archive member a virtual path points at, or None for paths
+    outside archives. Raises FileNotFoundError if the archive has no such
+    member.
+    """
+    split = split_member_path(path)
+    if split is None:
+        return None
+    archive, name = split
+    members = _index(archive)
+    if name not in members:
+        raise FileNotFoundError(f"No member {name} in {archive}")
+    _, size, mtime_ns = members[name]
+    return ArchiveMember(archive, name, size, mtime_ns)
+
+
+@contextmanager
+def open_member(member: ArchiveMember) -> Iterator[BinaryIO]:
+    """Opens an archive member for streaming binary reads."""
+    key = _key(member.archive)
+    info = _load(*key)[member.name][0]
+    try:
+        if key[0].lower().endswith(".zip"):
+            with _zip_handle(key).open(info) as f:
+                yield f
+        elif _is_compressed_tar(member.archive) and _tar_spool.owned:
+            with open(_tar_spool.path(member), "rb") as f:
+                yield f
+        else:
+            # Plain tars seek straight to the member's data; a forked worker
+            # streams a compressed tar member rather than spooling it.
+            with tarfile.open(member.archive) as tf:
+                f = tf.extractfile(info)
+                if f is None:
+                    raise ArchiveError(f"{member.name} in {member.archive} is not a regular file")
+                yield f
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise ArchiveError(f"Cannot read {member.name} from {member.archive}: {e}") from e
+
+
+@contextmanager
+def open_source(path: Path) -> Iterator[BinaryIO]:
+    """Opens a source file for binary reads, whether on disk or inside an archive."""
+    member = resolve_member(path)
+    if member is None:
+        with open(path, "rb", buffering=0) as f:
+            yield f
+    else:
+        with open_member(member) as f:
+            yield f
+
+
+def read_source(path: Path) -> bytes:
+    """Reads a whole source file, whether on disk or inside an archive."""
+    with open_source(path) as f:
+        return f.read()
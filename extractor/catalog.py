@@ -0,0 +1,366 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .utils import connect_state_db, document_shard_key, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog:
+    """
+    SQLite record of the target tree's state, one row per document folder.
+
+    Rows are keyed by the folder's path relative to the target root and hold
+    lineage (document id, source path, hash), stage timestamps (discovered,
+    extracted, exported, inferred) and extraction stats (pages, images,
+    output bytes), so resume, export and status questions do not need to
+    walk and parse every manifest.json.
+    """
+    DB_NAME = "catalog.sqlite"
+
+    def __init__(self, db_path: Path, target_root: Path):
+        self.db_path = Path(db_path)
+        self.target_root = Path(target_root)
+        self._conn = connect_state_db(self.db_path)
+        created = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents'"
+        ).fetchone() is None
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                folder TEXT PRIMARY KEY,
+                document_id TEXT,
+                source_path TEXT,
+                file_type TEXT,
+                file_size INTEGER,
+                hash TEXT,
+                entity_id TEXT,
+                extraction_status TEXT,
+                page_count INTEGER,
+                image_count INTEGER,
+                output_bytes INTEGER,
+                output_digest TEXT,
+                discovered_at TEXT,
+                extracted_at TEXT,
+                exported_at TEXT,
+                inferred_at TEXT,
+                last_error TEXT,
+                failed_at TEXT
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        for column in ("last_error", "failed_at"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE documents ADD COLUMN {column} TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_entity ON documents (entity_id)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                started_at TEXT,
+                finished_at TEXT,
+                workers INTEGER,
+                documents INTEGER,
+                pages INTEGER,
+                seconds REAL
+            )
+            """
+        )
+        if created and not _has_documents(self.target_root):
+            # Started alongside an empty target: every folder will be recorded.
+            self._set_meta("authoritative", "1")
+        self._conn.commit()
+
+    @classmethod
+    def for_target(cls, target_root: Path) -> "Catalog":
+        """Opens the catalog stored under the target root's state directory."""
+        return cls(get_state_dir(target_root) / cls.DB_NAME, target_root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def authoritative(self) -> bool:
+        """
+        True if the catalog covers the whole target tree: it was created
+        before any document folder existed, or rebuilt from the tree since.
+        Otherwise older folders may be missing and callers should walk.
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'authoritative'").fetchone()
+        return bool(row and row[0] == "1")
+
+    def _key(self, folder: Path) -> str:
+        folder = Path(folder)
+        try:
+            return folder.relative_to(self.target_root).as_posix()
+        except ValueError:
+            return folder.as_posix()
+
+    def _ensure_row(self, key: str):
+        self._conn.execute("INSERT OR IGNORE INTO documents (folder) VALUES (?)", (key,))
+
+    def record_discovery(self, folder: Path, manifest: Dict[str, Any]):
+        """Records lineage from a discovery manifest."""
+        key = self._key(folder)
+        self._ensure_row(key)
+        self._conn.execute(
+            """
+            UPDATE documents SET document_id = ?, source_path = ?, file_type = ?,
+                file_size = ?, hash = ?, discovered_at = ?
+            WHERE folder = ?
+            """,
+            (
+                manifest.get("document_id"),
+                manifest.get("source_path"),
+                manifest.get("file_type"),
+                manifest.get("file_size"),
+                manifest.get("hash"),
+                _discovery_timestamp(manifest) or datetime.now().isoformat(),
+                key,
+            ),
+        )
+        self._conn.commit()
+
+    def record_extraction(
+        self,
+        folder: Path,
+        manifest: Dict[str, Any],
+        output_bytes: Optional[int] = None,
+        output_digest: Optional[str] = None,
+    ):
+        """Records a committed extraction from its final manifest."""
+        key = self._key(folder)
+        self._ensure_row(key)
+        status = "duplicate" if manifest.get("duplicate_of") else "success"
+        self._conn.execute(
+            """
+            UPDATE documents SET document_id = COALESCE(?, document_id),
+                source_path = COALESCE(?, source_path), file_type = COALESCE(?, file_type),
+                file_size = COALESCE(?, file_size), hash = COALESCE(?, hash),
+                discovered_at = COALESCE(discovered_at, ?),
+                extraction_status = ?, page_count = ?, image_count = ?,
+                output_bytes = ?, output_digest = ?, extracted_at = ?
+            WHERE folder = ?
+            """,
+            (
+                manifest.get("document_id"),
+                manifest.get("source_path"),
+                manifest.get("file_type"),
+                manifest.get("file_size"),
+                manifest.get("hash"),
+                _discovery_timestamp(manifest),
+                status,
+                manifest.get("page_count"),
+                len(manifest.get("images") or []),
+                output_bytes,
+                output_digest,
+                manifest.get("timestamp") or datetime.now().isoformat(),
+                key,
+            ),
+        )
+        self._conn.commit()
+
+    def record_failure(self, folder: Path, reason: str, timestamp: Optional[str] = None):
+        """
+        Records a failed extraction attempt. A folder extracted by an
+        earlier run keeps its extraction stage.
+        """
+        key = self._key(folder)
+        self._ensure_row(key)
+        self._conn.execute(
+            """
+            UPDATE documents SET last_error = ?, failed_at = ?,
+                extraction_status = CASE WHEN extracted_at IS NULL THEN 'failed' ELSE extraction_status END
+            WHERE folder = ?
+            """,
+            (reason, timestamp or datetime.now().isoformat(), key),
+        )
+        self._conn.commit()
+
+    def is_extracted(self, folder: Path) -> bool:
+        row = self._conn.execute(
+            "SELECT extracted_at FROM documents WHERE folder = ?", (self._key(folder),)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def mark_exported(self, folder: Path, entity_id: str):
+        key = self._key(folder)
+        self._ensure_row(key)
+        self._conn.execute(
+            "UPDATE documents SET entity_id = ?, exported_at = ? WHERE folder = ?",
+            (entity_id, datetime.now().isoformat(), key),
+        )
+
+    def mark_inferred(self, entity_id: str):
+        self._conn.execute(
+            "UPDATE documents SET inferred_at = ? WHERE entity_id = ?",
+            (datetime.now().isoformat(), entity_id),
+        )
+
+    def record_run(self, started_at: str, seconds: float, documents: int, pages: int, workers: int):
+        """Records the throughput of a process run, for ETAs."""
+        self._conn.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+            (started_at, datetime.now().isoformat(), max(1, int(workers)), documents, pages, seconds),
+        )
+        self._conn.commit()
+
+    def pages_per_second(self, recent: int = 10) -> Optional[float]:
+        """
+        Measured pages per second per worker over the most recent runs that
+        converted anything, or None without history.
+        """
+        rows = self._conn.execute(
+            "SELECT pages, seconds, workers FROM runs WHERE pages > 0 AND seconds > 0 ORDER BY rowid DESC LIMIT ?",
+            (recent,),
+        ).fetchall()
+        if not rows:
+            return None
+        return sum(pages for pages, _, _ in rows) / sum(seconds * workers for _, seconds, workers in rows)
+
+    def shard_keys(self) -> Dict[str, str]:
+        """
+        Maps exported document entity ids to their shard key (see
+        utils.document_shard_key). Byte-identical documents share an entity
+        id; it gets the key of the first of their folders.
+        """
+        keys: Dict[str, str] = {}
+        rows = self._conn.execute(
+            "SELECT entity_id, folder, source_path FROM documents"
+            " WHERE entity_id IS NOT NULL AND source_path IS NOT NULL ORDER BY folder"
+        )
+        for entity_id, folder, source_path in rows:
+            keys.setdefault(entity_id, document_shard_key(Path(folder), source_path))
+        return keys
+
+    def flush(self):
+        self._conn.commit()
+
+    def manifests(self) -> Iterator[Path]:
+        """
+        Document manifests to process, from the catalog when it is
+        authoritative and by walking the target tree otherwise.
+        """
+        if self.authoritative:
+            return iter(folder / "manifest.json" for folder in self.folders())
+        return iter_manifests(self.target_root)
+
+    def folders(self) -> List[Path]:
+        """All catalogued document folders (absolute), sorted by path."""
+        rows = self._conn.execute("SELECT folder FROM documents ORDER BY folder").fetchall()
+        return [self.target_root / row[0] for row in rows]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts per stage plus page/image/byte totals."""
+        row = self._conn.execute(
+            """
+            SELECT COUNT(*),
+                COUNT(discovered_at),
+                COUNT(extracted_at),
+                SUM(extraction_status = 'duplicate'),
+                COUNT(exported_at),
+                COUNT(inferred_at),
+                COALESCE(SUM(page_count), 0),
+                COALESCE(SUM(image_count), 0),
+                COALESCE(SUM(output_bytes), 0),
+                SUM(extraction_status = 'failed')
+            FROM documents
+            """
+        ).fetchone()
+        by_type = dict(
+            self._conn.execute(
+                "SELECT COALESCE(file_type, 'UNKNOWN'), COUNT(*) FROM documents GROUP BY 1 ORDER BY 1"
+            ).fetchall()
+        )
+        return {
+            "documents": row[0],
+            "discovered": row[1],
+            "extracted": row[2],
+            "duplicates": row[3] or 0,
+            "exported": row[4],
+            "inferred": row[5],
+            "pages": row[6],
+            "images": row[7],
+            "output_bytes": row[8],
+            "failed": row[9] or 0,
+            "by_type": by_type,
+        }
+
+    def rebuild(self) -> int:
+        """
+        (Re)populates the catalog from the manifests in the target tree, e.g.
+        for trees extracted before the catalog existed. Returns the number of
+        manifests read.
+        """
+        count = 0
+        for manifest_path in iter_manifests(self.target_root):
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            if not isinstance(manifest, dict):
+                continue
+            folder = manifest_path.parent
+            self.record_discovery(folder, manifest)
+            extractions = [
+                h for h in manifest.get("processing_history") or []
+                if isinstance(h, dict) and h.get("step") == "extraction"
+            ]
+            if any(h.get("status") != "failed" for h in extractions):
+                self.record_extraction(folder, manifest)
+            elif extractions:
+                self.record_failure(folder, extractions[-1].get("reason"), extractions[-1].get("timestamp"))
+            count += 1
+        self._set_meta("authoritative", "1")
+        self._conn.commit()
+        return count
+
+    def close(self):
+        try:
+            self._conn.commit()
+        finally:
+            self._conn.close()
+
+
+def _discovery_timestamp(manifest: Dict[str, Any]) -> Optional[str]:
+    for step in manifest.get("processing_history") or []:
+        if isinstance(step, dict) and step.get("step") == "discovery":
+            return step.get("timestamp")
+    return None
+
+
+def _has_documents(target_root: Path) -> bool:
+    try:
+        with os.scandir(target_root) as it:
+            return any(not entry.name.startswith(".") for entry in it)
+    except OSError:
+        return False
+
+
+def iter_manifests(target_root: Path) -> Iterator[Path]:
+    """
+    Yields every document manifest.json under target_root in sorted order,
+    skipping hidden folders (run state, in-flight staging folders).
+    """
+    target_root = Path(target_root)
+    for manifest_path in sorted(target_root.rglob("manifest.json")):
+        rel_parts = manifest_path.parent.relative_to(target_root).parts
+        if any(part.startswith(".") for part in rel_parts):
+            continue
+        yield manifest_path
@@ -1,11 +1,28 @@
 import click
 import logging
 import os
+import shutil
 import sys
+import time
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
-from .discovery import Scanner
+from .archives import clear_spools, is_archive, release_spooled, spooled_path
+from .catalog import Catalog
+from .discovery import Scanner, stat_source
+from .duplicates import DuplicateDetector
+from .image_store import ImageStore
+from .index import DiscoveryIndex
+from .leases import LeaseManager
+from .planning import Planner
+from .prefetch import Prefetcher, StagingCache
+from .retry import RetryQueue, STRATEGIES, strategy_config
+from .watch import Watcher
+from .scheduling import CostModel, Scheduler, estimate_page_count
+from .utils import STATE_DIR_NAME, load_config, parse_shard, in_shard
 from .scaffolding import Scaffolder
-from .docling_engine import DoclingEngine
+from .docling_engine import DoclingEngine, apply_profile, page_windows
+from .workers import ConversionTimeouts, ExtractionJob, ExtractionPipeline, PageSplitter, WorkerLimits, WorkerPool
 import json
 
 
@@ -37,6 +54,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _record_in_index(index, scaffolder, source_file, output_dir):
+    """Marks a handled source file in the discovery index (incremental mode only)."""
+    if index is None:
+        return
+    index.record(stat_source(source_file), scaffolder.read_manifest(output_dir).get("hash"))
+
+def _shard_option(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
 @click.group()
 @click.option('--verbose', is_flag=True, help='Enable verbose logging')
 def cli(verbose):
@@ -55,90 +86,577 @@ def cli(verbose):
         logging.getLogger().setLevel(logging.DEBUG)
 
 
+def _register_canonical(detector, scaffolder, source_file, output_dir):
+    """Makes an extracted PDF available as a duplicate twin for later files."""
+    if detector is None:
+        return
+    detector.register(source_file, output_dir, sha256=scaffolder.read_manifest(output_dir).get("hash"))
+
+
+def _output_dir(source_file, source, target, scaffolder):
+    """The document folder process writes a source file into."""
+    if source.is_file() and not is_archive(source):
+        return target / source_file.stem
+    return scaffolder.get_target_folder(source_file)
+
+
+def _prepare(source_file, source, target, scaffolder, force, index, detector=None, deep_verify=False, leases=None):
+    """
+    Scaffolds a single source file and handles everything short of PDF
+    conversion: skip checks, the discovery manifest and duplicate linking.
+
+    PDF outputs are written into a staging folder (by an ExtractionPipeline
+    or WorkerPool) that _finish() commits into place atomically, so a document folder is either complete or absent.
+
+    With leases (a LeaseManager), a PDF is only staged once this node has
+    claimed its folder; the lease is held while an ExtractionJob is out and
+    released by the caller.
+
+    Returns "skipped", "duplicate", "processed" or "claimed" (by another
+    node) if the file is done here, or an ExtractionJob if it still needs
+    converting; raises on failure.
+    """
+    output_dir = _output_dir(source_file, source, target, scaffolder)
+
+    is_pdf = source_file.suffix.lower() == ".pdf"
+
+    if not force:
+        if is_pdf:
+            if scaffolder.is_extraction_complete(output_dir, source_file.stem, deep_verify=deep_verify):
+                return _skip_extracted(source_file, output_dir, scaffolder, index, detector)
+        else:
+            if scaffolder.is_processed(output_dir):
+                logger.debug(f"Skipping already processed {source_file}")
+                _record_in_index(index, scaffolder, source_file, output_dir)
+                return "skipped"
+
+    if not is_pdf or leases is None:
+        return _stage(source_file, output_dir, scaffolder, force, index, detector)
+
+    if not leases.acquire(output_dir):
+        logger.info(f"Skipping {source_file}: claimed by another node")
+        return "claimed"
+    try:
+        if not force and scaffolder.is_extraction_complete(output_dir, source_file.stem):
+            # Committed by another node between the check above and the claim.
+            outcome = _skip_extracted(source_file, output_dir, scaffolder, index, detector)
+        else:
+            outcome = _stage(source_file, output_dir, scaffolder, force, index, detector)
+    except BaseException:
+        leases.release(output_dir)
+        raise
+    if not isinstance(outcome, ExtractionJob):
+        leases.release(output_dir)
+    return outcome
+
+
+def _skip_extracted(source_file, output_dir, scaffolder, index, detector):
+    logger.info(f"Skipping already processed {source_file}")
+    _record_in_index(index, scaffolder, source_file, output_dir)
+    _register_canonical(detector, scaffolder, source_file, output_dir)
+    return "skipped"
+
+
+def _stage(source_file, output_dir, scaffolder, force, index, detector):
+    """Writes the discovery manifest and links duplicates; see _prepare."""
+    is_pdf = source_file.suffix.lower() == ".pdf"
+    if is_pdf:
+        work_dir = scaffolder.begin_staging(output_dir, keep_manifest=not force)
+    else:
+        work_dir = output_dir
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        scaffolder.link_source(source_file, work_dir)
+    except Exception as e:
+        logger.debug(f"Failed to link source for {source_file}: {e}")
+
+    manifest_path = work_dir / "manifest.json"
+    if not manifest_path.exists() or force:
+        scaffolder.write_manifest(source_file, work_dir)
+
+    if not is_pdf:
+        _record_in_index(index, scaffolder, source_file, output_dir)
+        return "processed"
+
+    if detector is not None and not force:
+        twin = detector.find_twin(source_file, sha256=scaffolder.read_manifest(work_dir).get("hash"))
+        if twin is not None:
+            if scaffolder.is_extraction_complete(twin.target_folder, twin.source_path.stem):
+                logger.info(f"{source_file} is identical to {twin.source_path}; linking its outputs")
+                scaffolder.materialise_duplicate(twin, source_file, work_dir)
+                scaffolder.commit(work_dir, output_dir)
+                _record_in_index(index, scaffolder, source_file, output_dir)
+                return "duplicate"
+            detector.forget(twin.sha256)
+
+    logger.info(f"Processing {source_file} -> {output_dir}")
+    return ExtractionJob(source_file, work_dir, output_dir, page_count=estimate_page_count(source_file))
+
+
+def _finish(job, scaffolder, index, detector=None, leases=None):
+    """
+    Commits a converted document and records it; returns "processed", or
+    "claimed" if leases show another node took the document over meanwhile.
+    """
+    still_owned = (lambda: leases.holds(job.output_dir)) if leases is not None else None
+    if scaffolder.commit(job.work_dir, job.output_dir, still_owned=still_owned) is None:
+        logger.warning(f"Lost the claim on {job.source_file} before committing it")
+        return "claimed"
+    _record_in_index(index, scaffolder, job.source_file, job.output_dir)
+    _register_canonical(detector, scaffolder, job.source_file, job.output_dir)
+    return "processed"
+
+
+def _load_profile_config(profile, target):
+    """
+    Loads config.yaml with an extraction profile applied (see
+    docling_engine.apply_profile), and points the image store at the
+    target's state directory unless images.store_dir is set or
+    images.store is false.
+    """
+    try:
+        config = apply_profile(load_config(), profile)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--profile'")
+    images_config = config.setdefault("images", {}) or {}
+    if images_config.get("store", True) and not images_config.get("store_dir"):
+        images_config["store_dir"] = str(Path(target).resolve() / STATE_DIR_NAME / ImageStore.DIR_NAME)
+    config["images"] = images_config
+    return config
+
+
+def _make_pool(config, workers):
+    """Builds the conversion pool for process/retry: worker processes, or in-process with workers=0."""
+    pipeline_config = config.get("pipeline") or {}
+    writers = pipeline_config.get("writers", 2)
+    if workers:
+        pool = WorkerPool(
+            workers,
+            config,
+            writers=writers,
+            limits=WorkerLimits.from_config(pipeline_config),
+            timeouts=ConversionTimeouts.from_config(pipeline_config),
+            share_models=pipeline_config.get("share_models", True),
+        )
+    else:
+        pool = ExtractionPipeline(
+            DoclingEngine(config), writers=writers, max_pending=pipeline_config.get("max_pending", 2)
+        )
+    return PageSplitter(pool, lambda job: page_windows(job.page_count, config))
+
+
+def _make_prefetcher(config, depth, scaffolder):
+    """Builds the Prefetcher from --prefetch and the prefetch section of config.yaml, or None if disabled."""
+    prefetch_config = config.get("prefetch") or {}
+    if depth is None:
+        depth = prefetch_config.get("depth", 2)
+    if not depth:
+        return None
+    cache = None
+    if prefetch_config.get("cache_dir"):
+        cache = StagingCache(prefetch_config["cache_dir"], int(prefetch_config.get("cache_gb", 20) * 1024 ** 3))
+    return Prefetcher(scaffolder.hash_service, depth=depth, cache=cache)
+
+
+class _Run:
+    """
+    Feeds source files through _prepare and a conversion pool and commits
+    the results, for one process or retry pass. Failures are recorded in
+    the document's manifest and the retry queue; successes leave the queue.
+    """
+
+    def __init__(self, pool, scaffolder, source, target, force, index, detector=None, deep_verify=False,
+                 leases=None, retry_queue=None, strategy="initial", prefetcher=None):
+        self.pool = pool
+        self.scaffolder = scaffolder
+        self.source = source
+        self.target = target
+        self.force = force
+        self.index = index
+        self.detector = detector
+        self.deep_verify = deep_verify
+        self.leases = leases
+        self.retry_queue = retry_queue
+        self.strategy = strategy
+        self.prefetcher = prefetcher
+        self.counts = {"processed": 0, "skipped": 0, "duplicate": 0, "claimed": 0, "errors": 0}
+        self.started_at = datetime.now()
+        self._run_start = time.monotonic()
+        self.converted_pages = 0
+        # sha256 of PDFs handed to the pool, so an identical file arriving
+        # while its twin is still converting waits and is linked instead.
+        self._in_flight = {}
+        # Source files whose job reads a spooled_path copy.
+        self._spooled = set()
+
+    def error(self, source_file, e, output_dir=None, stage="prepare", error_type=None):
+        logger.error(f"Error extracting {source_file}: {e}")
+        click.echo(f"Error extracting {source_file}: {e}", err=True)
+        self.counts["errors"] += 1
+        if self.retry_queue is None:
+            return
+        if error_type is None:
+            error_type = type(e).__name__ if isinstance(e, BaseException) else "Error"
+        try:
+            self.retry_queue.record_failure(
+                source_file, self.scaffolder.source_root,
+                output_dir or self.scaffolder.get_target_folder(source_file),
+                stage, error_type, str(e), strategy=self.strategy,
+            )
+        except Exception as queue_error:
+            logger.warning(f"Could not queue {source_file} for retry: {queue_error}")
+
+    def finish(self, results):
+        """Commits documents whose outputs have been written."""
+        for result in results:
+            job = result.job
+            self._in_flight.pop(str(job.work_dir), None)
+            if self.leases is not None and not self.leases.holds(job.output_dir):
+                # Our lease expired and another node has taken the document
+                # over; it stages into a folder of its own, so drop ours.
+                logger.warning(f"Lost the claim on {job.source_file}; leaving it to the node that holds it")
+                shutil.rmtree(job.work_dir, ignore_errors=True)
+                self.counts["claimed"] += 1
+                continue
+            try:
+                if result.error is not None:
+                    self.error(job.source_file, result.error, job.output_dir, result.stage or "convert", result.error_type)
+                    try:
+                        self.scaffolder.record_failure(job.work_dir, job.output_dir, result.error)
+                    except Exception as e:
+                        logger.warning(f"Could not record failure of {job.source_file}: {e}")
+                    continue
+                try:
+                    outcome = _finish(job, self.scaffolder, self.index, self.detector, self.leases)
+                    self.counts[outcome] += 1
+                    if outcome == "processed":
+                        self.converted_pages += job.page_count or 0
+                        if self.retry_queue is not None:
+                            self.retry_queue.resolve(job.source_file)
+                except Exception as e:
+                    self.error(job.source_file, e, job.output_dir, "commit")
+            finally:
+                if self.leases is not None:
+                    self.leases.release(job.output_dir)
+                if self.prefetcher is not None:
+                    self.prefetcher.release(job.source_file)
+                if str(job.source_file) in self._spooled:
+                    self._spooled.discard(str(job.source_file))
+                    release_spooled(job.source_file)
+
+    def handle(self, source_file):
+        try:
+            outcome = self._prepare(source_file)
+            if isinstance(outcome, ExtractionJob) and self.detector is not None:
+                sha256 = self.scaffolder.read_manifest(outcome.work_dir).get("hash")
+                if sha256 and sha256 in self._in_flight.values():
+                    while sha256 in self._in_flight.values():
+                        self.finish(self.pool.collect(timeout=None))
+                    outcome = self._prepare(source_file)
+                if isinstance(outcome, ExtractionJob) and sha256:
+                    self._in_flight[str(outcome.work_dir)] = sha256
+            if isinstance(outcome, ExtractionJob):
+                read_path = self.prefetcher.local_path(source_file) if self.prefetcher is not None else None
+                if read_path is None:
+                    # Workers read a compressed tar member from the copy
+                    # unpacked here rather than each unpacking the archive.
+                    read_path = spooled_path(source_file)
+                    if read_path is not None:
+                        self._spooled.add(str(source_file))
+                self.finish(self.pool.submit(replace(outcome, read_path=read_path)))
+            else:
+                if self.prefetcher is not None:
+                    self.prefetcher.release(source_file)
+                self.counts[outcome] += 1
+                if outcome in ("skipped", "duplicate") and self.retry_queue is not None:
+                    self.retry_queue.resolve(source_file)
+                self.finish(self.pool.collect())
+        except Exception as e:
+            self.error(source_file, e)
+
+    def needs_conversion(self, source_file):
+        """Cheap check whether handle() may convert a file (what the Prefetcher reads ahead)."""
+        if source_file.suffix.lower() != ".pdf":
+            return False
+        if self.force:
+            return True
+        output_dir = _output_dir(source_file, self.source, self.target, self.scaffolder)
+        return not self.scaffolder.is_extraction_complete(output_dir, source_file.stem)
+
+    def _prepare(self, source_file):
+        return _prepare(source_file, self.source, self.target, self.scaffolder, self.force, self.index,
+                        self.detector, self.deep_verify, self.leases)
+
+    def record_throughput(self, workers):
+        """Stores this run's pages/sec in the catalog for --plan ETAs."""
+        if self.converted_pages:
+            self.scaffolder.catalog.record_run(
+                self.started_at.isoformat(), time.monotonic() - self._run_start,
+                self.counts["processed"], self.converted_pages, workers,
+            )
+
+
+def _format_duration(seconds):
+    hours, rem = divmod(int(seconds), 3600)
+    return f"{hours}h{rem // 60:02d}m"
+
+
+def _print_plan(scanner, scaffolder, in_my_shard, config, source, target, force, deep_verify, workers):
+    """Runs the dry run for process --plan and prints its report."""
+    pages_per_second = None
+    if (target / STATE_DIR_NAME / Catalog.DB_NAME).exists():
+        with Catalog.for_target(target) as catalog:
+            pages_per_second = catalog.pages_per_second()
+    planner = Planner(
+        scaffolder, CostModel.from_config(config), force=force, deep_verify=deep_verify,
+        output_dir_for=lambda source_file: _output_dir(source_file, source, target, scaffolder),
+    )
+    summary = planner.plan(
+        (f for f in scanner.scan() if in_my_shard(f)), workers=max(1, workers), pages_per_second=pages_per_second
+    ).summary()
+
+    click.echo(f"Plan: {summary['documents']} documents, {summary['process']} to process, {summary['skip']} to skip")
+    click.echo(f"  Pages to process: {summary['pages']} ({summary['unknown_pages']} PDFs with unknown page count)")
+    click.echo(f"  Bytes to process: {summary['bytes'] / (1024 * 1024):.1f} MiB")
+    for title, key in (("By folder", "by_folder"), ("By file type", "by_type")):
+        click.echo(f"{title}:")
+        for name, totals in summary[key].items():
+            click.echo(f"  {name}: {totals['process']} to process ({totals['pages']} pages), {totals['skip']} to skip")
+    source = "measured" if summary["measured"] else "configured"
+    click.echo(
+        f"ETA: {_format_duration(summary['eta_seconds'])} with {max(1, workers)} worker(s) "
+        f"at {summary['pages_per_second']:.2f} pages/sec per worker ({source})"
+    )
+
+
 @cli.command()
 @click.option('--source', required=True, type=click.Path(exists=True, file_okay=True, path_type=Path), help='Source file or directory path')
 @click.option('--target', required=True, type=click.Path(path_type=Path), help='Target directory path')
 @click.option('--force', is_flag=True, help='Force overwrite of existing processed documents')
-def process(source, target, force):
+@click.option('--incremental', is_flag=True, help='Only consider source files that are new or changed since the last incremental run')
+@click.option('--no-dedup', is_flag=True, help='Convert byte-identical PDFs separately instead of linking outputs from an already-extracted twin')
+@click.option('--shard', callback=_shard_option, metavar='I/N', help='Only handle files in shard I of N (1-based), assigned by a stable hash of the path relative to --source')
+@click.option('--order', type=click.Choice(['scan', 'largest-first']), default='scan', show_default=True, help='scan: start converting as files are found; largest-first: estimate cost (page count, size) up front and convert the most expensive documents first')
+@click.option('--deep-verify', is_flag=True, help='Fully re-check committed documents (all outputs present and matching the commit digest) instead of trusting the commit marker')
+@click.option('--watch', is_flag=True, help='After the initial pass, keep running and process new files as they land')
+@click.option('--watch-poll', is_flag=True, help='With --watch, poll the source tree instead of using inotify (e.g. for NFS shares)')
+@click.option('--watch-interval', type=click.FloatRange(min=0, min_open=True), default=None, help='With --watch-poll, seconds between re-walks of the source tree. Default: watch.poll_interval in config.yaml, else 60')
+@click.option('--settle-seconds', type=float, default=5.0, show_default=True, help='With --watch, how long a file size must stay unchanged before processing')
+@click.option('--workers', type=click.IntRange(min=0), default=0, show_default=True, help='Number of extraction processes, each with its own warm Docling engine, recycled by document count and RSS; a document that hangs past its time budget or crashes its worker fails alone. 0 converts in-process, without isolation')
+@click.option('--prefetch', type=click.IntRange(min=0), default=None, help='Read (and hash) this many documents ahead of conversion; 0 disables. Default: prefetch.depth in config.yaml, else 2')
+@click.option('--plan', is_flag=True, help='Dry run: apply the skip checks and count pages without converting anything, then report totals per folder and file type and an ETA')
+@click.option('--shared', is_flag=True, help='Coordinate with other nodes processing the same target: claim each PDF through a lease file before converting it')
+@click.option('--profile', help='Extraction profile (fast, balanced, accurate, or one defined under docling.profiles). Default: docling.profile in config.yaml, else balanced')
+def process(source, target, force, incremental, no_dedup, shard, order, deep_verify, watch, watch_poll, watch_interval, settle_seconds, workers, prefetch, plan, shared, profile):
     """Discover + extract in a single step (creates per-doc folder + symlink, then runs extraction)."""
     click.echo(f"Processing from {source} to {target}")
+    if shard is not None:
+        click.echo(f"Shard {shard[0]}/{shard[1]}")
+
+    if watch and not source.is_dir():
+        click.echo("--watch requires --source to be a directory", err=True)
+        sys.exit(2)
 
+    config = _load_profile_config(profile, target)
+    index = None
+    detector = None
+    pool = None
+    leases = None
+    retry_queue = None
     try:
-        engine = DoclingEngine()
-        scanner = Scanner(source)
+        if incremental and plan:
+            # A dry run leaves the target untouched: it reads the index of
+            # earlier runs if there is one and never creates it.
+            index_path = target / STATE_DIR_NAME / DiscoveryIndex.DB_NAME
+            if index_path.exists():
+                index = DiscoveryIndex(index_path, read_only=True)
+        elif incremental:
+            index = DiscoveryIndex.for_target(target)
+        scanner = Scanner(source, index=None if force else index)
         scaffolder = Scaffolder(source if source.is_dir() else source.parent, target)
 
-        count = 0
-        errors = 0
-        skipped = 0
+        def in_my_shard(source_file):
+            return in_shard(scaffolder.get_relative_path(source_file).as_posix(), shard)
 
-        for source_file in scanner.scan():
-            try:
-                if source.is_file():
-                    output_dir = target / source_file.stem
-                else:
-                    output_dir = scaffolder.get_target_folder(source_file)
-
-                is_pdf = source_file.suffix.lower() == ".pdf"
-
-                if not force:
-                    if is_pdf:
-                        if scaffolder.is_extraction_complete(output_dir, source_file.stem):
-                            logger.info(f"Skipping already processed {source_file}")
-                            skipped += 1
-                            continue
-                    else:
-                        if scaffolder.is_processed(output_dir):
-                            logger.debug(f"Skipping already processed {source_file}")
-                            skipped += 1
-                            continue
-
-                output_dir.mkdir(parents=True, exist_ok=True)
-                try:
-                    scaffolder.link_source(source_file, output_dir)
-                except Exception as e:
-                    logger.debug(f"Failed to link source for {source_file}: {e}")
-
-                manifest_path = output_dir / "manifest.json"
-                if not manifest_path.exists() or force:
-                    scaffolder.write_manifest(source_file, output_dir)
+        if plan:
+            _print_plan(scanner, scaffolder, in_my_shard, config, source, target, force, deep_verify, workers)
+            return
 
-                if not is_pdf:
-                    count += 1
-                    continue
+        # Open the catalog before anything is staged: it is only marked
+        # authoritative if the target holds no document folders yet.
+        scaffolder.catalog
+        pool = _make_pool(config, workers)
+        if not no_dedup:
+            detector = DuplicateDetector.for_target(target)
+        if shared:
+            lease_config = config.get("leases") or {}
+            leases = LeaseManager.for_target(
+                target, ttl=lease_config.get("ttl_seconds", 600), heartbeat=lease_config.get("heartbeat_seconds", 60)
+            )
+            scaffolder.owner = leases.owner
+        retry_queue = RetryQueue.for_target(target)
+        prefetcher = _make_prefetcher(config, prefetch, scaffolder)
+        run = _Run(pool, scaffolder, source, target, force, index, detector, deep_verify, leases, retry_queue,
+                   prefetcher=prefetcher)
+        handle, finish = run.handle, run.finish
 
-                logger.info(f"Processing {source_file} -> {output_dir}")
+        # Start watching before the initial pass so files landing during it are not missed.
+        watcher = None
+        if watch:
+            if watch_interval is None:
+                watch_interval = (config.get("watch") or {}).get("poll_interval")
+            watcher = Watcher(scanner, settle_seconds=settle_seconds, poll_interval=watch_interval,
+                              use_inotify=not watch_poll)
 
-                result = engine.convert(source_file)
+        source_files = (f for f in scanner.scan() if in_my_shard(f))
+        if order == "largest-first":
+            work = Scheduler(CostModel.from_config(config)).schedule(source_files)
+            total_cost = sum(item.cost for item in work)
+            click.echo(f"Scheduled {len(work)} files largest-first (estimated {total_cost / 3600:.1f} CPU-hours)")
+            source_files = (item.path for item in work)
+        if prefetcher is not None:
+            source_files = prefetcher.iterate(source_files, wanted=run.needs_conversion)
 
-                engine.save_markdown(result, output_dir / f"{source_file.stem}.md")
-                engine.save_json(result, output_dir / f"{source_file.stem}.json")
-                image_metadata = engine.save_images(result, output_dir / "images")
+        for source_file in source_files:
+            handle(source_file)
+        finish(pool.drain())
 
-                if image_metadata:
-                    images_dir = output_dir / "images"
-                    images_dir.mkdir(parents=True, exist_ok=True)
-                    with open(images_dir / "image_metadata.json", "w", encoding="utf-8") as f:
-                        json.dump(image_metadata, f, indent=2, ensure_ascii=False)
-
-                engine.generate_manifest(result, output_dir / "manifest.json", image_metadata)
+        if watcher is not None:
+            click.echo(f"Initial pass complete; watching {source} for new files (Ctrl-C to stop)")
+            try:
+                for source_file in watcher.settled_files(on_idle=lambda: finish(pool.collect())):
+                    if in_my_shard(source_file):
+                        handle(source_file)
+                    if index is not None:
+                        index.flush()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                watcher.close()
+            finish(pool.drain())
 
-                count += 1
-            except Exception as e:
-                logger.error(f"Error extracting {source_file}: {e}")
-                click.echo(f"Error extracting {source_file}: {e}", err=True)
-                errors += 1
+        run.record_throughput(workers)
 
-        click.echo(f"Processing complete.")
-        click.echo(f"  Successfully processed:   {count}")
-        click.echo(f"  Skipped (already exists): {skipped}")
-        click.echo(f"  Errors encountered:       {errors}")
+        counts = run.counts
+        click.echo("Processing complete.")
+        click.echo(f"  Successfully processed:   {counts['processed']}")
+        click.echo(f"  Skipped (already exists): {counts['skipped']}")
+        click.echo(f"  Duplicates linked:        {counts['duplicate']}")
+        if leases is not None:
+            click.echo(f"  Claimed by other nodes:   {counts['claimed']}")
+        click.echo(f"  Errors encountered:       {counts['errors']}")
+        if counts["errors"]:
+            click.echo(f"  Failed documents are queued for `extractor retry --target {target}`")
 
     except Exception as e:
         logger.critical(f"Critical error during processing: {e}")
         sys.exit(1)
+    finally:
+        if pool is not None:
+            pool.close()
+        clear_spools()
+        if leases is not None:
+            leases.close()
+        if retry_queue is not None:
+            retry_queue.close()
+        if index is not None:
+            index.close()
+        if detector is not None:
+            detector.close()
+
+
+@cli.command()
+@click.option('--target', required=True, type=click.Path(exists=True, file_okay=False, path_type=Path), help='Target directory path')
+@click.option('--rebuild', is_flag=True, help='Re-read every manifest.json into the catalog first (e.g. for targets extracted before the catalog existed)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON')
+def status(target, rebuild, as_json):
+    """Summarise the target tree's stage counts from the catalog."""
+    with Catalog.for_target(target) as catalog:
+        if rebuild:
+            click.echo(f"Rebuilt catalog from {catalog.rebuild()} manifests")
+        summary = catalog.summary()
+        summary["complete"] = catalog.authoritative
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+        return
 
+    click.echo(f"Documents:  {summary['documents']}")
+    click.echo(f"  Extracted: {summary['extracted']} ({summary['duplicates']} duplicates)")
+    click.echo(f"  Exported:  {summary['exported']}")
+    click.echo(f"  Inferred:  {summary['inferred']}")
+    click.echo(f"  Failed:    {summary['failed']}")
+    click.echo(f"Pages:      {summary['pages']}")
+    click.echo(f"Images:     {summary['images']}")
+    click.echo(f"Output:     {summary['output_bytes'] / (1024 * 1024):.1f} MiB")
+    for file_type, count in summary["by_type"].items():
+        click.echo(f"  {file_type}: {count}")
+    if not summary["complete"]:
+        click.echo("Note: the catalog may not cover documents extracted before it existed; run with --rebuild.")
+
+
+
+def _print_failure_report(queue):
+    clusters = queue.clusters()
+    exhausted = sum(c["exhausted"] for c in clusters)
+    click.echo(f"Retry queue: {len(queue)} documents ({exhausted} exhausted every strategy)")
+    for cluster in clusters:
+        click.echo(f"  {cluster['count']:>5}  {cluster['stage']}/{cluster['error_type']}: {cluster['signature']}")
+        for example in cluster["examples"]:
+            click.echo(f"           e.g. {example}")
+
+
+@cli.command()
+@click.option('--target', required=True, type=click.Path(exists=True, file_okay=False, path_type=Path), help='Target directory path')
+@click.option('--workers', type=click.IntRange(min=0), default=0, show_default=True, help='Number of extraction processes (see process --workers)')
+@click.option('--report', 'report_only', is_flag=True, help='Only print the failures clustered by cause')
+@click.option('--json', 'as_json', is_flag=True, help='With --report, print the clusters as JSON')
+@click.option('--profile', help='Extraction profile to retry with (see process --profile)')
+def retry(target, workers, report_only, as_json, profile):
+    """Reprocess documents in the retry queue, escalating the strategy on each attempt (same settings, no OCR, page-split)."""
+    with RetryQueue.for_target(target) as queue:
+        if report_only:
+            if as_json:
+                click.echo(json.dumps(queue.clusters(), indent=2))
+            else:
+                _print_failure_report(queue)
+            return
+
+        config = _load_profile_config(profile, target)
+        batches = {}
+        for failure in queue.failures():
+            if failure.next_strategy is None:
+                continue
+            try:
+                stat_source(failure.source_path)
+            except OSError:
+                logger.warning(f"Source {failure.source_path} is gone; leaving it in the retry queue")
+                continue
+            batches.setdefault((failure.next_strategy, failure.source_root), []).append(failure)
+
+        counts = {"processed": 0, "skipped": 0, "duplicate": 0, "errors": 0}
+        order = lambda batch: (STRATEGIES.index(batch[0][0]), str(batch[0][1]))
+        for (strategy, source_root), failures in sorted(batches.items(), key=order):
+            click.echo(f"Retrying {len(failures)} documents from {source_root} ({strategy})")
+            pool = _make_pool(strategy_config(config, strategy), workers)
+            try:
+                run = _Run(pool, Scaffolder(source_root, target), source_root, target, False, None,
+                           retry_queue=queue, strategy=strategy)
+                for failure in failures:
+                    run.handle(failure.source_path)
+                run.finish(pool.drain())
+            finally:
+                pool.close()
+                clear_spools()
+            for key in counts:
+                counts[key] += run.counts[key]
 
+        click.echo("Retry complete.")
+        click.echo(f"  Successfully processed:   {counts['processed']}")
+        click.echo(f"  Already done:             {counts['skipped'] + counts['duplicate']}")
+        click.echo(f"  Failed again:             {counts['errors']}")
+        _print_failure_report(queue)
 
 if __name__ == '__main__':
     cli()
@@ -1,5 +1,40 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator, Set
+from typing import Generator, List, Set, Tuple
+
+from .archives import is_archive, iter_members, resolve_member
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ScanEntry:
+    """A discovered source file with the stat info gathered during the walk."""
+    path: Path
+    size: int
+    mtime_ns: int
+    inode: int = 0
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+
+def stat_source(path: Path) -> ScanEntry:
+    """
+    Stats a source file, which may be a member inside an archive; members
+    carry the archive's inode and their own size and mtime.
+    """
+    member = resolve_member(path)
+    if member is not None:
+        return ScanEntry(member.path, member.size, member.mtime_ns, member.archive.stat().st_ino)
+    path = Path(path)
+    st = path.stat()
+    return ScanEntry(path, st.st_size, st.st_mtime_ns, st.st_ino)
+
 
 class Scanner:
     SUPPORTED_EXTENSIONS: Set[str] = {
@@ -11,8 +46,21 @@ class Scanner:
         '.mp4', '.avi', '.mov', '.mkv'
     }
 
-    def __init__(self, source_path: Path):
+    def __init__(self, source_path: Path, max_workers: int = 8, index=None, archives: bool = True):
+        """
+        Args:
+            source_path: Source file or directory to scan.
+            max_workers: Number of threads used to list directories.
+            index: Optional DiscoveryIndex; when given, files whose path,
+                size, mtime and inode are unchanged since they were last
+                recorded are not yielded (incremental mode).
+            archives: Treat zip/tar archives as directories and yield their
+                supported members as virtual paths (archive/member).
+        """
         self.source_path = Path(source_path)
+        self.max_workers = max(1, int(max_workers))
+        self.index = index
+        self.archives = archives
 
     def scan(self) -> Generator[Path, None, None]:
         """
@@ -20,23 +68,104 @@ class Scanner:
         Ignores hidden files (starting with .).
         If source_path is a file, yields it if supported.
         """
+        for entry in self.scan_entries():
+            yield entry.path
+
+    def scan_entries(self) -> Generator[ScanEntry, None, None]:
+        """
+        Like scan(), but yields ScanEntry objects carrying size and mtime.
+
+        Directory listings are fanned out over a thread pool and results are
+        streamed as soon as each directory has been listed. Hidden directories
+        are pruned before descending into them. With an index attached, only
+        new or changed files are yielded.
+        """
         if not self.source_path.exists():
             return
 
         if self.source_path.is_file():
-            if self.source_path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
-                yield self.source_path
+            if self.archives and is_archive(self.source_path):
+                for entry in self.scan_archive(self.source_path):
+                    if not self._is_unchanged(entry):
+                        yield entry
+            elif self.source_path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
+                st = self.source_path.stat()
+                entry = ScanEntry(self.source_path, st.st_size, st.st_mtime_ns, st.st_ino)
+                if not self._is_unchanged(entry):
+                    yield entry
             return
 
-        for path in self.source_path.rglob('*'):
-            # simple check to skip hidden files/dirs effectively? 
-            # rglob('*') iterates everything. 
-            # To strictly ignore hidden dirs during traversal, os.walk is better. 
-            # But let's stick to a simple implementation first that passes tests.
-            # Checking parts for hidden components ensures we don't process files in hidden dirs.
-            
-            if any(part.startswith('.') for part in path.relative_to(self.source_path).parts):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {pool.submit(self._list_dir, self.source_path)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    for subdir in subdirs:
+                        pending.add(pool.submit(self._list_dir, subdir))
+                    for entry in files:
+                        if not self._is_unchanged(entry):
+                            yield entry
+
+    def scan_archive(self, archive: Path) -> List[ScanEntry]:
+        """
+        Lists the supported, non-hidden members of a zip/tar archive without
+        unpacking it. Unreadable archives are logged and yield nothing.
+        """
+        archive = Path(archive)
+        try:
+            inode = archive.stat().st_ino
+            members = list(iter_members(archive))
+        except OSError as e:
+            logger.warning(f"Cannot list archive {archive}: {e}")
+            return []
+        return [
+            ScanEntry(member.path, member.size, member.mtime_ns, inode)
+            for member in members
+            if os.path.splitext(member.name)[1].lower() in self.SUPPORTED_EXTENSIONS
+            and not any(part.startswith('.') for part in member.name.split('/'))
+        ]
+
+    def _is_unchanged(self, entry: ScanEntry) -> bool:
+        return self.index is not None and self.index.is_unchanged(entry)
+
+    def _list_dir(self, directory: Path) -> Tuple[List[ScanEntry], List[Path]]:
+        """Lists one directory, returning supported files and subdirectories."""
+        files: List[ScanEntry] = []
+        subdirs: List[Path] = []
+        archives: List[Path] = []
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"Cannot list {directory}: {e}")
+            return files, subdirs
+
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                # Do not follow directory symlinks (matches Path.rglob).
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(directory / entry.name)
+                    continue
+                if self.archives and is_archive(entry.name):
+                    if entry.is_file():
+                        archives.append(directory / entry.name)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in self.SUPPORTED_EXTENSIONS:
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError as e:
+                logger.debug(f"Cannot stat {entry.path}: {e}")
                 continue
-                
-            if path.is_file() and path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
-                yield path
+            files.append(
+                ScanEntry(directory / entry.name, st.st_size, st.st_mtime_ns, st.st_ino)
+            )
+
+        for archive in archives:
+            files.extend(self.scan_archive(archive))
+
+        return files, subdirs
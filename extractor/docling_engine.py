@@ -1,20 +1,184 @@
+import copy
+import io
 import os
 import logging
-import re
-import shutil
-import subprocess
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Dict, Any, Optional
-
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions, RapidOcrOptions
-from docling.datamodel.layout_model_specs import DOCLING_LAYOUT_HERON_101, LayoutModelConfig
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from docling.datamodel.base_models import DocumentStream, InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions, RapidOcrOptions, TableFormerMode
+from docling.datamodel.layout_model_specs import (
+    DOCLING_LAYOUT_EGRET_LARGE,
+    DOCLING_LAYOUT_EGRET_MEDIUM,
+    DOCLING_LAYOUT_EGRET_XLARGE,
+    DOCLING_LAYOUT_HERON,
+    DOCLING_LAYOUT_HERON_101,
+    LayoutModelConfig,
+)
 from docling.datamodel.accelerator_options import AcceleratorOptions, AcceleratorDevice
 from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling_core.types.doc import DoclingDocument, PageItem, Size
+from extractor.archives import open_member, resolve_member
+from extractor.document_io import DEFAULT_JSON_FORMAT, check_json_format, document_path, write_document
+from extractor.duplicates import link_or_copy
+from extractor.image_store import ImageEncoder, ImageStore
+from extractor.page_analysis import PageProfile, PageThresholds, analyse_pages, page_runs
+from extractor.pdf_images import pdf_page_count, read_embedded_images
 from extractor.utils import load_config, get_file_metadata
 
 logger = logging.getLogger(__name__)
 
+# PDFs longer than split_pages are converted in windows of window_pages.
+DEFAULT_SPLIT_PAGES = 400
+DEFAULT_WINDOW_PAGES = 100
+
+LAYOUT_MODEL_SPECS = {
+    spec.repo_id: spec
+    for spec in (
+        DOCLING_LAYOUT_HERON,
+        DOCLING_LAYOUT_HERON_101,
+        DOCLING_LAYOUT_EGRET_MEDIUM,
+        DOCLING_LAYOUT_EGRET_LARGE,
+        DOCLING_LAYOUT_EGRET_XLARGE,
+    )
+}
+
+# Built-in extraction profiles: docling settings applied over the docling:
+# section by apply_profile(). docling.profiles in config.yaml can override
+# their settings or add profiles of its own.
+DEFAULT_PROFILE = "balanced"
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # Triage: text layer and layout only, light tables, embedded images read directly.
+    "fast": {
+        "layout_model": "https://huggingface.co/docling-project/docling-layout-heron",
+        "do_ocr": False,
+        "do_table_structure": True,
+        "table_mode": "fast",
+        "images_scale": 1.0,
+        "generate_picture_images": False,
+        "adaptive_pages": True,
+    },
+    # The defaults: OCR and accurate tables on the pages that need them.
+    "balanced": {
+        "do_ocr": True,
+        "do_table_structure": True,
+        "table_mode": "accurate",
+        "images_scale": 1.0,
+        "generate_picture_images": True,
+        "adaptive_pages": True,
+    },
+    # Every model on every page, pictures at twice the resolution.
+    "accurate": {
+        "layout_model": "https://huggingface.co/docling-project/docling-layout-heron-101",
+        "do_ocr": True,
+        "do_table_structure": True,
+        "table_mode": "accurate",
+        "images_scale": 2.0,
+        "generate_picture_images": True,
+        "adaptive_pages": False,
+    },
+}
+
+
+def apply_profile(config: Dict[str, Any], profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns a copy of the configuration with an extraction profile's
+    settings applied over its docling: section and the profile's name in
+    docling.profile. Defaults to docling.profile, else "balanced".
+
+    Raises:
+        ValueError: If no such profile is defined.
+    """
+    config = copy.deepcopy(config or {})
+    docling_config = config.get("docling") or {}
+    profiles = {name: dict(settings) for name, settings in PROFILES.items()}
+    for name, settings in (docling_config.pop("profiles", None) or {}).items():
+        profiles.setdefault(name, {}).update(settings or {})
+    profile = profile or docling_config.get("profile") or DEFAULT_PROFILE
+    if profile not in profiles:
+        raise ValueError(f"Unknown extraction profile '{profile}' (choose from {', '.join(sorted(profiles))})")
+    docling_config.update(profiles[profile])
+    docling_config["profile"] = profile
+    config["docling"] = docling_config
+    return config
+
+
+def page_windows(page_count: Optional[int], config: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+    """
+    Returns the 1-based, inclusive page windows a document should be
+    converted in, or [] if it should be converted whole. Controlled by
+    docling.split_pages (0 disables splitting) and docling.window_pages.
+    """
+    docling_config = (config or {}).get("docling") or {}
+    split_pages = int(docling_config.get("split_pages", DEFAULT_SPLIT_PAGES))
+    window_pages = max(1, int(docling_config.get("window_pages", DEFAULT_WINDOW_PAGES)))
+    if not page_count or split_pages <= 0 or page_count <= split_pages:
+        return []
+    return [(start, min(start + window_pages - 1, page_count)) for start in range(1, page_count + 1, window_pages)]
+
+
+def _page_analysis_path(window_path: Path) -> Path:
+    return window_path.with_name(f"{window_path.stem}.pages.json")
+
+
+def _window_images_dir(window_path: Path) -> Path:
+    return window_path.with_name(f"{window_path.stem}.images")
+
+
+def _join(docs: Sequence[DoclingDocument], page_ranges: Sequence[Tuple[int, int]]) -> DoclingDocument:
+    """
+    Concatenates documents converted from ascending page ranges (1-based,
+    inclusive), keeping each page's absolute number.
+
+    DoclingDocument.concatenate numbers each document's pages on from the
+    previous one's last page, counting from its lowest page, so a page
+    missing from a range (e.g. one that failed to convert) would shift
+    every page after it. The documents are padded with empty pages up to
+    the end of their range before joining, and the padding is dropped
+    afterwards.
+    """
+    next_page = 1
+    for doc, (first, last) in zip(docs, page_ranges):
+        outside = sorted(p for p in doc.pages if not first <= p <= last)
+        if first < next_page or outside:
+            raise ValueError(f"Cannot join page range {first}-{last} (pages {outside}) after page {next_page - 1}")
+        next_page = last + 1
+    if len(docs) == 1:
+        return docs[0]
+
+    padding = []
+    next_page = 1
+    for doc, (first, last) in zip(docs, page_ranges):
+        for page_no in range(next_page, last + 1):
+            if page_no not in doc.pages:
+                doc.pages[page_no] = PageItem(page_no=page_no, size=Size(width=0.0, height=0.0))
+                padding.append(page_no)
+        next_page = last + 1
+    document = DoclingDocument.concatenate(docs)
+    for page_no in padding:
+        del document.pages[page_no]
+    return document
+
+
+@dataclass
+class MergedConversion:
+    """
+    Stands in for a ConversionResult assembled from page-window
+    conversions; carries what the save_* methods and generate_manifest use.
+    """
+    document: DoclingDocument
+    input: Any
+    pages: List[int] = field(default_factory=list)
+    page_analysis: Optional[List[PageProfile]] = None
+    # Merged windows: image metadata of the pictures already saved by
+    # save_window, with "path" pointing at the window's file.
+    images: Optional[List[Dict[str, Any]]] = None
+
+
 class DoclingEngine:
     """
     Wrapper for Docling's DocumentConverter to handle extraction.
@@ -34,10 +198,10 @@ class DoclingEngine:
         # Layout model configuration
         layout_model_id = docling_config.get("layout_model")
         if layout_model_id:
-            if "docling-layout-heron-101" in layout_model_id:
-                pipeline_options.layout_options.model_spec = DOCLING_LAYOUT_HERON_101
+            repo_id = layout_model_id.split("huggingface.co/")[-1].strip("/")
+            if repo_id in LAYOUT_MODEL_SPECS:
+                pipeline_options.layout_options.model_spec = LAYOUT_MODEL_SPECS[repo_id]
             else:
-                repo_id = layout_model_id.split("huggingface.co/")[-1]
                 pipeline_options.layout_options.model_spec = LayoutModelConfig(
                     name="custom_layout",
                     repo_id=repo_id,
@@ -46,11 +210,16 @@ class DoclingEngine:
                 )
             
         # OCR configuration
-        pipeline_options.do_ocr = True
+        pipeline_options.do_ocr = docling_config.get("do_ocr", True)
         pipeline_options.ocr_options = RapidOcrOptions(
             backend="torch"
         )
 
+        # Table structure configuration
+        pipeline_options.do_table_structure = docling_config.get("do_table_structure", True)
+        pipeline_options.table_structure_options.mode = TableFormerMode(docling_config.get("table_mode", "accurate"))
+        pipeline_options.images_scale = float(docling_config.get("images_scale", 1.0))
+
         # Accelerator configuration
         accelerator_options = AcceleratorOptions(
             num_threads=docling_config.get("num_threads", 4),
@@ -58,20 +227,195 @@ class DoclingEngine:
         )
         pipeline_options.accelerator_options = accelerator_options
     
-        # Enable image extraction as per vision
-        pipeline_options.generate_picture_images = True
+        # Enable image extraction as per vision (without it, embedded images
+        # are read directly from the PDF instead)
+        pipeline_options.generate_picture_images = docling_config.get("generate_picture_images", True)
             
-        self.converter = DocumentConverter(
+        self.pipeline_options = pipeline_options
+        self.converter = self._make_converter(pipeline_options)
+        self.json_format = check_json_format(docling_config.get("json_format", DEFAULT_JSON_FORMAT))
+
+        # Picture encoding, and the optional content-addressed store
+        images_config = self.config.get("images") or {}
+        self.image_encoder = ImageEncoder.from_config(images_config)
+        store_dir = images_config.get("store_dir")
+        self.image_store = ImageStore(store_dir) if store_dir else None
+        self._image_pool = ThreadPoolExecutor(
+            max_workers=max(1, int(images_config.get("encode_threads", 4))), thread_name_prefix="image-encode"
+        )
+
+        # Per-page pre-pass: OCR and table structure only where a page needs
+        # them (skipped when both are off, as there is nothing to switch off)
+        self.adaptive_pages = bool(docling_config.get("adaptive_pages", True)) and (
+            pipeline_options.do_ocr or pipeline_options.do_table_structure
+        )
+        self.page_thresholds = PageThresholds.from_config(docling_config)
+        self._converters: Dict[Tuple[bool, bool], DocumentConverter] = {}
+
+    @staticmethod
+    def _make_converter(pipeline_options: PdfPipelineOptions) -> DocumentConverter:
+        return DocumentConverter(
             format_options={
                 InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
             }
         )
 
-    def convert(self, pdf_path: Path):
+    def converter_for(self, ocr: bool, tables: bool) -> DocumentConverter:
+        """
+        The converter for pages that do (not) need OCR and table structure;
+        models switched off in the configuration stay off. Each combination
+        is a DocumentConverter of its own, built from a copy of the pipeline
+        options on first use, so an engine loads a second set of models only
+        once its documents need one.
+        """
+        key = (ocr and self.pipeline_options.do_ocr, tables and self.pipeline_options.do_table_structure)
+        if key == (self.pipeline_options.do_ocr, self.pipeline_options.do_table_structure):
+            return self.converter
+        converter = self._converters.get(key)
+        if converter is None:
+            options = self.pipeline_options.model_copy(update={"do_ocr": key[0], "do_table_structure": key[1]})
+            converter = self._converters[key] = self._make_converter(options)
+        return converter
+
+    def warm_up(self):
+        """Loads the PDF pipeline's models now rather than on the first conversion."""
+        self.converter.initialize_pipeline(InputFormat.PDF)
+
+    def convert(self, pdf_path: Path, page_range: Optional[Tuple[int, int]] = None):
+        """
+        Converts a PDF document, or only the pages in page_range (1-based,
+        inclusive; page numbers in the result stay absolute). Members of
+        zip/tar archives (archive/member paths) are streamed out of the
+        archive without unpacking it.
+
+        With docling.adaptive_pages, pages are first profiled (see
+        page_analysis) and each run of consecutive pages needing the same
+        models is converted with only those models (runs shorter than
+        page_analysis.min_run_pages are merged first); the results are joined
+        and the profiles returned with the result for the manifest. When all
+        pages need the same models, the document is converted in one pass
+        and Docling's result is returned as it is.
+        """
+        member = resolve_member(pdf_path)
+        if member is not None:
+            with open_member(member) as f:
+                data = f.read()
+            name = Path(member.name).name
+            source = lambda: DocumentStream(name=name, stream=io.BytesIO(data))
+            pdf_source = data
+        else:
+            source = lambda: pdf_path
+            pdf_source = str(pdf_path)
+
+        profiles = analyse_pages(pdf_source, page_range, self.page_thresholds) if self.adaptive_pages else None
+        if not profiles:
+            kwargs = {"page_range": page_range} if page_range else {}
+            return self.converter.convert(source(), **kwargs)
+
+        runs = page_runs(profiles, self.page_thresholds.min_run_pages)
+        if len(runs) == 1:
+            kwargs = {"page_range": page_range} if page_range else {}
+            return self.converter_for(*runs[0][1]).convert(source(), **kwargs)
+
+        docs = []
+        result = None
+        for run, (ocr, tables) in runs:
+            result = self.converter_for(ocr, tables).convert(source(), page_range=run)
+            docs.append(result.document)
+        # Record the models each page actually got (short runs are merged).
+        modes = {page: mode for (first, last), mode in runs for page in range(first, last + 1)}
+        profiles = [replace(p, ocr=modes[p.page][0], tables=modes[p.page][1]) for p in profiles]
+        document = _join(docs, [run for run, _ in runs])
+        document.name = result.document.name
+        return MergedConversion(
+            document=document,
+            input=result.input,
+            pages=sorted(document.pages),
+            page_analysis=profiles,
+        )
+
+    def save_window(self, result, output_path: Path):
         """
-        Converts a PDF document.
+        Saves a page-window conversion for merge_windows, so the window's
+        pages can be released. The window's pictures are encoded here (see
+        save_images) and the saved document only references them, so
+        merging windows never holds picture data.
         """
-        return self.converter.convert(pdf_path)
+        import json
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        images_dir = _window_images_dir(output_path)
+        image_metadata = self._reference_pictures(self._save_pictures(result.document, images_dir), Path("."))
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result.document.export_to_dict(), f, ensure_ascii=False)
+        if image_metadata:
+            with open(images_dir / "image_metadata.json", "w", encoding="utf-8") as f:
+                json.dump(image_metadata, f, ensure_ascii=False)
+        profiles = result.page_analysis if isinstance(result, MergedConversion) else None
+        if profiles:
+            with open(_page_analysis_path(output_path), "w", encoding="utf-8") as f:
+                json.dump([p.to_dict() for p in profiles], f)
+
+    def merge_windows(
+        self, pdf_path: Path, window_paths: Sequence[Path], page_ranges: Optional[Sequence[Tuple[int, int]]] = None
+    ) -> MergedConversion:
+        """
+        Merges documents saved by save_window, in page order, into one
+        result. page_ranges are the windows' pages (by default, each window
+        continues from the previous one up to its last page); page numbers
+        stay absolute even if a window lacks some of its pages (see _join).
+        Pictures are numbered through the merged document (page_N_img_M, as
+        for a whole-document conversion) and stay in the windows' files
+        until save_images moves them into place; the merged document
+        references them as images/page_N_img_M.
+        """
+        import json
+
+        docs = []
+        saved = {}
+        profiles = []
+        ranges = []
+        for k, p in enumerate(window_paths):
+            p = Path(p)
+            doc = DoclingDocument.load_from_json(p)
+            images_dir = _window_images_dir(p)
+            if (images_dir / "image_metadata.json").exists():
+                with open(images_dir / "image_metadata.json", "r", encoding="utf-8") as f:
+                    for meta in json.load(f):
+                        saved[str(images_dir / meta["filename"])] = meta
+            for picture in doc.pictures:
+                if picture.image is not None and str(images_dir / str(picture.image.uri)) in saved:
+                    # Unique across windows until the pictures are renumbered below.
+                    picture.image.uri = images_dir / str(picture.image.uri)
+            if page_ranges is not None:
+                ranges.append(tuple(page_ranges[k]))
+            else:
+                first = ranges[-1][1] + 1 if ranges else 1
+                ranges.append((first, max([first - 1, *doc.pages])))
+            docs.append(doc)
+            analysis_path = _page_analysis_path(p)
+            if analysis_path.exists():
+                with open(analysis_path, "r", encoding="utf-8") as f:
+                    profiles.extend(PageProfile(**entry) for entry in json.load(f))
+
+        document = _join(docs, ranges)
+        document.name = Path(pdf_path).stem
+        images = []
+        for i, picture in enumerate(document.pictures):
+            meta = saved.get(str(picture.image.uri)) if picture.image is not None else None
+            if meta is None:
+                continue
+            filename = f"page_{meta['page_no']}_img_{i + 1}{Path(meta['filename']).suffix}"
+            images.append({**meta, "filename": filename, "path": str(picture.image.uri)})
+            picture.image.uri = Path("images") / filename
+        return MergedConversion(
+            document=document,
+            input=SimpleNamespace(file=Path(pdf_path)),
+            pages=sorted(document.pages),
+            page_analysis=profiles or None,
+            images=images,
+        )
 
     def save_markdown(self, result, output_path: Path):
         """
@@ -86,16 +430,17 @@ class DoclingEngine:
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(md_content)
 
-    def save_json(self, result, output_path: Path):
+    def save_json(self, result, output_path: Path) -> Path:
         """
-        Saves the conversion result as JSON.
+        Saves the conversion result as JSON, in docling.json_format (the
+        suffix of output_path is replaced to match; see document_io).
+        Returns the path written.
         """
-        output_path = Path(output_path)
+        output_path = document_path(output_path, self.json_format)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # docling result.document supports export_to_dict or model_dump (pydantic)
         # docling documents are pydantic models usually
-        import json
         
         # Check if it has export_to_dict or model_dump
         if hasattr(result.document, "export_to_dict"):
@@ -106,109 +451,163 @@ class DoclingEngine:
             # Fallback or error
             raise ValueError("Document object does not support dictionary export")
             
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_document(data, output_path, self.json_format)
+        return output_path
 
-    def _extract_images_with_pdfimages(self, pdf_path: Path, output_dir: Path):
+    def _extract_embedded_images(self, pdf_path: Path, output_dir: Path) -> List[Dict[str, Any]]:
         """Best-effort fallback extraction for PDFs that contain only embedded XObject images.
 
-        This is used only when Docling emits zero pictures.
+        This is used only when Docling emits zero pictures. pdfium reads the
+        pages here, images.pages_per_task at a time, while the encoding pool
+        encodes and writes what has been read; JPEG and JPEG 2000 streams
+        are written as they are, without decoding.
         """
         if not pdf_path or not pdf_path.exists():
             return []
-        if shutil.which("pdfimages") is None:
+        page_count = pdf_page_count(str(pdf_path))
+        if not page_count:
             return []
 
-        prefix = output_dir / "pdfimage"
-        try:
-            subprocess.run(
-                ["pdfimages", "-png", "-p", str(pdf_path), str(prefix)],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        except Exception as e:
-            logger.debug(f"pdfimages extraction failed for {pdf_path}: {e}")
-            return []
+        step = max(1, int((self.config.get("images") or {}).get("pages_per_task", 8)))
+        images, futures = [], []
+        for first in range(1, page_count + 1, step):
+            # Reads hold Docling's pdfium lock, so they stay on this thread.
+            for image in read_embedded_images(str(pdf_path), (first, min(first + step - 1, page_count))):
+                futures.append(self._image_pool.submit(self._write_embedded_image, image, output_dir, len(images)))
+                images.append(image)
 
         out = []
-        pattern = re.compile(r"-(\d+)-(\d+)\.png$")
-        for img_file in sorted(output_dir.glob(f"{prefix.name}-*.png")):
-            m = pattern.search(img_file.name)
-            if not m:
-                continue
-
-            page_no = int(m.group(1))
-            img_idx = int(m.group(2)) + 1
-            target_name = f"page_{page_no}_img_{img_idx}.png"
-            target_path = output_dir / target_name
-
-            if not target_path.exists():
-                img_file.rename(target_path)
+        for image, future in zip(images, futures):
+            written, content_hash = future.result()
+            # Numbered through the document, like Docling's pictures.
+            filename = f"page_{image.page_no}_img_{len(out) + 1}{written.suffix}"
+            if content_hash is not None:
+                link_or_copy(written, output_dir / filename)
             else:
-                target_path = img_file
-
-            out.append(
-                {
-                    "filename": target_path.name,
-                    "page_no": page_no,
-                    "bbox": None,
-                    "path": str(target_path),
-                }
-            )
-
+                os.replace(written, output_dir / filename)
+            meta = {
+                "filename": filename,
+                "page_no": image.page_no,
+                "bbox": image.bbox,
+                "path": str(output_dir / filename),
+            }
+            if content_hash is not None:
+                meta["content_hash"] = content_hash
+            out.append(meta)
         return out
 
+    def _write_embedded_image(self, image, output_dir: Path, index: int):
+        # Returns (written path, content hash or None): a store entry, or a
+        # temporary file in output_dir to be renamed.
+        suffix = image.suffix or self.image_encoder.suffix
+        if self.image_store is not None:
+            if image.data is not None:
+                key, path = self.image_store.put_bytes(image.data, suffix)
+            else:
+                key, path = self.image_store.put(image.image, self.image_encoder)
+            return path, key
+        path = output_dir / f".embedded-{index}{suffix}"
+        if image.data is not None:
+            path.write_bytes(image.data)
+        else:
+            self.image_encoder.save(image.image, path)
+        return path, None
+
     def save_images(self, result, output_dir: Path):
-        """Saves extracted images to the specified directory and returns metadata."""
+        """
+        Saves extracted images to the specified directory and returns metadata.
+
+        Pictures are encoded in parallel (images.encode_threads) as
+        images.format. With an image store (images.store_dir), each image is
+        stored once by pixel hash and hardlinked into output_dir, and its
+        metadata carries the store key as content_hash. The document's
+        pictures then reference their files, so call this before save_json.
+        """
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        image_metadata = []
+        if isinstance(result, MergedConversion) and result.images:
+            # Saved with the windows: move them into place under their final names.
+            image_metadata = []
+            for meta in result.images:
+                os.replace(meta["path"], output_dir / meta["filename"])
+                image_metadata.append({**meta, "path": str(output_dir / meta["filename"])})
+            return image_metadata
 
-        # Check if document has pictures
-        if hasattr(result.document, "pictures"):
-            for i, picture in enumerate(result.document.pictures):
-                # Check if picture has image data (PIL Image)
-                if hasattr(picture, "image") and picture.image is not None:
-                    # Try to get page number from provenance
-                    page_no = 0
-                    bbox = None
-                    if hasattr(picture, "prov") and picture.prov:
-                        # prov is a list of Prov items, usually one for the picture location
-                        # Assuming Prov has page_no
-                        page_no = picture.prov[0].page_no
-                        if hasattr(picture.prov[0], "bbox") and picture.prov[0].bbox:
-                            bbox = picture.prov[0].bbox.as_tuple()
-
-                    filename = f"page_{page_no}_img_{i+1}.png"
-
-                    # Handle Docling ImageRef
-                    img = picture.image
-                    if hasattr(img, "pil_image"):
-                        img = img.pil_image
-
-                    if img is not None:
-                        img.save(output_dir / filename)
-                        logger.debug(f"Extracted image: {filename} to {output_dir}")
-
-                        image_metadata.append(
-                            {
-                                "filename": filename,
-                                "page_no": page_no,
-                                "bbox": bbox,
-                                "path": str(output_dir / filename),
-                            }
-                        )
+        image_metadata = self._reference_pictures(
+            self._save_pictures(result.document, output_dir), Path(output_dir.name)
+        )
 
         if not image_metadata:
             pdf_path = None
             if hasattr(result, "input") and hasattr(result.input, "file"):
                 pdf_path = Path(result.input.file)
-            image_metadata = self._extract_images_with_pdfimages(pdf_path, output_dir)
+            image_metadata = self._extract_embedded_images(pdf_path, output_dir)
 
         return image_metadata
 
+    @staticmethod
+    def _reference_pictures(saved: List[Tuple[Any, Dict[str, Any]]], folder: Path) -> List[Dict[str, Any]]:
+        """
+        Points each saved picture's image at its file (folder/filename,
+        relative to the document JSON) and drops its pixels, so documents
+        reference their image files rather than embedding them, whether
+        converted whole or in windows. Returns the metadata.
+        """
+        for picture, meta in saved:
+            picture.image.uri = folder / meta["filename"]
+            picture.image.mimetype = mimetypes.guess_type(meta["filename"])[0] or picture.image.mimetype
+            picture.image._pil = None
+        return [meta for _, meta in saved]
+
+    def _save_pictures(self, document, output_dir: Path) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Encodes a document's pictures in parallel; returns (picture, metadata) pairs in order."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        futures = []
+
+        # Check if document has pictures
+        if hasattr(document, "pictures"):
+            for i, picture in enumerate(document.pictures):
+                # Check if picture has image data (PIL Image)
+                if hasattr(picture, "image") and picture.image is not None:
+                    futures.append((picture, self._image_pool.submit(self._save_picture, picture, i, output_dir)))
+        return [(picture, meta) for picture, meta in ((p, f.result()) for p, f in futures) if meta is not None]
+
+    def _save_picture(self, picture, i: int, output_dir: Path) -> Optional[Dict[str, Any]]:
+        # Try to get page number from provenance
+        page_no = 0
+        bbox = None
+        if hasattr(picture, "prov") and picture.prov:
+            # prov is a list of Prov items, usually one for the picture location
+            # Assuming Prov has page_no
+            page_no = picture.prov[0].page_no
+            if hasattr(picture.prov[0], "bbox") and picture.prov[0].bbox:
+                bbox = picture.prov[0].bbox.as_tuple()
+
+        filename = f"page_{page_no}_img_{i+1}{self.image_encoder.suffix}"
+
+        # Handle Docling ImageRef
+        img = picture.image
+        if hasattr(img, "pil_image"):
+            img = img.pil_image
+        if img is None:
+            return None
+
+        meta = {
+            "filename": filename,
+            "page_no": page_no,
+            "bbox": bbox,
+            "path": str(output_dir / filename),
+        }
+        if self.image_store is not None:
+            meta["content_hash"], stored = self.image_store.put(img, self.image_encoder)
+            link_or_copy(stored, output_dir / filename)
+        else:
+            self.image_encoder.save(img, output_dir / filename)
+        logger.debug(f"Extracted image: {filename} to {output_dir}")
+        return meta
+
     def generate_manifest(self, result, output_path: Path, image_metadata: list):
         """
         Generates a manifest file with extraction metadata.
@@ -240,14 +639,16 @@ class DoclingEngine:
         if src_path:
             manifest.setdefault("source_path", src_path)
             src_file = Path(src_path)
-            if src_file.exists():
+            manifest.setdefault("document_id", src_file.stem)
+            manifest.setdefault("file_type", "PDF" if src_file.suffix.lower() == ".pdf" else "UNKNOWN")
+            # Discovery normally recorded these already; only hash when missing.
+            needs_metadata = any(key not in manifest for key in ("file_size", "hash", "creation_date"))
+            if needs_metadata and src_file.exists():
                 try:
                     meta = get_file_metadata(src_file)
                     for key in ("file_size", "hash", "creation_date"):
                         if key in meta:
                             manifest.setdefault(key, meta[key])
-                    manifest.setdefault("document_id", src_file.stem)
-                    manifest.setdefault("file_type", "PDF" if src_file.suffix.lower() == ".pdf" else "UNKNOWN")
                 except Exception:
                     pass
 
@@ -259,7 +660,11 @@ class DoclingEngine:
         extraction_entry = {"step": "extraction", "timestamp": now, "status": "success"}
         for i in range(len(history) - 1, -1, -1):
             if isinstance(history[i], dict) and history[i].get("step") == "extraction":
-                history[i] = extraction_entry
+                if history[i].get("status") == "failed":
+                    # Keep failed attempts on record.
+                    history.append(extraction_entry)
+                else:
+                    history[i] = extraction_entry
                 break
         else:
             history.append(extraction_entry)
@@ -273,10 +678,24 @@ class DoclingEngine:
                 "models": {
                     "ocr_model": self.config.get("docling", {}).get("ocr_model"),
                     "layout_model": self.config.get("docling", {}).get("layout_model"),
+                    "profile": self.config.get("docling", {}).get("profile"),
+                    "settings": {
+                        "do_ocr": self.pipeline_options.do_ocr,
+                        "do_table_structure": self.pipeline_options.do_table_structure,
+                        "table_mode": self.pipeline_options.table_structure_options.mode.value,
+                        "images_scale": self.pipeline_options.images_scale,
+                        "generate_picture_images": self.pipeline_options.generate_picture_images,
+                        "adaptive_pages": self.adaptive_pages,
+                    },
                 },
                 "images": image_metadata,
             }
         )
+        profiles = result.page_analysis if isinstance(result, MergedConversion) else None
+        if profiles:
+            manifest["page_analysis"] = [p.to_dict() for p in profiles]
+        else:
+            manifest.pop("page_analysis", None)
 
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(manifest, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,286 @@
+import gzip
+import io
+import json
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# Formats for the <stem> Docling document in each target folder, and the
+# suffix each is written with.
+JSON_FORMATS = {
+    "pretty": ".json",       # indented JSON (the original output)
+    "json": ".json",         # compact JSON
+    "gzip": ".json.gz",
+    "zstd": ".json.zst",     # needs the zstandard package
+    "msgpack": ".msgpack",   # needs the msgpack package
+}
+DEFAULT_JSON_FORMAT = "json"
+# Checked in this order when looking for a document's JSON.
+DOCUMENT_SUFFIXES = (".json", ".json.zst", ".json.gz", ".msgpack")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+READ_CHUNK = 1 << 16
+
+_decoder = json.JSONDecoder()
+_STRUCTURE_RE = re.compile(r'[\\"{}\[\]]')
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+
+def check_json_format(name: str) -> str:
+    """
+    Validates a docling.json_format value.
+
+    Raises:
+        ValueError: If the format is unknown.
+        ImportError: If the format needs a package that is not installed.
+    """
+    if name not in JSON_FORMATS:
+        raise ValueError(f"Unknown JSON format '{name}' (choose from {', '.join(JSON_FORMATS)})")
+    if name == "zstd":
+        import zstandard  # noqa: F401
+    elif name == "msgpack":
+        import msgpack  # noqa: F401
+    return name
+
+
+def document_path(path: Path, json_format: str) -> Path:
+    """Returns <dir>/<stem>.json (or any document suffix) with the suffix of json_format."""
+    path = Path(path)
+    name = path.name
+    for suffix in DOCUMENT_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return path.with_name(name + JSON_FORMATS[json_format])
+
+
+def find_document(folder: Path, stem: str) -> Optional[Path]:
+    """The Docling document of stem in folder, in whichever format it was written, if any."""
+    for suffix in DOCUMENT_SUFFIXES:
+        path = Path(folder) / f"{stem}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _format_of(path: Path) -> str:
+    name = Path(path).name
+    if name.endswith(".json.gz"):
+        return "gzip"
+    if name.endswith(".json.zst"):
+        return "zstd"
+    if name.endswith(".msgpack"):
+        return "msgpack"
+    return "json"
+
+
+def write_document(data: Dict[str, Any], path: Path, json_format: str = DEFAULT_JSON_FORMAT):
+    """Writes a document dict to path in json_format."""
+    path = Path(path)
+    if json_format in ("pretty", "json"):
+        with open(path, "w", encoding="utf-8") as f:
+            if json_format == "pretty":
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            else:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    elif json_format == "gzip":
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL) as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    elif json_format == "zstd":
+        import zstandard
+        with open(path, "wb") as raw, zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) as compressed:
+            with io.TextIOWrapper(compressed, encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    elif json_format == "msgpack":
+        import msgpack
+        with open(path, "wb") as f:
+            msgpack.pack(data, f, use_bin_type=True)
+    else:
+        raise ValueError(f"Unknown JSON format '{json_format}'")
+
+
+@contextmanager
+def open_document(path: Path):
+    """Opens a document for reading as decompressed bytes (JSON or msgpack)."""
+    path = Path(path)
+    json_format = _format_of(path)
+    if json_format == "gzip":
+        with gzip.open(path, "rb") as f:
+            yield f
+    elif json_format == "zstd":
+        import zstandard
+        with open(path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as f:
+            yield f
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def load_document(path: Path) -> Dict[str, Any]:
+    """Reads a whole document, whatever its format."""
+    with open_document(path) as f:
+        if _format_of(path) == "msgpack":
+            import msgpack
+            return msgpack.unpack(f, raw=False)
+        return json.load(f)
+
+
+class _JsonStream:
+    """Incremental reader for one JSON value read from a text stream, a piece at a time."""
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self, at_least: int = 0) -> bool:
+        data = self.f.read(max(self.chunk_size, at_least))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character (not consumed), or "" at the end."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ""
+
+    def take(self, expected: str):
+        if self.peek() != expected:
+            raise ValueError(f"Expected '{expected}' in JSON document at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                end = None
+            # A number (or an incomplete value) at the end of the buffer may
+            # continue in the next chunk. Read at least as much again as is
+            # buffered, so a large value is decoded a bounded number of times.
+            if end is None or (end == len(self.buf) and not self.eof):
+                if self._more(len(self.buf) - self.pos):
+                    continue
+                if end is None:
+                    raise ValueError("Truncated JSON document")
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Skips the next value without decoding it."""
+        if self.peek() not in ("{", "["):
+            self.value()
+            return
+        depth = 0
+        in_string = False
+        escaped = False
+        while True:
+            buf, i = self.buf, self.pos
+            if escaped and i < len(buf):
+                i += 1
+                escaped = False
+            while True:
+                match = _STRUCTURE_RE.search(buf, i)
+                if match is None:
+                    i = len(buf)
+                    break
+                ch, i = match.group(), match.end()
+                if ch == "\\":
+                    if i == len(buf):
+                        escaped = True
+                        break
+                    i += 1
+                elif ch == '"':
+                    in_string = not in_string
+                elif in_string:
+                    continue
+                elif ch in "{[":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = i
+                        return
+            self.pos = i
+            if not self._more():
+                raise ValueError("Truncated JSON document")
+
+
+def _iter_json(f, keys: Optional[Iterable[str]], items_of: Optional[str], chunk_size: int):
+    stream = _JsonStream(io.TextIOWrapper(f, encoding="utf-8"), chunk_size)
+    stream.take("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.take(":")
+        if items_of is not None and key == items_of:
+            stream.take("[")
+            if stream.peek() == "]":
+                return
+            while True:
+                yield stream.value()
+                if stream.peek() == "]":
+                    return
+                stream.take(",")
+        elif items_of is None and (keys is None or key in keys):
+            yield key, stream.value()
+        else:
+            stream.skip()
+        if stream.peek() == "}":
+            return
+        stream.take(",")
+
+
+def _iter_msgpack(f, keys: Optional[Iterable[str]], items_of: Optional[str]):
+    import msgpack
+    unpacker = msgpack.Unpacker(f, raw=False)
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if items_of is not None and key == items_of:
+            for _ in range(unpacker.read_array_header()):
+                yield unpacker.unpack()
+            return
+        elif items_of is None and (keys is None or key in keys):
+            yield key, unpacker.unpack()
+        else:
+            unpacker.skip()
+
+
+def iter_document(
+    path: Path, keys: Optional[Iterable[str]] = None, chunk_size: int = READ_CHUNK
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Yields a document's top-level (key, value) pairs one at a time, reading
+    the file incrementally. With keys, only those are decoded; the other
+    values are skipped without being built.
+    """
+    keys = set(keys) if keys is not None else None
+    with open_document(path) as f:
+        if _format_of(path) == "msgpack":
+            yield from _iter_msgpack(f, keys, None)
+        else:
+            yield from _iter_json(f, keys, None, chunk_size)
+
+
+def iter_items(path: Path, key: str, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """
+    Yields the elements of a top-level array (e.g. "texts", "pictures") one
+    at a time, without loading the rest of the document or the whole array.
+    """
+    with open_document(path) as f:
+        if _format_of(path) == "msgpack":
+            yield from _iter_msgpack(f, None, key)
+        else:
+            yield from _iter_json(f, None, key, chunk_size)
@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .archives import open_source
+from .discovery import stat_source
+from .hashing import hash_file
+from .utils import connect_state_db, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Twin:
+    """An already-extracted source file with identical content."""
+    source_path: Path
+    target_folder: Path
+    sha256: str
+
+
+def head_tail_hash(path: Path, size: int, block_size: int = 64 * 1024) -> str:
+    """
+    Hashes the first and last block of a file (tier 2 of duplicate detection).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open_source(path) as f:
+        h.update(f.read(block_size))
+        if size > block_size:
+            f.seek(max(block_size, size - block_size))
+            h.update(f.read(block_size))
+    return h.hexdigest()
+
+
+def full_hash(path: Path) -> str:
+    """SHA-256 of the whole file (tier 3 of duplicate detection)."""
+    return hash_file(path).sha256
+
+
+class DuplicateDetector:
+    """
+    Finds byte-identical source files that have already been extracted.
+
+    Candidates are narrowed in three tiers: same size, then same hash of the
+    first and last blocks, then same full SHA-256. When the caller already
+    has the SHA-256 (process hashes every file for its manifest), it is
+    looked up directly instead. Only files registered as
+    extracted ("canonical") are matched, so a twin can always be materialised
+    from existing outputs. Canonicals persist across runs in the target's
+    state directory.
+    """
+    DB_NAME = "duplicates.sqlite"
+    HEAD_TAIL_CACHE_SIZE = 1024
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = connect_state_db(self.db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS canonical (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                head_tail TEXT NOT NULL,
+                source_path TEXT NOT NULL,
+                target_folder TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS canonical_size ON canonical (size)")
+        self._conn.commit()
+        # Least recently used last; a file whose size or mtime changed gets a new key.
+        self._head_tail_cache: "OrderedDict[Tuple[Path, int, int], str]" = OrderedDict()
+
+    @classmethod
+    def for_target(cls, target_root: Path) -> "DuplicateDetector":
+        return cls(get_state_dir(target_root) / cls.DB_NAME)
+
+    def _head_tail(self, path: Path, size: int) -> str:
+        key = (path, size, stat_source(path).mtime_ns)
+        value = self._head_tail_cache.get(key)
+        if value is None:
+            value = self._head_tail_cache[key] = head_tail_hash(path, size)
+            if len(self._head_tail_cache) > self.HEAD_TAIL_CACHE_SIZE:
+                self._head_tail_cache.popitem(last=False)
+        else:
+            self._head_tail_cache.move_to_end(key)
+        return value
+
+    def find_twin(self, path: Path, size: Optional[int] = None, sha256: Optional[str] = None) -> Optional[Twin]:
+        """
+        Returns an extracted file with the same content as path, if any.
+
+        Args:
+            path: Source file to check.
+            size: File size, if already known from the scan.
+            sha256: Full SHA-256, if already known (e.g. from the manifest),
+                in which case it is looked up directly without reading the
+                file; otherwise computed only when tiers 1 and 2 both match.
+        """
+        path = Path(path)
+        if size is None:
+            size = stat_source(path).size
+        if size == 0:
+            return None
+
+        if sha256 is not None:
+            row = self._conn.execute(
+                "SELECT source_path, target_folder FROM canonical WHERE sha256 = ? AND size = ?",
+                (sha256, size),
+            ).fetchone()
+            if row is None or Path(row[0]) == path.absolute():
+                return None
+            return Twin(Path(row[0]), Path(row[1]), sha256)
+
+        # Tier 1: size bucket
+        rows = self._conn.execute(
+            "SELECT sha256, head_tail, source_path, target_folder FROM canonical WHERE size = ?",
+            (size,),
+        ).fetchall()
+        rows = [r for r in rows if Path(r[2]) != path.absolute()]
+        if not rows:
+            return None
+
+        # Tier 2: first/last block hash
+        head_tail = self._head_tail(path, size)
+        rows = [r for r in rows if r[1] == head_tail]
+        if not rows:
+            return None
+
+        # Tier 3: full SHA-256
+        if sha256 is None:
+            sha256 = full_hash(path)
+        for row_sha256, _, source_path, target_folder in rows:
+            if row_sha256 == sha256:
+                return Twin(Path(source_path), Path(target_folder), row_sha256)
+        return None
+
+    def register(self, path: Path, target_folder: Path, sha256: Optional[str] = None, size: Optional[int] = None):
+        """
+        Records an extracted file as the canonical copy of its content.
+
+        The first registration for a given SHA-256 wins.
+        """
+        path = Path(path)
+        if size is None:
+            size = stat_source(path).size
+        if size == 0:
+            return
+        if sha256 is None:
+            sha256 = full_hash(path)
+        known = self._conn.execute(
+            "SELECT 1 FROM canonical WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if known:
+            return
+        self._conn.execute(
+            "INSERT OR IGNORE INTO canonical VALUES (?, ?, ?, ?, ?)",
+            (sha256, size, self._head_tail(path, size), str(path.absolute()), str(Path(target_folder))),
+        )
+        self._conn.commit()
+
+    def forget(self, sha256: str):
+        """Drops a canonical whose outputs are gone."""
+        self._conn.execute("DELETE FROM canonical WHERE sha256 = ?", (sha256,))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def link_or_copy(src: Path, dst: Path):
+    """
+    Materialises dst from src as a hardlink, falling back to a reflink
+    (FICLONE) and finally a plain copy when crossing filesystems.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+
+    try:
+        import fcntl
+        FICLONE = 0x40049409
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return
+    except (OSError, ImportError):
+        if dst.exists():
+            dst.unlink()
+
+    shutil.copy2(src, dst)
@@ -0,0 +1,201 @@
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import traceback
+from multiprocessing import reduction
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def fork_supported() -> bool:
+    """True where workers can be forked from a ForkServer (Linux: fork plus pidfds)."""
+    return hasattr(os, "fork") and hasattr(os, "pidfd_open") and hasattr(signal, "pidfd_send_signal")
+
+
+def _warm(factory, config):
+    engine = factory(config)
+    warm_up = getattr(engine, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+    return engine
+
+
+def _server_main(conn, factory, config, log_level):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(processName)s - %(message)s',
+    )
+    # No collections while the models load: every object allocated here is
+    # frozen below, so collections in the workers never write to (and so
+    # copy) the pages holding them.
+    gc.disable()
+    try:
+        engine = _warm(factory, config)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    gc.freeze()
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except EOFError:
+            break
+        if kind == "fork":
+            target, args, name = payload
+            fd = reduction.recv_handle(conn)
+            gc.freeze()
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                multiprocessing.current_process().name = name
+                gc.enable()
+                code = 0
+                try:
+                    target(Connection(fd), engine, *args)
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    logging.shutdown()
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(code)
+            os.close(fd)
+            conn.send(("forked", pid))
+        elif kind == "reap":
+            _, status = os.waitpid(payload, 0)
+            conn.send(("reaped", os.waitstatus_to_exitcode(status)))
+
+
+class ForkedProcess:
+    """
+    Handle on a process forked by a ForkServer, with the parts of the
+    multiprocessing.Process interface WorkerPool uses. The process is not
+    our child, so exit is watched through a pidfd and the exit code is
+    collected by the server.
+    """
+
+    def __init__(self, server: "ForkServer", pid: int, name: str):
+        self.pid = pid
+        self.name = name
+        self.sentinel = os.pidfd_open(pid)
+        self._server = server
+        self._exitcode: Optional[int] = None
+
+    def is_alive(self) -> bool:
+        if self._exitcode is not None:
+            return False
+        return not wait([self.sentinel], 0)
+
+    def join(self, timeout: Optional[float] = None):
+        if self._exitcode is None and wait([self.sentinel], timeout):
+            self._exitcode = self._server.reap(self.pid)
+            os.close(self.sentinel)
+
+    @property
+    def exitcode(self) -> Optional[int]:
+        self.join(0)
+        return self._exitcode
+
+    def _signal(self, signum: int):
+        if self._exitcode is None:
+            try:
+                signal.pidfd_send_signal(self.sentinel, signum)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+
+class ForkServer:
+    """
+    Loads an engine once and forks processes that share it copy-on-write.
+
+    The server is itself spawned, so it starts clean of the parent's SQLite
+    connections and threads. It builds the engine with the factory, calls
+    its warm_up() if it has one (so the models are loaded before any fork),
+    and freezes the garbage collector's view of everything allocated so
+    far. Each fork() then starts a process in which the engine already
+    exists: startup is a fork, and model weights, which are only read,
+    stay in pages shared with the server instead of one copy per process.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Optional[Dict[str, Any]]], Any],
+        config: Optional[Dict[str, Any]] = None,
+        log_level: int = logging.INFO,
+        name: str = "ForkServer",
+    ):
+        """
+        Args:
+            factory: Picklable callable building the engine from the config.
+            config: Configuration passed to the factory.
+            log_level: Logging level in the server and its forks.
+            name: Process name; forks are named <name>-<n>.
+
+        Raises:
+            RuntimeError: If the engine cannot be built.
+        """
+        ctx = multiprocessing.get_context("spawn")
+        self.name = name
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_server_main, args=(child_conn, factory, config, log_level), name=name, daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self._forks = 0
+        try:
+            kind, payload = self._conn.recv()
+        except EOFError:
+            kind, payload = "error", f"exited with code {self.process.exitcode}"
+        if kind != "ready":
+            self.close()
+            raise RuntimeError(f"Cannot start {name}: {payload}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def fork(self, target: Callable[..., Any], args: Tuple = ()) -> Tuple[Connection, ForkedProcess]:
+        """
+        Forks a process running target(conn, engine, *args), where conn is
+        the other end of the returned connection; the process exits when
+        target returns.
+        """
+        self._forks += 1
+        name = f"{self.name}-{self._forks}"
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self._conn.send(("fork", (target, args, name)))
+        reduction.send_handle(self._conn, child_conn.fileno(), self.process.pid)
+        child_conn.close()
+        _, pid = self._conn.recv()
+        return parent_conn, ForkedProcess(self, pid, name)
+
+    def reap(self, pid: int) -> int:
+        """Collects the exit code of a fork that has exited."""
+        self._conn.send(("reap", pid))
+        _, exitcode = self._conn.recv()
+        return exitcode
+
+    def close(self):
+        """Stops the server; forks still running are left to their owner."""
+        self._conn.close()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
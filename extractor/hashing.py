@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .archives import open_source, split_member_path
+from .utils import connect_state_db, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = 4 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileDigests:
+    """Digests of one file, computed in a single read pass."""
+    sha1: str
+    sha256: str
+    size: int
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"sha1": self.sha1, "sha256": self.sha256, "size": self.size}
+
+
+def hash_file(path: Path, buffer_size: int = BUFFER_SIZE, sink: Optional[Callable[[memoryview], object]] = None) -> FileDigests:
+    """
+    Computes sha1, sha256 and size of a file in one pass. Archive members
+    (archive/member paths) are hashed as they stream out of the archive.
+
+    Large buffers keep syscall overhead low, and hashlib releases the GIL
+    while digesting them, so several files can be hashed on threads. If
+    given, sink receives every chunk read (e.g. to copy the file while
+    hashing it).
+    """
+    sha1 = hashlib.sha1()
+    sha256 = hashlib.sha256()
+    size = 0
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open_source(path) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            sha1.update(chunk)
+            sha256.update(chunk)
+            if sink is not None:
+                sink(chunk)
+            size += n
+    return FileDigests(sha1.hexdigest(), sha256.hexdigest(), size)
+
+
+def _stat_key(st: os.stat_result) -> Tuple[int, int, int, int]:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashService:
+    """
+    Hashes files once and remembers the result.
+
+    Digests are cached in a SQLite sidecar keyed by (device, inode, size,
+    mtime_ns), so a file is only re-read after it changes. Without a cache
+    path the service still hashes in a single pass, just without memory
+    between runs.
+    """
+    DB_NAME = "hashes.sqlite"
+
+    def __init__(self, cache_path: Optional[Path] = None, max_workers: int = 4):
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self._conn = None
+        if cache_path is not None:
+            self._conn = connect_state_db(cache_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS digests (
+                    dev INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha1 TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    PRIMARY KEY (dev, inode, size, mtime_ns)
+                )
+                """
+            )
+            self._conn.commit()
+
+    @classmethod
+    def for_target(cls, target_root: Path, max_workers: int = 4) -> "HashService":
+        """Opens the hash cache stored under the target root's state directory."""
+        return cls(get_state_dir(target_root) / cls.DB_NAME, max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _lookup(self, key: Tuple[int, int, int, int]) -> Optional[FileDigests]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha1, sha256 FROM digests WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                key,
+            ).fetchone()
+        if row is None:
+            return None
+        return FileDigests(row[0], row[1], key[2])
+
+    def _store(self, key: Tuple[int, int, int, int], digests: FileDigests):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                key + (digests.sha1, digests.sha256),
+            )
+            self._conn.commit()
+
+    def remember(self, path: Path, digests: FileDigests, st: os.stat_result):
+        """
+        Caches digests computed elsewhere (e.g. by the Prefetcher) for a file
+        whose stat, taken before it was read, is st. Ignored if the file has
+        changed since.
+        """
+        path = Path(path)
+        if split_member_path(path) is not None:
+            return
+        key = _stat_key(st)
+        try:
+            unchanged = _stat_key(path.stat()) == key
+        except OSError:
+            return
+        if unchanged and digests.size == key[2]:
+            self._store(key, digests)
+
+    def digests(self, path: Path) -> FileDigests:
+        """Returns digests for a file, from the cache when its stat key matches."""
+        path = Path(path)
+        if split_member_path(path) is not None:
+            # Members have no inode of their own to key a cache entry on.
+            return hash_file(path)
+        key = _stat_key(path.stat())
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        digests = hash_file(path)
+        if digests.size == key[2]:
+            self._store(key, digests)
+        return digests
+
+    def digests_many(self, paths: Iterable[Path]) -> Dict[Path, FileDigests]:
+        """
+        Hashes several files on the thread pool. Unreadable files are left
+        out of the result.
+        """
+        paths = [Path(p) for p in paths]
+
+        def safe_digests(path):
+            try:
+                return path, self.digests(path)
+            except OSError as e:
+                logger.debug(f"Cannot hash {path}: {e}")
+                return path, None
+
+        if len(paths) <= 1:
+            results = map(safe_digests, paths)
+            return {p: d for p, d in results if d is not None}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return {p: d for p, d in pool.map(safe_digests, paths) if d is not None}
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageEncoder:
+    """
+    How extracted pictures are encoded: PNG at png_compress_level (0-9;
+    lower is faster and larger), or WebP, lossless or at webp_quality.
+    """
+    format: str = "png"
+    png_compress_level: int = 6
+    webp_lossless: bool = True
+    webp_quality: int = 90
+
+    @classmethod
+    def from_config(cls, images_config: Optional[Dict[str, Any]]) -> "ImageEncoder":
+        """Reads format, png_compress_level, webp_lossless and webp_quality."""
+        images_config = images_config or {}
+        encoder = cls(
+            format=str(images_config.get("format", "png")).lower(),
+            png_compress_level=int(images_config.get("png_compress_level", 6)),
+            webp_lossless=bool(images_config.get("webp_lossless", True)),
+            webp_quality=int(images_config.get("webp_quality", 90)),
+        )
+        if encoder.format not in ("png", "webp"):
+            raise ValueError(f"Unsupported image format '{encoder.format}' (choose png or webp)")
+        return encoder
+
+    @property
+    def suffix(self) -> str:
+        return f".{self.format}"
+
+    def save(self, image, path: Path):
+        if self.format == "webp":
+            image.save(path, format="WEBP", lossless=self.webp_lossless, quality=self.webp_quality)
+        else:
+            image.save(path, format="PNG", compress_level=self.png_compress_level)
+
+
+def pixel_hash(image) -> str:
+    """SHA-256 of an image's mode, size and pixels, independent of how it is encoded."""
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("ascii"))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class ImageStore:
+    """
+    Content-addressed store of extracted images, keyed by pixel hash (or,
+    for encoded images passed through from the PDF, by a hash of their bytes).
+
+    Each distinct image is encoded and stored once, as
+    <root>/<key[:2]>/<key><suffix>; document folders hardlink their
+    page_N_img_M files to it, so a letterhead or stamp repeated across
+    thousands of documents takes the space of one. Entries are written to a
+    temporary name and renamed into place, so concurrent writers (threads,
+    workers or nodes) never see a partial file. The store must be on the
+    same filesystem as the target for hardlinks; otherwise images are
+    copied.
+    """
+    DIR_NAME = "images"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def for_target(cls, target_root: Path) -> "ImageStore":
+        return cls(get_state_dir(target_root) / cls.DIR_NAME)
+
+    def path_for(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _tmp_path(self, path: Path) -> Path:
+        return path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+    def put(self, image, encoder: ImageEncoder) -> Tuple[str, Path]:
+        """Stores an image (unless its pixels are stored already); returns its key and path."""
+        key = pixel_hash(image)
+        path = self.path_for(key, encoder.suffix)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = self._tmp_path(path)
+            try:
+                encoder.save(image, tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        return key, path
+
+    def put_bytes(self, data: bytes, suffix: str) -> Tuple[str, Path]:
+        """
+        Stores an already-encoded image file (e.g. a JPEG passed through from
+        the PDF) keyed by the SHA-256 of its bytes; returns its key and path.
+        """
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path_for(key, suffix)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = self._tmp_path(path)
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        return key, path
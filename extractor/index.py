@@ -0,0 +1,106 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+from .discovery import ScanEntry
+from .utils import connect_state_db, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryIndex:
+    """
+    Persistent record of source files that have already been handled.
+
+    Rows are keyed by absolute source path and store size, mtime, inode and
+    content hash. A file is "unchanged" when its size, mtime and inode all
+    match the recorded row; such files are skipped by the Scanner in
+    incremental mode without touching their target folders.
+    """
+    DB_NAME = "discovery.sqlite"
+    COMMIT_EVERY = 500
+
+    def __init__(self, db_path: Path, read_only: bool = False):
+        self.db_path = Path(db_path)
+        self._pending = 0
+        self._conn = connect_state_db(self.db_path, read_only=read_only)
+        if read_only:
+            return
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                hash TEXT,
+                recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_target(cls, target_root: Path) -> "DiscoveryIndex":
+        """Opens the index stored under the target root's state directory."""
+        return cls(get_state_dir(target_root) / cls.DB_NAME)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).absolute())
+
+    def lookup(self, path: Path) -> Optional[dict]:
+        """Returns the recorded row for a path, or None."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, hash FROM files WHERE path = ?",
+            (self._key(path),),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"size": row[0], "mtime_ns": row[1], "inode": row[2], "hash": row[3]}
+
+    def is_unchanged(self, entry: ScanEntry) -> bool:
+        """True if the entry matches what was recorded for its path."""
+        row = self.lookup(entry.path)
+        if row is None:
+            return False
+        return (
+            row["size"] == entry.size
+            and row["mtime_ns"] == entry.mtime_ns
+            and row["inode"] == entry.inode
+        )
+
+    def record(self, entry: ScanEntry, content_hash: Optional[str] = None):
+        """Records (or refreshes) a file as handled."""
+        self._conn.execute(
+            """
+            INSERT INTO files (path, size, mtime_ns, inode, hash, recorded_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(path) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                inode = excluded.inode,
+                hash = COALESCE(excluded.hash, files.hash),
+                recorded_at = excluded.recorded_at
+            """,
+            (self._key(entry.path), entry.size, entry.mtime_ns, entry.inode, content_hash),
+        )
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.flush()
+
+    def flush(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
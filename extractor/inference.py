@@ -11,7 +11,8 @@ from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequ
 import ollama
 from followthemoney import model
 
-from .utils import load_config
+from .catalog import Catalog
+from .utils import in_shard, load_config
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,8 @@ def iter_factual_evidence(
     factual_ndjson: Path,
     max_chars: int = 8000,
     image_description: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    shard_keys: Optional[Dict[str, str]] = None,
 ) -> Iterator[Evidence]:
     factual_ndjson = Path(factual_ndjson)
     with factual_ndjson.open("r", encoding="utf-8") as fh:
@@ -72,6 +75,14 @@ def iter_factual_evidence(
             if not schema or not ent_id:
                 continue
 
+            # Shard by owning document so images share a node with their Document
+            # (and their images/image_enrichment.json has a single writer), on
+            # the document's source path where the catalog knows it, as process
+            # and export do.
+            doc_id = (_first_prop(ent, "proof") if schema == "Image" else None) or str(ent_id)
+            if not in_shard((shard_keys or {}).get(doc_id, doc_id), shard):
+                continue
+
             if schema == "Image":
                 desc = _first_prop(ent, "description")
                 if not desc and image_description is not None:
@@ -266,6 +277,8 @@ def infer_stream(
     max_chars: int = 8000,
     verbose: bool = False,
     image_enrichment: bool = True,
+    shard: Optional[Tuple[int, int]] = None,
+    catalog: Optional[Catalog] = None,
 ) -> int:
     cfg = load_config()
     enrichment = cfg.get("enrichment", {})
@@ -392,7 +405,11 @@ def infer_stream(
     # Create output file immediately and stream-write results as they are generated.
     with out_path.open("w", encoding="utf-8", buffering=1) as out:
         for evidence in iter_factual_evidence(
-            factual_ndjson, max_chars=max_chars, image_description=image_description_cb
+            factual_ndjson,
+            max_chars=max_chars,
+            image_description=image_description_cb,
+            shard=shard,
+            shard_keys=catalog.shard_keys() if shard and catalog is not None else None,
         ):
             evidence_count += 1
 
@@ -553,9 +570,15 @@ def infer_stream(
 
             out.flush()
 
+            if catalog is not None and evidence.kind == "Document":
+                catalog.mark_inferred(evidence.proof_id)
+
             if verbose and evidence_count % 25 == 0:
                 logger.info("processed evidence=%d wrote_entities=%d", evidence_count, entity_count)
 
+    if catalog is not None:
+        catalog.flush()
+
     if verbose:
         logger.info("wrote %s (entities=%d evidence=%d)", out_path, entity_count, evidence_count)
 
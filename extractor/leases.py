@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from .utils import get_state_dir
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseManager:
+    """
+    Claims document folders so several nodes can process one target.
+
+    A claim is a lease file under <target>/.extractor/leases, created with
+    O_CREAT | O_EXCL so exactly one node gets it, and kept alive by a
+    heartbeat thread that touches every held lease. A lease whose mtime is
+    older than ttl belongs to a node that died; the next node to want the
+    folder renames it away (only one rename can succeed) and claims it
+    afresh. Before committing, a node checks it still holds the lease, so a
+    document is committed by exactly one node.
+
+    ttl should be several heartbeats long; clocks of the nodes sharing the
+    target must agree to well within it.
+    """
+    DIR_NAME = "leases"
+
+    def __init__(
+        self,
+        lease_dir: Path,
+        target_root: Path,
+        ttl: float = 600.0,
+        heartbeat: float = 60.0,
+        owner: Optional[str] = None,
+    ):
+        self.lease_dir = Path(lease_dir)
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        self.target_root = Path(target_root)
+        self.ttl = float(ttl)
+        self.heartbeat = float(heartbeat)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._held: Dict[Path, Path] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def for_target(cls, target_root: Path, **kwargs) -> "LeaseManager":
+        """Opens the lease directory under the target root's state directory."""
+        return cls(get_state_dir(target_root) / cls.DIR_NAME, target_root, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _lease_path(self, folder: Path) -> Path:
+        folder = Path(folder)
+        try:
+            key = folder.relative_to(self.target_root).as_posix()
+        except ValueError:
+            key = folder.as_posix()
+        return self.lease_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.lease"
+
+    def _read_owner(self, lease_path: Path) -> Optional[str]:
+        try:
+            with open(lease_path, "r") as f:
+                return json.load(f).get("owner")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _create(self, lease_path: Path, folder: Path) -> bool:
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"owner": self.owner, "folder": str(folder), "acquired_at": datetime.now().isoformat()},
+                f,
+            )
+        return True
+
+    def _expired(self, lease_path: Path) -> bool:
+        try:
+            return time.time() - lease_path.stat().st_mtime > self.ttl
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _restore(stale: Path, lease_path: Path):
+        try:
+            os.link(stale, lease_path)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            logger.warning(f"Cannot restore lease {lease_path}: {e}")
+        stale.unlink(missing_ok=True)
+
+    def acquire(self, folder: Path) -> bool:
+        """
+        Claims a folder. Returns True if this node now holds it (including
+        when it already did), False if another node's lease is live.
+        """
+        folder = Path(folder)
+        lease_path = self._lease_path(folder)
+        with self._lock:
+            if folder in self._held:
+                return True
+        if not self._create(lease_path, folder):
+            expired_owner = self._read_owner(lease_path)
+            if not self._expired(lease_path):
+                return False
+            stale = lease_path.with_name(f"{lease_path.name}.{self.owner.replace(':', '_')}.stale")
+            try:
+                os.rename(lease_path, stale)
+            except FileNotFoundError:
+                pass  # another node reclaimed it first
+            else:
+                if not self._expired(stale) or self._read_owner(stale) != expired_owner:
+                    # Another node reclaimed the lease between the check and
+                    # the rename, and this moved its fresh lease away: put it
+                    # back (unless yet another node has a lease there now).
+                    self._restore(stale, lease_path)
+                    return False
+                logger.info(f"Reclaiming expired lease on {folder} from {expired_owner}")
+                stale.unlink(missing_ok=True)
+            if not self._create(lease_path, folder):
+                return False
+        with self._lock:
+            self._held[folder] = lease_path
+        self._start_heartbeat()
+        return True
+
+    def holds(self, folder: Path) -> bool:
+        """True if this node's lease on the folder is still in place."""
+        folder = Path(folder)
+        with self._lock:
+            lease_path = self._held.get(folder)
+        return lease_path is not None and self._read_owner(lease_path) == self.owner
+
+    def release(self, folder: Path):
+        """Gives up a claim; a lease taken over by another node is left alone."""
+        folder = Path(folder)
+        with self._lock:
+            lease_path = self._held.pop(folder, None)
+        if lease_path is not None and self._read_owner(lease_path) == self.owner:
+            lease_path.unlink(missing_ok=True)
+
+    def renew(self):
+        """Touches every held lease; run by the heartbeat thread."""
+        with self._lock:
+            held = list(self._held.items())
+        for folder, lease_path in held:
+            if self._read_owner(lease_path) != self.owner:
+                logger.warning(f"Lost lease on {folder} to another node")
+                continue
+            try:
+                os.utime(lease_path)
+            except OSError as e:
+                logger.warning(f"Cannot renew lease on {folder}: {e}")
+
+    def _start_heartbeat(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._beat, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat):
+            self.renew()
+
+    def close(self):
+        """Stops the heartbeat and releases every lease still held."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._lock:
+            held = list(self._held)
+        for folder in held:
+            self.release(folder)
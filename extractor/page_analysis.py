@@ -0,0 +1,221 @@
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Text segments closer than this (in points) vertically share a row.
+ROW_TOLERANCE = 2.0
+# A path this thin (in points) in one dimension is a rule line.
+RULE_THICKNESS = 2.0
+
+
+@dataclass(frozen=True)
+class PageThresholds:
+    """
+    When a page needs OCR and table-structure recognition.
+
+    A page needs OCR when its text layer has fewer than min_chars
+    characters, when less than min_valid_ratio of them decode to printable
+    text (broken font encodings), or when images cover at least
+    image_coverage of it (scans, including scans under an invisible OCR
+    layer). Pages that need OCR also get table structure; other pages get
+    it when they have at least table_rules rule lines or table_rows rows of
+    three or more separated text segments.
+
+    Runs of consecutive pages getting the same models are converted
+    separately; a run shorter than min_run_pages is merged into its
+    neighbours with the models of both, so pages alternating between text
+    and scans do not cost one conversion each.
+    """
+    min_chars: int = 32
+    min_valid_ratio: float = 0.9
+    image_coverage: float = 0.3
+    table_rules: int = 6
+    table_rows: int = 3
+    min_run_pages: int = 8
+
+    @classmethod
+    def from_config(cls, docling_config: Optional[Dict[str, Any]]) -> "PageThresholds":
+        """Reads docling.page_analysis, falling back to the defaults above."""
+        options = (docling_config or {}).get("page_analysis") or {}
+        return cls(**{k: type(getattr(cls, k))(v) for k, v in options.items() if k in cls.__dataclass_fields__})
+
+
+@dataclass(frozen=True)
+class PageProfile:
+    """What the pre-pass found on one page and which models it gets."""
+    page: int
+    text_chars: int
+    text_coverage: float
+    image_coverage: float
+    rule_lines: int
+    aligned_rows: int
+    ocr: bool
+    tables: bool
+
+    @property
+    def mode(self) -> Tuple[bool, bool]:
+        return self.ocr, self.tables
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _bounds(obj) -> Tuple[float, float, float, float]:
+    """(left, bottom, right, top) of a page object in page space."""
+    # pypdfium2 renamed get_pos() to get_bounds() in v5.
+    get_bounds = getattr(obj, "get_bounds", None) or obj.get_pos
+    left, bottom, right, top = get_bounds()
+    # Objects inside form XObjects report bounds in the form's space: map
+    # them out through each enclosing form's matrix.
+    form = getattr(obj, "container", None)
+    while form is not None:
+        matrix = form.get_matrix()
+        xs, ys = zip(*(matrix.on_point(x, y) for x in (left, right) for y in (bottom, top)))
+        left, bottom, right, top = min(xs), min(ys), max(xs), max(ys)
+        form = getattr(form, "container", None)
+    return left, bottom, right, top
+
+
+def _clipped_area(bounds, width: float, height: float) -> float:
+    left, bottom, right, top = bounds
+    w = min(right, width) - max(left, 0.0)
+    h = min(top, height) - max(bottom, 0.0)
+    return w * h if w > 0 and h > 0 else 0.0
+
+
+def _aligned_rows(rects: List[Tuple[float, float, float, float]]) -> int:
+    """Counts rows holding three or more text segments with gaps between them."""
+    rows: List[List[Tuple[float, float, float, float]]] = []
+    for rect in sorted(rects, key=lambda r: r[1]):
+        if rows and abs(rows[-1][0][1] - rect[1]) <= ROW_TOLERANCE:
+            rows[-1].append(rect)
+        else:
+            rows.append([rect])
+    count = 0
+    for row in rows:
+        row.sort()
+        gaps = sum(1 for a, b in zip(row, row[1:]) if b[0] - a[2] > (a[3] - a[1]))
+        if gaps >= 2:
+            count += 1
+    return count
+
+
+def profile_page(page, number: int, thresholds: PageThresholds) -> PageProfile:
+    """Profiles one pypdfium2 page from its text layer and page objects."""
+    import pypdfium2.raw as pdfium_c
+
+    width, height = page.get_size()
+    area = max(width * height, 1.0)
+
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_range()
+        rects = [textpage.get_rect(i) for i in range(textpage.count_rects())]
+    finally:
+        textpage.close()
+    visible = [c for c in text if not c.isspace()]
+    valid = sum(1 for c in visible if c.isprintable() and c != "\ufffd")
+    text_coverage = min(1.0, sum(_clipped_area(r, width, height) for r in rects) / area)
+
+    image_area = 0.0
+    rule_lines = 0
+    for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE, pdfium_c.FPDF_PAGEOBJ_PATH]):
+        bounds = _bounds(obj)
+        if obj.type == pdfium_c.FPDF_PAGEOBJ_IMAGE:
+            image_area += _clipped_area(bounds, width, height)
+        else:
+            left, bottom, right, top = bounds
+            if min(right - left, top - bottom) <= RULE_THICKNESS and max(right - left, top - bottom) > RULE_THICKNESS:
+                rule_lines += 1
+    image_coverage = min(1.0, image_area / area)
+    aligned_rows = _aligned_rows(rects)
+
+    ocr = (
+        len(visible) < thresholds.min_chars
+        or valid < thresholds.min_valid_ratio * len(visible)
+        or image_coverage >= thresholds.image_coverage
+    )
+    tables = ocr or rule_lines >= thresholds.table_rules or aligned_rows >= thresholds.table_rows
+    return PageProfile(
+        page=number,
+        text_chars=len(visible),
+        text_coverage=round(text_coverage, 4),
+        image_coverage=round(image_coverage, 4),
+        rule_lines=rule_lines,
+        aligned_rows=aligned_rows,
+        ocr=ocr,
+        tables=tables,
+    )
+
+
+def analyse_pages(
+    source: Union[str, bytes],
+    page_range: Optional[Tuple[int, int]] = None,
+    thresholds: PageThresholds = PageThresholds(),
+) -> Optional[List[PageProfile]]:
+    """
+    Profiles the pages of a PDF (a path, or its bytes), or only those in
+    page_range (1-based, inclusive). Returns None if the PDF cannot be read
+    with pypdfium2, in which case every page should get every model.
+    """
+    try:
+        import pypdfium2
+        from docling.utils.locks import pypdfium2_lock
+    except ImportError:
+        return None
+
+    try:
+        # pdfium is not thread-safe; share Docling's lock around it.
+        with pypdfium2_lock:
+            pdf = pypdfium2.PdfDocument(source)
+            try:
+                first, last = page_range or (1, len(pdf))
+                profiles = []
+                for number in range(first, min(last, len(pdf)) + 1):
+                    page = pdf[number - 1]
+                    try:
+                        profiles.append(profile_page(page, number, thresholds))
+                    finally:
+                        page.close()
+                return profiles
+            finally:
+                pdf.close()
+    except Exception as e:
+        logger.debug(f"Cannot analyse pages of {source if isinstance(source, str) else 'PDF stream'}: {e}")
+        return None
+
+
+def page_runs(profiles: List[PageProfile], min_run_pages: int = 1) -> List[Tuple[Tuple[int, int], Tuple[bool, bool]]]:
+    """
+    Groups consecutive pages that get the same models into
+    ((first, last), (ocr, tables)) runs, in page order. Runs shorter than
+    min_run_pages are merged with the pages after them (or, at the end,
+    before them) and get the models either needs, so every run but the last
+    has at least min_run_pages pages.
+    """
+    def length(run):
+        return run[0][1] - run[0][0] + 1
+
+    def merge(a, b):
+        return (a[0][0], b[0][1]), (a[1][0] or b[1][0], a[1][1] or b[1][1])
+
+    runs: List[Tuple[Tuple[int, int], Tuple[bool, bool]]] = []
+    for profile in profiles:
+        run = ((profile.page, profile.page), profile.mode)
+        if runs and runs[-1][0][1] == profile.page - 1 and (runs[-1][1] == profile.mode or length(runs[-1]) < min_run_pages):
+            runs[-1] = merge(runs[-1], run)
+        else:
+            runs.append(run)
+    if len(runs) > 1 and length(runs[-1]) < min_run_pages and runs[-2][0][1] == runs[-1][0][0] - 1:
+        runs[-2:] = [merge(runs[-2], runs[-1])]
+
+    # Upgrading a short run can leave it with the models of its neighbour.
+    merged: List[Tuple[Tuple[int, int], Tuple[bool, bool]]] = []
+    for run in runs:
+        if merged and merged[-1][1] == run[1] and merged[-1][0][1] == run[0][0] - 1:
+            merged[-1] = merge(merged[-1], run)
+        else:
+            merged.append(run)
+    return merged
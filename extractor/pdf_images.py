@@ -0,0 +1,110 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+from .page_analysis import _bounds
+
+logger = logging.getLogger(__name__)
+
+# Image filters whose streams are complete image files, written out as they
+# are stored in the PDF (no decode or re-encode).
+PASSTHROUGH_FILTERS = {"DCTDecode": ".jpg", "JPXDecode": ".jp2"}
+
+
+@dataclass
+class EmbeddedImage:
+    """
+    An image XObject drawn on a page: either its encoded stream (data, with
+    suffix) when it can be passed through, or the decoded image to encode.
+    """
+    page_no: int
+    bbox: Tuple[float, float, float, float]
+    data: Optional[bytes] = None
+    suffix: Optional[str] = None
+    image: Optional[object] = None
+
+
+def pdf_page_count(source: Union[str, bytes]) -> Optional[int]:
+    """The number of pages of a PDF, or None if pypdfium2 cannot read it."""
+    try:
+        import pypdfium2
+        from docling.utils.locks import pypdfium2_lock
+    except ImportError:
+        return None
+    try:
+        with pypdfium2_lock:
+            pdf = pypdfium2.PdfDocument(source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    except Exception as e:
+        logger.debug(f"Cannot read {source if isinstance(source, str) else 'PDF stream'}: {e}")
+        return None
+
+
+def _read_image(obj, page_no: int) -> EmbeddedImage:
+    from pypdfium2 import PdfImage
+
+    # (left, bottom, right, top) in PDF points from the bottom-left corner,
+    # the same tuple Docling's BoundingBox.as_tuple() gives for pictures.
+    bbox = tuple(round(v, 2) for v in _bounds(obj))
+    complex_filters = [f for f in obj.get_filters() if f not in PdfImage.SIMPLE_FILTERS]
+    if len(complex_filters) == 1 and complex_filters[0] in PASSTHROUGH_FILTERS:
+        return EmbeddedImage(
+            page_no=page_no,
+            bbox=bbox,
+            data=bytes(obj.get_data(decode_simple=True)),
+            suffix=PASSTHROUGH_FILTERS[complex_filters[0]],
+        )
+
+    # Everything else (Flate, JBIG2, CCITT, ...) is decoded by pdfium. The
+    # image is copied out of the bitmap, whose buffer it may share.
+    image = obj.get_bitmap(render=False).to_pil().copy()
+    try:
+        bilevel = obj.get_metadata().bits_per_pixel == 1
+    except Exception:
+        bilevel = False
+    if bilevel:
+        # Scans stored as JBIG2/CCITT: keep them one bit per pixel.
+        image = image.convert("1")
+    return EmbeddedImage(page_no=page_no, bbox=bbox, image=image)
+
+
+def read_embedded_images(source: Union[str, bytes], page_range: Tuple[int, int]) -> List[EmbeddedImage]:
+    """
+    Reads the image XObjects drawn on pages first..last (1-based,
+    inclusive), including those inside form XObjects, in page and drawing
+    order. Images that cannot be read are skipped; returns [] if the PDF
+    cannot be read.
+    """
+    try:
+        import pypdfium2
+        import pypdfium2.raw as pdfium_c
+        from docling.utils.locks import pypdfium2_lock
+    except ImportError:
+        return []
+
+    images = []
+    try:
+        # pdfium is not thread-safe; share Docling's lock around it.
+        with pypdfium2_lock:
+            pdf = pypdfium2.PdfDocument(source)
+            try:
+                first, last = page_range
+                for page_no in range(first, min(last, len(pdf)) + 1):
+                    page = pdf[page_no - 1]
+                    try:
+                        for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+                            try:
+                                images.append(_read_image(obj, page_no))
+                            except Exception as e:
+                                logger.debug(f"Cannot read an image on page {page_no}: {e}")
+                    finally:
+                        page.close()
+            finally:
+                pdf.close()
+    except Exception as e:
+        logger.debug(f"Cannot read images of {source if isinstance(source, str) else 'PDF stream'}: {e}")
+        return []
+    return images
@@ -0,0 +1,131 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .scaffolding import Scaffolder, get_file_type
+from .scheduling import CostModel, Scheduler, WorkItem
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlanEntry:
+    """One source file and what process would do with it."""
+    item: WorkItem
+    folder: str
+    file_type: str
+    action: str  # "process" or "skip"
+
+
+@dataclass
+class Plan:
+    """Totals for a dry run of process, with an ETA for the work left."""
+    entries: List[PlanEntry] = field(default_factory=list)
+    eta_seconds: float = 0.0
+    pages_per_second: Optional[float] = None
+    measured: bool = False
+
+    def totals(self, key: Callable[[PlanEntry], str]) -> Dict[str, Dict[str, int]]:
+        """Per-group counts (process/skip), bytes and pages to process, sorted by group."""
+        groups: Dict[str, Dict[str, int]] = defaultdict(lambda: {"process": 0, "skip": 0, "bytes": 0, "pages": 0})
+        for entry in self.entries:
+            group = groups[key(entry)]
+            group[entry.action] += 1
+            if entry.action == "process":
+                group["bytes"] += entry.item.size
+                group["pages"] += entry.item.page_count or 0
+        return dict(sorted(groups.items()))
+
+    def summary(self) -> Dict[str, Any]:
+        to_process = [e for e in self.entries if e.action == "process"]
+        return {
+            "documents": len(self.entries),
+            "process": len(to_process),
+            "skip": len(self.entries) - len(to_process),
+            "pages": sum(e.item.page_count or 0 for e in to_process),
+            "unknown_pages": sum(1 for e in to_process if e.file_type == "PDF" and not e.item.page_count),
+            "bytes": sum(e.item.size for e in to_process),
+            "eta_seconds": self.eta_seconds,
+            "pages_per_second": self.pages_per_second,
+            "measured": self.measured,
+            "by_folder": self.totals(lambda e: e.folder),
+            "by_type": self.totals(lambda e: e.file_type),
+        }
+
+
+class Planner:
+    """
+    Dry run of process: applies the same skip checks (on a thread pool) and
+    reads page counts from PDF metadata (serialised in pdfium; see
+    Scheduler) without converting or writing anything into the target.
+
+    The ETA divides the cost of the documents left across the workers,
+    using the pages/sec measured by earlier runs when there are any and the
+    configured CostModel otherwise.
+    """
+
+    def __init__(
+        self,
+        scaffolder: Scaffolder,
+        cost_model: Optional[CostModel] = None,
+        force: bool = False,
+        deep_verify: bool = False,
+        max_workers: int = 16,
+        output_dir_for: Optional[Callable[[Path], Path]] = None,
+    ):
+        self.scaffolder = scaffolder
+        # Where process writes each file; the CLI passes the rule it uses
+        # itself, which sends a single-file source to target/<stem>.
+        self.output_dir_for = output_dir_for or scaffolder.get_target_folder
+        self.cost_model = cost_model or CostModel()
+        self.force = force
+        self.deep_verify = deep_verify
+        self.max_workers = max(1, int(max_workers))
+
+    def _folder(self, source_file: Path) -> str:
+        parts = self.scaffolder.get_relative_path(source_file).parts
+        return parts[0] if len(parts) > 1 else "."
+
+    def _action(self, source_file: Path) -> str:
+        if self.force:
+            return "process"
+        output_dir = self.output_dir_for(source_file)
+        if get_file_type(source_file) == "PDF":
+            done = self.scaffolder.is_extraction_complete(output_dir, source_file.stem, deep_verify=self.deep_verify)
+        else:
+            done = self.scaffolder.is_processed(output_dir)
+        return "skip" if done else "process"
+
+    def _entry(self, scheduler: Scheduler, source_file: Path) -> PlanEntry:
+        action = self._action(source_file)
+        file_type = get_file_type(source_file)
+        if action == "process":
+            item = scheduler.estimate(source_file)
+        else:
+            item = WorkItem(path=source_file, size=0, page_count=None)
+        return PlanEntry(item, self._folder(source_file), file_type, action)
+
+    def plan(self, source_files: Iterable[Path], workers: int = 1, pages_per_second: Optional[float] = None) -> Plan:
+        """
+        Args:
+            source_files: Files the run would handle.
+            workers: Conversions running in parallel.
+            pages_per_second: Measured throughput per worker, if known.
+        """
+        cost_model = self.cost_model
+        if pages_per_second:
+            # The measured rate already includes per-document overhead.
+            cost_model = CostModel(pages_per_second=pages_per_second, bytes_per_second=float("inf"), overhead_seconds=0.0)
+        scheduler = Scheduler(cost_model)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            entries = list(pool.map(lambda f: self._entry(scheduler, f), source_files))
+        cost = sum(e.item.cost for e in entries if e.action == "process")
+        return Plan(
+            entries=entries,
+            eta_seconds=cost / max(1, int(workers)),
+            pages_per_second=pages_per_second or cost_model.pages_per_second,
+            measured=bool(pages_per_second),
+        )
@@ -0,0 +1,186 @@
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from .archives import split_member_path
+from .hashing import BUFFER_SIZE, FileDigests, HashService, hash_file
+
+logger = logging.getLogger(__name__)
+
+
+def advise_willneed(path: Path):
+    """Asks the kernel to start reading a whole file ahead (no-op where unsupported)."""
+    if not hasattr(os, "posix_fadvise") or split_member_path(path) is not None:
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class StagingCache:
+    """
+    Bounded local copy of source files (e.g. on SSD), evicting the least
+    recently used copies once max_bytes is exceeded.
+
+    Copies live at <cache_dir>/<sha256>/<file name>, so a converted copy
+    keeps its document name. Copies pinned by an in-flight document are
+    never evicted.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Path, int]" = OrderedDict()
+        self._pinned: Dict[Path, int] = {}
+        existing = []
+        for entry in self.cache_dir.glob("*/*"):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                st = entry.stat()
+                existing.append((st.st_mtime, entry, st.st_size))
+        for _, entry, size in sorted(existing):
+            self._entries[entry] = size
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(self._entries.values())
+
+    def lookup(self, digests: FileDigests, name: str) -> Optional[Path]:
+        path = self.cache_dir / digests.sha256 / name
+        with self._lock:
+            if path not in self._entries:
+                return None
+            self._entries.move_to_end(path)
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+        return path
+
+    def add(self, tmp_path: Path, digests: FileDigests, name: str) -> Path:
+        """Moves a fully written copy into the cache, pinned, and evicts as needed."""
+        path = self.cache_dir / digests.sha256 / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._entries[path] = digests.size
+            self._entries.move_to_end(path)
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+            self._evict()
+        return path
+
+    def release(self, path: Path):
+        """Unpins a copy once its document is done with it."""
+        with self._lock:
+            count = self._pinned.get(path, 0) - 1
+            if count > 0:
+                self._pinned[path] = count
+            else:
+                self._pinned.pop(path, None)
+            self._evict()
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        for path in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if path in self._pinned:
+                continue
+            total -= self._entries.pop(path)
+            shutil.rmtree(path.parent, ignore_errors=True)
+
+
+class Prefetcher:
+    """
+    Reads source files a few documents ahead of the conversion loop so it
+    does not stall on cold reads from slow (network) storage.
+
+    Each file is read once, sequentially, on a background thread: the read
+    is hashed (the digests go into the HashService cache, so discovery does
+    not read the file again) and either copied into a local StagingCache,
+    from which it is then converted, or just pulled into the page cache
+    with posix_fadvise(WILLNEED) and the read itself.
+    """
+
+    def __init__(self, hash_service: HashService, depth: int = 2, cache: Optional[StagingCache] = None):
+        self.hash_service = hash_service
+        self.depth = max(1, int(depth))
+        self.cache = cache
+        self._local: Dict[Path, Path] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, path: Path):
+        try:
+            st = None if split_member_path(path) is not None else path.stat()
+            advise_willneed(path)
+            if self.cache is None:
+                digests = hash_file(path)
+            else:
+                digests = self._copy(path)
+            if st is not None:
+                self.hash_service.remember(path, digests, st)
+        except OSError as e:
+            logger.debug(f"Cannot prefetch {path}: {e}")
+
+    def _copy(self, path: Path) -> FileDigests:
+        tmp_path = self.cache.cache_dir / f"{os.getpid()}-{threading.get_ident()}.part"
+        try:
+            with open(tmp_path, "wb", buffering=0) as out:
+                digests = hash_file(path, BUFFER_SIZE, sink=out.write)
+            local = self.cache.lookup(digests, path.name)
+            if local is None:
+                local = self.cache.add(tmp_path, digests, path.name)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        with self._lock:
+            self._local[path] = local
+        return digests
+
+    def iterate(self, paths: Iterable[Path], wanted: Optional[Callable[[Path], bool]] = None) -> Iterator[Path]:
+        """
+        Yields paths in order, each once it has been read, while up to depth
+        later ones are read in the background. Paths for which wanted
+        returns False (e.g. already extracted) are passed through unread.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix="prefetch") as pool:
+            for path in paths:
+                path = Path(path)
+                future = pool.submit(self._fetch, path) if wanted is None or wanted(path) else None
+                pending.append((path, future))
+                if len(pending) > self.depth:
+                    yield self._ready(pending.popleft())
+            while pending:
+                yield self._ready(pending.popleft())
+
+    @staticmethod
+    def _ready(item) -> Path:
+        path, future = item
+        if future is not None:
+            future.result()
+        return path
+
+    def local_path(self, path: Path) -> Optional[Path]:
+        """The staging cache copy of a source file, if it has one."""
+        with self._lock:
+            return self._local.get(Path(path))
+
+    def release(self, path: Path):
+        """Lets the staging cache evict a source file's copy once its document is done."""
+        with self._lock:
+            local = self._local.pop(Path(path), None)
+        if local is not None and self.cache is not None:
+            self.cache.release(local)
@@ -0,0 +1,208 @@
+import copy
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .utils import connect_state_db, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+# Escalation for documents that keep failing: the Nth retry uses STRATEGIES[N-1].
+# Only attempts made by `retry` count; failing `process` again does not escalate.
+STRATEGIES = ("same", "no_ocr", "page_split")
+RETRY_WINDOW_PAGES = 10
+
+
+@dataclass(frozen=True)
+class Failure:
+    """A document in the retry queue and how it last failed."""
+    source_path: Path
+    source_root: Path
+    target_folder: Path
+    stage: str
+    error_type: str
+    message: str
+    attempts: int
+    strategy: str
+    failed_at: str
+    retries: int = 0
+
+    @property
+    def next_strategy(self) -> Optional[str]:
+        """Strategy for the next retry, or None once every one has failed."""
+        if self.retries < len(STRATEGIES):
+            return STRATEGIES[self.retries]
+        return None
+
+
+def strategy_config(config: Dict[str, Any], strategy: str) -> Dict[str, Any]:
+    """
+    Returns the configuration to retry with: unchanged for "same", OCR
+    disabled for "no_ocr", and every multi-page PDF converted in small page
+    windows for "page_split".
+    """
+    if strategy == "same":
+        return config
+    config = copy.deepcopy(config)
+    docling = config.setdefault("docling", {})
+    if strategy == "no_ocr":
+        docling["do_ocr"] = False
+    elif strategy == "page_split":
+        retry_config = config.get("retry") or {}
+        docling["split_pages"] = 1
+        docling["window_pages"] = retry_config.get("window_pages", RETRY_WINDOW_PAGES)
+    else:
+        raise ValueError(f"Unknown retry strategy {strategy}")
+    return config
+
+
+_QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+_PATH_RE = re.compile(r"(?:[A-Za-z]:)?[/\\][^\s:,;]+")
+_NUMBER_RE = re.compile(r"\b(?:0x[0-9a-fA-F]+|\d+(?:\.\d+)?)\b")
+
+
+def failure_signature(message: str) -> str:
+    """
+    Reduces an error message to its cause by masking quoted values, paths
+    and numbers, so failures of the same kind cluster together.
+    """
+    signature = _QUOTED_RE.sub("'…'", message or "")
+    signature = _PATH_RE.sub("<path>", signature)
+    signature = _NUMBER_RE.sub("N", signature)
+    return " ".join(signature.split())[:200]
+
+
+class RetryQueue:
+    """
+    Dead-letter queue of documents whose extraction failed.
+
+    One row per source file with the failing stage, exception class,
+    message, attempt count, how many of those attempts were retries and
+    the strategy of the last attempt. Rows are
+    removed when the document is extracted; `extractor retry` works
+    through the rest with escalating strategies (see STRATEGIES).
+    """
+    DB_NAME = "retry.sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn = connect_state_db(self.db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS failures (
+                source_path TEXT PRIMARY KEY,
+                source_root TEXT NOT NULL,
+                target_folder TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                error_type TEXT NOT NULL,
+                message TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                strategy TEXT NOT NULL,
+                first_failed_at TEXT NOT NULL,
+                failed_at TEXT NOT NULL,
+                retries INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(failures)")}
+        if "retries" not in columns:
+            # Older queues escalated on every attempt; keep their rows where they were.
+            self._conn.execute("ALTER TABLE failures ADD COLUMN retries INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE failures SET retries = attempts - 1")
+        self._conn.commit()
+
+    @classmethod
+    def for_target(cls, target_root: Path) -> "RetryQueue":
+        return cls(get_state_dir(target_root) / cls.DB_NAME)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def record_failure(
+        self,
+        source_path: Path,
+        source_root: Path,
+        target_folder: Path,
+        stage: str,
+        error_type: str,
+        message: str,
+        strategy: str = "initial",
+    ):
+        """Adds a failed document, or counts another failed attempt."""
+        now = datetime.now().isoformat()
+        self._conn.execute(
+            """
+            INSERT INTO failures VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+            ON CONFLICT (source_path) DO UPDATE SET
+                source_root = excluded.source_root, target_folder = excluded.target_folder,
+                stage = excluded.stage, error_type = excluded.error_type, message = excluded.message,
+                attempts = attempts + 1, strategy = excluded.strategy, failed_at = excluded.failed_at,
+                retries = retries + excluded.retries
+            """,
+            (
+                str(Path(source_path).absolute()),
+                str(Path(source_root).absolute()),
+                str(target_folder),
+                stage,
+                error_type,
+                message,
+                strategy,
+                now,
+                now,
+                int(strategy != "initial"),
+            ),
+        )
+        self._conn.commit()
+
+    def resolve(self, source_path: Path):
+        """Drops a document that has now been extracted."""
+        self._conn.execute("DELETE FROM failures WHERE source_path = ?", (str(Path(source_path).absolute()),))
+        self._conn.commit()
+
+    def failures(self) -> List[Failure]:
+        rows = self._conn.execute(
+            """
+            SELECT source_path, source_root, target_folder, stage, error_type, message,
+                attempts, strategy, failed_at, retries
+            FROM failures ORDER BY source_path
+            """
+        ).fetchall()
+        return [
+            Failure(Path(r[0]), Path(r[1]), Path(r[2]), r[3], r[4], r[5], r[6], r[7], r[8], r[9])
+            for r in rows
+        ]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM failures").fetchone()[0]
+
+    def clusters(self) -> List[Dict[str, Any]]:
+        """
+        Groups failures by stage, exception class and message signature,
+        largest group first, so systematic causes stand out.
+        """
+        groups: Dict[tuple, List[Failure]] = defaultdict(list)
+        for failure in self.failures():
+            groups[(failure.stage, failure.error_type, failure_signature(failure.message))].append(failure)
+        clusters = [
+            {
+                "stage": stage,
+                "error_type": error_type,
+                "signature": signature,
+                "count": len(members),
+                "exhausted": sum(1 for f in members if f.next_strategy is None),
+                "examples": [str(f.source_path) for f in members[:3]],
+            }
+            for (stage, error_type, signature), members in groups.items()
+        ]
+        clusters.sort(key=lambda c: (-c["count"], c["stage"], c["error_type"], c["signature"]))
+        return clusters
+
+    def close(self):
+        self._conn.close()
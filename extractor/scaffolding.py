@@ -1,19 +1,94 @@
+import hashlib
 import json
+import os
+import re
+import shutil
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Optional
 from .utils import get_file_metadata
+from .archives import split_member_path
+from .document_io import find_document
+from .duplicates import Twin, link_or_copy
+from .hashing import HashService, hash_file
+from .catalog import Catalog
+
+
+def get_file_type(source_file: Path) -> str:
+    """Maps a source file to the manifest's file_type (PDF, IMAGE, VIDEO or UNKNOWN)."""
+    ext = Path(source_file).suffix.lower()
+    if ext == '.pdf':
+        return "PDF"
+    if ext in {'.jpg', '.jpeg', '.png', '.tiff', '.bmp'}:
+        return "IMAGE"
+    if ext in {'.mp4', '.avi', '.mov', '.mkv'}:
+        return "VIDEO"
+    return "UNKNOWN"
+
 
 class Scaffolder:
-    def __init__(self, source_root: Path, target_root: Path):
+    # Written last into a staged document folder; its presence means the
+    # folder was committed as a whole.
+    COMMIT_MARKER = "commit.json"
+    # Files produced by later stages that survive re-extraction.
+    PRESERVED_FILES = ("images/image_enrichment.json",)
+
+    def __init__(self, source_root: Path, target_root: Path, owner: Optional[str] = None):
         self.source_root = Path(source_root)
         self.target_root = Path(target_root)
+        # With several nodes on one target (LeaseManager.owner), each stages
+        # into its own folder, so a node reclaiming a document never deletes
+        # or mixes into the staging folder of the node it took it from.
+        self.owner = owner
+        self._hash_service = None
+        self._catalog = None
+
+    @property
+    def catalog(self) -> Catalog:
+        """Catalog of document state for this target."""
+        if self._catalog is None:
+            self._catalog = Catalog.for_target(self.target_root)
+        return self._catalog
+
+    @property
+    def _staging_suffix(self) -> str:
+        if self.owner is None:
+            return ".staging"
+        return f".{re.sub(r'[^A-Za-z0-9_-]', '_', self.owner)}.staging"
+
+    def staging_folder(self, target_folder: Path) -> Path:
+        """The hidden folder next to target_folder that begin_staging writes into."""
+        target_folder = Path(target_folder)
+        return target_folder.parent / f".{target_folder.name}{self._staging_suffix}"
+
+    def final_folder(self, folder: Path) -> Path:
+        """Maps a staging folder (see begin_staging) to the folder it will become."""
+        folder = Path(folder)
+        name = folder.name
+        suffix = self._staging_suffix
+        if name.startswith(".") and name.endswith(suffix):
+            return folder.parent / name[1:-len(suffix)]
+        return folder
+
+    @property
+    def hash_service(self) -> HashService:
+        """Hash cache shared by everything that fingerprints files for this target."""
+        if self._hash_service is None:
+            self._hash_service = HashService.for_target(self.target_root)
+        return self._hash_service
+
+    def get_relative_path(self, source_file: Path) -> Path:
+        """
+        Returns the source file's path relative to the source root.
+        """
+        return Path(source_file).relative_to(self.source_root)
 
     def get_target_folder(self, source_file: Path) -> Path:
         """
         Calculates the target folder path for a given source file.
         """
         source_file = Path(source_file)
-        relative_path = source_file.relative_to(self.source_root)
+        relative_path = self.get_relative_path(source_file)
         
         doc_id = source_file.stem
         target_folder = self.target_root / relative_path.parent / doc_id
@@ -33,16 +108,40 @@ class Scaffolder:
         """
         return (Path(target_folder) / "manifest.json").exists()
 
-    def is_extraction_complete(self, target_folder: Path, doc_stem: str) -> bool:
+    def is_extraction_complete(self, target_folder: Path, doc_stem: str, deep_verify: bool = False) -> bool:
         """
         Checks if the extraction is complete for a given document.
-        Complete means:
+
+        Folders written by commit() carry a commit marker, so the normal check
+        is a single stat. Folders without a marker (older runs), and every
+        folder when deep_verify is set, get the full check:
         - manifest.json exists
         - doc_stem.md exists
-        - doc_stem.json exists
+        - doc_stem.json exists (or .json.gz/.json.zst/.msgpack)
         - All images listed in manifest exist
         - If images exist, image_metadata.json exists
+        With deep_verify, a marker's output digest must also still match.
         """
+        target_folder = Path(target_folder)
+        marker_path = target_folder / self.COMMIT_MARKER
+
+        if not deep_verify:
+            if marker_path.exists():
+                return True
+            return self._outputs_present(target_folder, doc_stem)
+
+        if not self._outputs_present(target_folder, doc_stem):
+            return False
+        if not marker_path.exists():
+            return True
+        try:
+            with open(marker_path, "r") as f:
+                marker = json.load(f)
+        except Exception:
+            return False
+        return marker.get("digest") == self._outputs_digest(target_folder)[0]
+
+    def _outputs_present(self, target_folder: Path, doc_stem: str) -> bool:
         target_folder = Path(target_folder)
         manifest_path = target_folder / "manifest.json"
         
@@ -52,7 +151,7 @@ class Scaffolder:
         # Check MD and JSON
         if not (target_folder / f"{doc_stem}.md").exists():
             return False
-        if not (target_folder / f"{doc_stem}.json").exists():
+        if find_document(target_folder, doc_stem) is None:
             return False
             
         try:
@@ -81,6 +180,171 @@ class Scaffolder:
                 
         return True
 
+    def _outputs_digest(self, folder: Path):
+        """
+        Digest over every regular output file in a document folder (relative
+        path, size and SHA-256), excluding the source symlink, the commit
+        marker and files owned by later stages.
+        """
+        folder = Path(folder)
+        outputs = {}
+        for path in sorted(folder.rglob("*")):
+            rel = path.relative_to(folder).as_posix()
+            if path.is_symlink() or not path.is_file():
+                continue
+            if rel == self.COMMIT_MARKER or rel in self.PRESERVED_FILES:
+                continue
+            digests = hash_file(path)
+            outputs[rel] = {"size": digests.size, "sha256": digests.sha256}
+        h = hashlib.sha256()
+        for rel, info in outputs.items():
+            h.update(f"{rel}\0{info['size']}\0{info['sha256']}\n".encode("utf-8"))
+        return h.hexdigest(), outputs
+
+    def begin_staging(self, target_folder: Path, keep_manifest: bool = True) -> Path:
+        """
+        Creates an empty hidden staging folder next to target_folder.
+
+        With keep_manifest, an existing manifest.json (discovery metadata and
+        processing history) is carried into the staging folder.
+        """
+        target_folder = Path(target_folder)
+        staging = self.staging_folder(target_folder)
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+        manifest_path = target_folder / "manifest.json"
+        if keep_manifest and manifest_path.exists():
+            shutil.copy2(manifest_path, staging / "manifest.json")
+        return staging
+
+    def commit(
+        self, staging: Path, target_folder: Path, still_owned: Optional[Callable[[], bool]] = None
+    ) -> Optional[Path]:
+        """
+        Atomically replaces target_folder with a fully written staging folder.
+
+        Image paths recorded under the staging folder are rewritten to their
+        final location, the commit marker (with an output digest) is written
+        last, and the folder is renamed into place.
+
+        With still_owned (e.g. a lease check), it is called just before the
+        rename; if it returns False the staging folder is discarded instead
+        and None is returned.
+        """
+        staging = Path(staging)
+        target_folder = Path(target_folder)
+
+        self._relocate_image_paths(staging, target_folder)
+
+        digest, outputs = self._outputs_digest(staging)
+        marker = {
+            "committed_at": datetime.now().isoformat(),
+            "digest": digest,
+            "outputs": outputs,
+        }
+        tmp_marker = staging / f"{self.COMMIT_MARKER}.tmp"
+        with open(tmp_marker, "w") as f:
+            json.dump(marker, f, indent=2)
+        os.replace(tmp_marker, staging / self.COMMIT_MARKER)
+
+        if still_owned is not None and not still_owned():
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+
+        old = target_folder.parent / f".{target_folder.name}.old"
+        if old.exists():
+            shutil.rmtree(old)
+        if target_folder.exists():
+            for rel in self.PRESERVED_FILES:
+                src, dst = target_folder / rel, staging / rel
+                if src.exists() and not dst.exists():
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(src, dst)
+            os.rename(target_folder, old)
+        os.rename(staging, target_folder)
+        shutil.rmtree(old, ignore_errors=True)
+
+        self.catalog.record_extraction(
+            target_folder,
+            self.read_manifest(target_folder),
+            output_bytes=sum(info["size"] for info in outputs.values()),
+            output_digest=digest,
+        )
+        return target_folder
+
+    def record_failure(self, staging: Path, target_folder: Path, reason: str) -> Path:
+        """
+        Records a failed extraction and discards its staging folder.
+
+        The failure (with reason) is appended to processing_history in the
+        target folder's manifest.json, which begin_staging carries into the
+        next attempt. A folder already committed by an earlier run keeps its
+        outputs and manifest untouched; the failure then goes to the
+        catalog only.
+        """
+        staging = Path(staging)
+        target_folder = Path(target_folder)
+        now = datetime.now().isoformat()
+        self.catalog.record_failure(target_folder, reason, now)
+
+        if not (target_folder / self.COMMIT_MARKER).exists():
+            manifest = self.read_manifest(staging) or self.read_manifest(target_folder)
+            history = manifest.get("processing_history")
+            if not isinstance(history, list):
+                history = []
+            history.append({"step": "extraction", "timestamp": now, "status": "failed", "reason": reason})
+            manifest["processing_history"] = history
+
+            target_folder.mkdir(parents=True, exist_ok=True)
+            tmp_path = target_folder / "manifest.json.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, target_folder / "manifest.json")
+
+        if staging != target_folder:
+            shutil.rmtree(staging, ignore_errors=True)
+        return target_folder
+
+    def _relocate_image_paths(self, staging: Path, target_folder: Path):
+        prefix = str(staging)
+
+        def relocate(images):
+            changed = False
+            for img in images if isinstance(images, list) else []:
+                path = img.get("path") if isinstance(img, dict) else None
+                if isinstance(path, str) and path.startswith(prefix):
+                    img["path"] = str(target_folder) + path[len(prefix):]
+                    changed = True
+            return changed
+
+        manifest = self.read_manifest(staging)
+        if relocate(manifest.get("images")):
+            with open(staging / "manifest.json", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        metadata_path = staging / "images" / "image_metadata.json"
+        if metadata_path.exists():
+            try:
+                with open(metadata_path, "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except Exception:
+                return
+            if relocate(metadata):
+                with open(metadata_path, "w", encoding="utf-8") as f:
+                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    def read_manifest(self, target_folder: Path) -> dict:
+        """
+        Loads manifest.json from a target folder, or returns {} if missing or unreadable.
+        """
+        try:
+            with open(Path(target_folder) / "manifest.json", "r") as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
     def write_manifest(self, source_file: Path, target_folder: Path) -> Path:
         """
         Generates and writes the manifest.json file.
@@ -88,17 +352,9 @@ class Scaffolder:
         source_file = Path(source_file)
         target_folder = Path(target_folder)
         
-        metadata = get_file_metadata(source_file)
+        metadata = get_file_metadata(source_file, hash_service=self.hash_service)
         
-        # Determine file type
-        ext = source_file.suffix.lower()
-        file_type = "UNKNOWN"
-        if ext == '.pdf':
-            file_type = "PDF"
-        elif ext in {'.jpg', '.jpeg', '.png', '.tiff', '.bmp'}:
-            file_type = "IMAGE"
-        elif ext in {'.mp4', '.avi', '.mov', '.mkv'}:
-            file_type = "VIDEO"
+        file_type = get_file_type(source_file)
 
         manifest_data = {
             "document_id": source_file.stem,
@@ -115,17 +371,27 @@ class Scaffolder:
                 }
             ]
         }
+        if "archive" in metadata:
+            # Read straight out of a zip/tar; there is no file to symlink.
+            manifest_data["archive"] = metadata["archive"]
         
         manifest_path = target_folder / "manifest.json"
         with open(manifest_path, "w") as f:
             json.dump(manifest_data, f, indent=2)
+
+        self.catalog.record_discovery(self.final_folder(target_folder), manifest_data)
             
         return manifest_path
 
     def link_source(self, source_file: Path, target_folder: Path):
         """
         Creates a symlink to the source file in the target folder.
+
+        Archive members are not linked; their manifest records the archive
+        and member name instead.
         """
+        if split_member_path(source_file) is not None:
+            return
         source_file = Path(source_file).absolute()
         target_folder = Path(target_folder)
         
@@ -133,4 +399,63 @@ class Scaffolder:
         if link_path.exists():
             link_path.unlink()
             
-        link_path.symlink_to(source_file)
\ No newline at end of file
+        link_path.symlink_to(source_file)
+
+    def materialise_duplicate(self, twin: Twin, source_file: Path, target_folder: Path) -> Path:
+        """
+        Populates target_folder from the outputs of an already-extracted twin
+        with identical content instead of re-running extraction.
+
+        Markdown, JSON and images are hardlinked (or reflinked/copied) under
+        this document's own names, and the manifest records the canonical
+        document in "duplicate_of".
+        """
+        source_file = Path(source_file)
+        target_folder = Path(target_folder)
+        twin_folder = Path(twin.target_folder)
+        twin_stem = twin.source_path.stem
+        doc_stem = source_file.stem
+
+        twin_manifest = self.read_manifest(twin_folder)
+
+        link_or_copy(twin_folder / f"{twin_stem}.md", target_folder / f"{doc_stem}.md")
+        twin_document = find_document(twin_folder, twin_stem) or twin_folder / f"{twin_stem}.json"
+        link_or_copy(twin_document, target_folder / f"{doc_stem}{twin_document.name[len(twin_stem):]}")
+
+        images = []
+        for img in twin_manifest.get("images") or []:
+            img = dict(img)
+            filename = img.get("filename")
+            if filename:
+                images_dir = target_folder / "images"
+                images_dir.mkdir(parents=True, exist_ok=True)
+                link_or_copy(twin_folder / "images" / filename, images_dir / filename)
+                img["path"] = str(images_dir / filename)
+            images.append(img)
+        if images:
+            with open(target_folder / "images" / "image_metadata.json", "w", encoding="utf-8") as f:
+                json.dump(images, f, indent=2, ensure_ascii=False)
+
+        manifest = self.read_manifest(target_folder)
+        for key in ("page_count", "models"):
+            if key in twin_manifest:
+                manifest[key] = twin_manifest[key]
+        now = datetime.now().isoformat()
+        manifest["timestamp"] = now
+        manifest["images"] = images
+        manifest["duplicate_of"] = {
+            "document_id": twin_manifest.get("document_id", twin_stem),
+            "source_path": str(twin.source_path),
+            "target_folder": str(twin_folder),
+            "hash": twin.sha256,
+        }
+        history = manifest.get("processing_history")
+        if not isinstance(history, list):
+            history = []
+        history.append({"step": "extraction", "timestamp": now, "status": "duplicate"})
+        manifest["processing_history"] = history
+
+        manifest_path = target_folder / "manifest.json"
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest_path
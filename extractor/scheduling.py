@@ -0,0 +1,140 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .archives import open_source, read_source, split_member_path
+from .discovery import stat_source
+
+logger = logging.getLogger(__name__)
+
+_COUNT_RE = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b", re.S)
+
+
+def _page_count_from_tail(path: Path, tail_bytes: int = 256 * 1024) -> Optional[int]:
+    """
+    Regex fallback: looks for the page tree root's /Count in the head and
+    tail of the file. Misses PDFs whose page tree lives in object streams.
+    """
+    try:
+        with open_source(path) as f:
+            head = f.read(tail_bytes)
+            f.seek(0, 2)
+            size = f.tell()
+            tail = b""
+            if size > tail_bytes:
+                f.seek(max(tail_bytes, size - tail_bytes))
+                tail = f.read()
+    except OSError:
+        return None
+
+    counts = [int(a or b) for a, b in _COUNT_RE.findall(head + tail)]
+    return max(counts) if counts else None
+
+
+def estimate_page_count(path: Path) -> Optional[int]:
+    """
+    Cheaply reads a PDF's page count from its xref/page tree without
+    rendering anything. Returns None if it cannot be determined.
+    """
+    path = Path(path)
+    try:
+        import pypdfium2
+        from docling.utils.locks import pypdfium2_lock
+    except ImportError:
+        return _page_count_from_tail(path)
+
+    try:
+        # Archive members are read into memory; pdfium parses from bytes.
+        source = read_source(path) if split_member_path(path) is not None else str(path)
+        # pdfium is not thread-safe; share Docling's lock with every other
+        # caller in the process (page analysis, image reading, conversion).
+        with pypdfium2_lock:
+            pdf = pypdfium2.PdfDocument(source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    except Exception as e:
+        logger.debug(f"pdfium could not count pages of {path}: {e}")
+        return _page_count_from_tail(path)
+
+
+@dataclass
+class WorkItem:
+    """A source file with its estimated extraction cost."""
+    path: Path
+    size: int
+    page_count: Optional[int]
+    cost: float = 0.0
+
+
+@dataclass
+class CostModel:
+    """
+    Linear estimate of extraction time in seconds.
+
+    cost = overhead + pages / pages_per_second + bytes / bytes_per_second
+
+    Files whose page count is unknown are costed from their size alone.
+    Measured throughput from earlier runs can be fed in through the
+    constructor or the "scheduling" section of config.yaml.
+    """
+    pages_per_second: float = 1.0
+    bytes_per_second: float = 50 * 1024 * 1024
+    overhead_seconds: float = 0.5
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "CostModel":
+        scheduling = (config or {}).get("scheduling") or {}
+        defaults = cls()
+        return cls(
+            pages_per_second=float(scheduling.get("pages_per_second", defaults.pages_per_second)),
+            bytes_per_second=float(scheduling.get("bytes_per_second", defaults.bytes_per_second)),
+            overhead_seconds=float(scheduling.get("overhead_seconds", defaults.overhead_seconds)),
+        )
+
+    def __call__(self, item: WorkItem) -> float:
+        cost = self.overhead_seconds + item.size / self.bytes_per_second
+        if item.page_count:
+            cost += item.page_count / self.pages_per_second
+        return cost
+
+
+class Scheduler:
+    """
+    Orders work longest-processing-time-first (LPT).
+
+    Files are estimated on a thread pool, which overlaps their stat() calls
+    and archive member reads; the pdfium page counts themselves run one at
+    a time under Docling's pypdfium2 lock. Any callable taking a WorkItem
+    and returning a cost can be used as the cost model.
+    """
+
+    def __init__(self, cost_model: Optional[Callable[[WorkItem], float]] = None, max_workers: int = 8):
+        self.cost_model = cost_model or CostModel()
+        self.max_workers = max(1, int(max_workers))
+
+    def estimate(self, path: Path) -> WorkItem:
+        path = Path(path)
+        try:
+            size = stat_source(path).size
+        except OSError:
+            size = 0
+        page_count = estimate_page_count(path) if path.suffix.lower() == ".pdf" else None
+        item = WorkItem(path=path, size=size, page_count=page_count)
+        item.cost = self.cost_model(item)
+        return item
+
+    def estimate_all(self, paths: Iterable[Path]) -> List[WorkItem]:
+        """Estimates every path, preserving input order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.estimate, paths))
+
+    def schedule(self, paths: Iterable[Path]) -> List[WorkItem]:
+        """Returns work items sorted by estimated cost, most expensive first."""
+        items = self.estimate_all(paths)
+        items.sort(key=lambda item: (-item.cost, str(item.path)))
+        return items
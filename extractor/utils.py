@@ -1,34 +1,51 @@
 import hashlib
 import os
+import sqlite3
 import yaml
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
-def get_file_metadata(file_path: Path) -> Dict[str, Any]:
+def get_file_metadata(file_path: Path, hash_service=None) -> Dict[str, Any]:
     """
     Extracts basic metadata from a file.
+
+    Args:
+        file_path: File to describe; may be an archive member's virtual
+            path (archive/member), in which case "archive" lineage is added.
+        hash_service: Optional HashService; when given, digests come from its
+            cache if the file is unchanged since it was last hashed.
     """
+    from .archives import resolve_member
+    from .hashing import hash_file
+
     file_path = Path(file_path)
-    if not file_path.exists():
+    member = resolve_member(file_path)
+    if member is None and not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    # Calculate SHA-256 hash
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        # Read in chunks to handle large files efficiently
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    
-    file_hash = sha256_hash.hexdigest()
-    
+    # sha1/sha256/size in a single pass with large buffers
+    digests = hash_service.digests(file_path) if hash_service is not None else hash_file(file_path)
+
+    if member is not None:
+        # Archive members only carry a modification time.
+        return {
+            "source_path": str(file_path.absolute()),
+            "file_size": member.size,
+            "hash": digests.sha256,
+            "sha1": digests.sha1,
+            "creation_date": datetime.fromtimestamp(member.mtime_ns / 1e9).isoformat(),
+            "archive": member.lineage(),
+        }
+
     # Get stats
     stats = file_path.stat()
     
     return {
         "source_path": str(file_path.absolute()),
         "file_size": stats.st_size,
-        "hash": file_hash,
+        "hash": digests.sha256,
+        "sha1": digests.sha1,
         "creation_date": datetime.fromtimestamp(stats.st_ctime).isoformat(),
     }
 
@@ -44,3 +61,82 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
         config = yaml.safe_load(f)
     
     return config
+
+STATE_DIR_NAME = ".extractor"
+
+def get_state_dir(target_root: Path) -> Path:
+    """
+    Returns (and creates) the hidden directory under the target root that
+    holds run state such as the discovery index.
+    """
+    state_dir = Path(target_root) / STATE_DIR_NAME
+    state_dir.mkdir(parents=True, exist_ok=True)
+    return state_dir
+
+
+def connect_state_db(db_path: Path, check_same_thread: bool = True, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Opens a SQLite database in the target's state directory.
+
+    The target may live on a network filesystem shared by several nodes, so
+    the default rollback journal is used (WAL needs shared memory) with a
+    generous busy timeout for concurrent writers. With read_only the database
+    must already exist and nothing is created or written.
+    """
+    db_path = Path(db_path)
+    if read_only:
+        return sqlite3.connect(
+            f"{db_path.absolute().as_uri()}?mode=ro", uri=True, timeout=30.0, check_same_thread=check_same_thread
+        )
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30.0, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parses a shard spec "i/n" (1-based, 1 <= i <= n) into (i, n).
+
+    Raises:
+        ValueError: If the spec is malformed or out of range.
+    """
+    try:
+        index_str, count_str = str(spec).split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/n (e.g. 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}', need 1 <= i <= n")
+    return index, count
+
+
+def in_shard(key: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """
+    True if key belongs to the given (i, n) shard; always True without a shard.
+
+    Assignment uses a stable hash of key, so every node computes the same
+    disjoint partition regardless of scan order or machine.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    digest = hashlib.sha1(key.encode("utf-8", errors="surrogateescape")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+def document_shard_key(folder: Path, source_path: str) -> str:
+    """
+    The shard key of a document folder (relative to the target root): the
+    source file's path relative to --source, which is what process shards
+    on. Folders are <relative dir>/<stem>, so the key is the folder's parent
+    joined with the source file's name.
+    """
+    return (Path(folder).parent / Path(source_path).name).as_posix()
+
+
+def shard_suffix(shard: Optional[Tuple[int, int]]) -> str:
+    """Filename infix for per-shard outputs, e.g. ".2-of-4" (empty without a shard)."""
+    if shard is None:
+        return ""
+    return f".{shard[0]}-of-{shard[1]}"
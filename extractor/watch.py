@@ -0,0 +1,244 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Generator, Iterable, Optional, Set, Tuple
+
+from .archives import is_archive, split_member_path
+from .discovery import Scanner, stat_source
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Recursive inotify watch on a directory tree (Linux, via libc)."""
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        self.overflowed = False
+        self.add_tree(root)
+
+    def add_tree(self, root: Path) -> Iterable[Path]:
+        """Watches root and its non-hidden subdirectories; returns files already present."""
+        existing = []
+        stack = [Path(root)]
+        while stack:
+            directory = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch {directory}: errno {ctypes.get_errno()}")
+                continue
+            self._dirs[wd] = directory
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(directory / entry.name)
+                        else:
+                            existing.append(directory / entry.name)
+            except OSError as e:
+                logger.debug(f"Cannot list {directory}: {e}")
+        return existing
+
+    def read(self, timeout: float) -> Set[Path]:
+        """Waits up to timeout seconds and returns the file paths that changed."""
+        changed: Set[Path] = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if path.name.startswith('.'):
+                continue
+
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Files may land before the new watch is in place.
+                    changed.update(self.add_tree(path))
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    """
+    Fallback that detects changes by re-walking the tree every interval
+    seconds; reads in between return no changes.
+    """
+
+    def __init__(self, scanner: Scanner, interval: float):
+        self._scanner = scanner
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._scanned_at = time.monotonic()
+        self.overflowed = False
+
+    def _take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        return {e.path: (e.size, e.mtime_ns) for e in self._scanner.scan_entries()}
+
+    def read(self, timeout: float) -> Set[Path]:
+        time.sleep(timeout)
+        if time.monotonic() - self._scanned_at < self.interval:
+            return set()
+        snapshot = self._take_snapshot()
+        self._scanned_at = time.monotonic()
+        changed = {p for p, sig in snapshot.items() if self._snapshot.get(p) != sig}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class Watcher:
+    """
+    Watches a Scanner's source tree and yields files once they have settled.
+
+    Events come from inotify where available (falling back to polling). A
+    file is considered settled once its size has not changed for
+    settle_seconds, so partially copied files are not handed on. A settled
+    zip/tar archive is expanded into its supported members' virtual paths.
+
+    When polling, the tree is re-walked every poll_interval seconds; pending
+    files are still checked (and on_idle called) every second at most.
+    """
+    POLL_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        scanner: Scanner,
+        settle_seconds: float = 5.0,
+        poll_interval: Optional[float] = None,
+        use_inotify: bool = True,
+    ):
+        # Watching always covers the whole tree, independent of any
+        # incremental index attached to the caller's scanner.
+        self.scanner = Scanner(scanner.source_path, max_workers=scanner.max_workers)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = self.POLL_INTERVAL if poll_interval is None else poll_interval
+        self.tick = min(1.0, self.poll_interval)
+        self._pending: Dict[Path, Tuple[int, float]] = {}
+
+        self._backend = None
+        if use_inotify:
+            try:
+                self._backend = _InotifyBackend(self.scanner.source_path)
+                logger.info(f"Watching {self.scanner.source_path} with inotify")
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}); falling back to polling")
+        if self._backend is None:
+            self._backend = _PollingBackend(self.scanner, self.poll_interval)
+            logger.info(f"Watching {self.scanner.source_path} by polling every {self.poll_interval:g}s")
+
+    def _is_candidate(self, path: Path) -> bool:
+        return path.suffix.lower() in Scanner.SUPPORTED_EXTENSIONS or is_archive(path)
+
+    def _size(self, path: Path) -> Optional[int]:
+        """Current size of a file or archive member, or None if it is gone."""
+        try:
+            if split_member_path(path) is None and not path.is_file():
+                return None
+            return stat_source(path).size
+        except OSError:
+            return None
+
+    def _touch(self, path: Path, now: float):
+        size = self._size(path)
+        if size is None:
+            self._pending.pop(path, None)
+            return
+        self._pending[path] = (size, now)
+
+    def settled_files(
+        self,
+        stop: Optional[threading.Event] = None,
+        on_idle: Optional[Callable[[], None]] = None,
+    ) -> Generator[Path, None, None]:
+        """
+        Yields settled supported files until stop is set (or forever).
+
+        on_idle, if given, is called once per poll cycle so the consumer can
+        collect background work while no new files arrive.
+        """
+        while stop is None or not stop.is_set():
+            if on_idle is not None:
+                on_idle()
+            changed = self._backend.read(self.tick)
+            now = time.monotonic()
+
+            if self._backend.overflowed:
+                logger.warning("Watch event queue overflowed; rescanning source tree")
+                self._backend.overflowed = False
+                changed.update(self.scanner.scan())
+
+            for path in changed:
+                if self._is_candidate(path):
+                    self._touch(path, now)
+
+            for path, (size, since) in list(self._pending.items()):
+                current = self._size(path)
+                if current is None:
+                    del self._pending[path]
+                    continue
+                if current != size:
+                    self._pending[path] = (current, now)
+                elif now - since >= self.settle_seconds:
+                    del self._pending[path]
+                    if is_archive(path):
+                        for entry in self.scanner.scan_archive(path):
+                            yield entry.path
+                    else:
+                        yield path
+
+    def close(self):
+        self._backend.close()
@@ -0,0 +1,733 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .archives import disable_spooling
+from .forkserver import ForkServer, fork_supported
+
+logger = logging.getLogger(__name__)
+
+
+WINDOWS_DIR = ".windows"
+
+
+@dataclass
+class ExtractionJob:
+    """
+    A scaffolded PDF whose outputs are to be written into a staging folder.
+
+    With page_range, only those pages are converted and saved as a window
+    document; with windows, the saved windows are merged instead of
+    converting (see PageSplitter).
+    """
+    source_file: Path
+    work_dir: Path
+    output_dir: Path
+    page_range: Optional[Tuple[int, int]] = None
+    windows: Tuple[Tuple[int, int], ...] = ()
+    page_count: Optional[int] = None
+    # Local copy to convert from instead of source_file (see Prefetcher).
+    read_path: Optional[Path] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[Tuple[int, int]], bool]:
+        return (str(self.work_dir), self.page_range, bool(self.windows))
+
+    @property
+    def pages(self) -> Optional[int]:
+        """Pages this job converts, if known."""
+        if self.page_range:
+            return self.page_range[1] - self.page_range[0] + 1
+        return self.page_count
+
+
+def window_path(work_dir: Path, page_range: Tuple[int, int]) -> Path:
+    return Path(work_dir) / WINDOWS_DIR / f"{page_range[0]:06d}-{page_range[1]:06d}.json"
+
+
+@dataclass
+class ExtractionResult:
+    """
+    Outcome of an ExtractionJob; error is None on success. Failures name
+    the stage ("convert", "write" or "worker" for a crash, timeout or
+    memory kill) and the exception class (or kind of worker failure).
+    """
+    job: ExtractionJob
+    error: Optional[str] = None
+    stage: Optional[str] = None
+    error_type: Optional[str] = None
+
+
+def write_outputs(engine, result, source_file: Path, work_dir: Path):
+    """
+    Writes a conversion result's markdown, JSON, images, image metadata and
+    manifest into work_dir.
+    """
+    engine.save_markdown(result, work_dir / f"{source_file.stem}.md")
+    # Images first: the JSON references the image files save_images writes.
+    image_metadata = engine.save_images(result, work_dir / "images")
+    engine.save_json(result, work_dir / f"{source_file.stem}.json")
+
+    if image_metadata:
+        images_dir = work_dir / "images"
+        images_dir.mkdir(parents=True, exist_ok=True)
+        with open(images_dir / "image_metadata.json", "w", encoding="utf-8") as f:
+            json.dump(image_metadata, f, indent=2, ensure_ascii=False)
+
+    engine.generate_manifest(result, work_dir / "manifest.json", image_metadata)
+
+
+def _convert(engine, job: ExtractionJob):
+    source = job.read_path or job.source_file
+    if job.windows:
+        return engine.merge_windows(source, [window_path(job.work_dir, w) for w in job.windows], job.windows)
+    if job.page_range:
+        return engine.convert(source, page_range=job.page_range)
+    return engine.convert(source)
+
+
+def _write(engine, job: ExtractionJob, result):
+    if job.page_range:
+        engine.save_window(result, window_path(job.work_dir, job.page_range))
+        return
+    write_outputs(engine, result, job.source_file, job.work_dir)
+    if job.windows:
+        shutil.rmtree(job.work_dir / WINDOWS_DIR, ignore_errors=True)
+
+
+def _describe(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+class ExtractionPipeline:
+    """
+    Overlaps conversion with output writing in one process.
+
+    The calling thread runs engine.convert; serialising markdown and JSON,
+    encoding images and writing the manifest happen on a pool of writer
+    threads while the next document converts. At most max_pending converted
+    documents are queued for or being written (submit blocks otherwise),
+    which caps the memory held by conversion results.
+
+    Results are returned from submit/collect/drain or, with on_result, handed
+    to that callback from the writer threads. on_start, if given, is called
+    with each job just before it starts converting.
+    """
+
+    def __init__(
+        self,
+        engine,
+        writers: int = 2,
+        max_pending: int = 2,
+        on_result: Optional[Callable[[ExtractionResult], None]] = None,
+        on_start: Optional[Callable[[ExtractionJob], None]] = None,
+    ):
+        self.engine = engine
+        self.on_result = on_result
+        self.on_start = on_start
+        self._writers = ThreadPoolExecutor(max_workers=max(1, int(writers)), thread_name_prefix="writer")
+        self.max_pending = max(1, int(max_pending))
+        self._writing = 0
+        self._cond = threading.Condition()
+        self._results: "queue.Queue[ExtractionResult]" = queue.Queue()
+        self._outstanding = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _emit(self, result: ExtractionResult):
+        if self.on_result is not None:
+            self.on_result(result)
+        else:
+            self._results.put(result)
+
+    def _written(self, job: ExtractionJob, future):
+        error = future.exception()
+        if error is None:
+            self._emit(ExtractionResult(job))
+        else:
+            self._emit(ExtractionResult(job, error=_describe(error), stage="write", error_type=type(error).__name__))
+        with self._cond:
+            self._writing -= 1
+            self._cond.notify_all()
+
+    def submit(self, job: ExtractionJob) -> List[ExtractionResult]:
+        """
+        Converts a document and queues its outputs for writing, first
+        waiting until fewer than max_pending documents are being written.
+        Returns results that are ready.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._writing < self.max_pending)
+        self._outstanding += 1
+        if self.on_start is not None:
+            self.on_start(job)
+        try:
+            result = _convert(self.engine, job)
+        except Exception as e:
+            self._emit(ExtractionResult(job, error=_describe(e), stage="convert", error_type=type(e).__name__))
+            return self.collect()
+
+        with self._cond:
+            self._writing += 1
+        future = self._writers.submit(_write, self.engine, job, result)
+        future.add_done_callback(lambda f: self._written(job, f))
+        return self.collect()
+
+    def collect(self, timeout: Optional[float] = 0) -> List[ExtractionResult]:
+        """
+        Returns results that are ready, waiting up to timeout seconds (None:
+        until at least one is) if none are.
+        """
+        results: List[ExtractionResult] = []
+        if self.on_result is not None:
+            return results
+        try:
+            if timeout != 0 and self._outstanding:
+                results.append(self._results.get(timeout=timeout))
+            while True:
+                results.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+        self._outstanding -= len(results)
+        return results
+
+    def drain(self) -> List[ExtractionResult]:
+        """Waits until every submitted document is written and returns the results."""
+        if self.on_result is not None:
+            with self._cond:
+                self._cond.wait_for(lambda: self._writing == 0)
+            return []
+        results: List[ExtractionResult] = []
+        while self._outstanding:
+            results.extend(self.collect(timeout=None))
+        return results
+
+    def close(self):
+        self._writers.shutdown(wait=True)
+
+
+@dataclass(frozen=True)
+class ConversionTimeouts:
+    """
+    Wall-clock budget for converting one job in a worker: base seconds plus
+    per_page seconds for each page (default_pages when the count is unknown).
+    A worker over budget is killed and the job fails. base and per_page both
+    0 disables the timeout.
+    """
+    base: float = 300.0
+    per_page: float = 30.0
+    default_pages: int = 50
+
+    @classmethod
+    def from_config(cls, pipeline_config: Optional[Dict[str, Any]]) -> "ConversionTimeouts":
+        """Reads timeout_seconds and timeout_seconds_per_page."""
+        pipeline_config = pipeline_config or {}
+        return cls(
+            base=float(pipeline_config.get("timeout_seconds", cls.base)),
+            per_page=float(pipeline_config.get("timeout_seconds_per_page", cls.per_page)),
+        )
+
+    def for_job(self, job: ExtractionJob) -> Optional[float]:
+        if not self.base and not self.per_page:
+            return None
+        pages = job.pages if job.pages else self.default_pages
+        return self.base + self.per_page * pages
+
+
+DEFAULT_MAX_DOCUMENTS_PER_WORKER = 500
+DEFAULT_MAX_WORKER_RSS_MB = 6144
+# Exit code of a worker that stopped itself for exceeding kill_rss.
+RSS_EXIT_CODE = 75
+RSS_CHECK_INTERVAL = 1.0
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS (kilobytes on Linux, bytes on macOS),
+        # which errs on the side of recycling.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+@dataclass(frozen=True)
+class WorkerLimits:
+    """
+    When a worker process is replaced by a fresh one.
+
+    After max_documents documents, or once its RSS is above max_rss after a
+    document, a worker finishes what it holds and exits. A worker whose RSS
+    passes kill_rss while converting exits at once; its document is retried
+    on a fresh worker. 0/None disables a limit.
+    """
+    max_documents: int = 0
+    max_rss: Optional[int] = None
+    kill_rss: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, pipeline_config: Optional[Dict[str, Any]]) -> "WorkerLimits":
+        """Reads max_documents_per_worker, max_worker_rss_mb and kill_worker_rss_mb."""
+        pipeline_config = pipeline_config or {}
+        max_rss_mb = pipeline_config.get("max_worker_rss_mb", DEFAULT_MAX_WORKER_RSS_MB)
+        kill_rss_mb = pipeline_config.get("kill_worker_rss_mb", (max_rss_mb or 0) * 1.5)
+        return cls(
+            max_documents=int(pipeline_config.get("max_documents_per_worker", DEFAULT_MAX_DOCUMENTS_PER_WORKER) or 0),
+            max_rss=int(max_rss_mb * 1024 * 1024) if max_rss_mb else None,
+            kill_rss=int(kill_rss_mb * 1024 * 1024) if kill_rss_mb else None,
+        )
+
+    def retire_reason(self, documents: int, rss: Optional[int]) -> Optional[str]:
+        if self.max_documents and documents >= self.max_documents:
+            return f"converted {documents} documents"
+        if self.max_rss and rss and rss > self.max_rss:
+            return f"RSS {rss // (1024 * 1024)} MB above {self.max_rss // (1024 * 1024)} MB"
+        return None
+
+
+def _watch_rss(kill_rss: int):
+    """Exits the worker process as soon as its RSS passes kill_rss."""
+    while True:
+        rss = current_rss()
+        if rss is not None and rss > kill_rss:
+            logger.error(f"Worker RSS {rss // (1024 * 1024)} MB above {kill_rss // (1024 * 1024)} MB; exiting")
+            logging.shutdown()
+            os._exit(RSS_EXIT_CODE)
+        time.sleep(RSS_CHECK_INTERVAL)
+
+
+def _default_engine_factory(config: Optional[Dict[str, Any]]):
+    from .docling_engine import DoclingEngine
+    return DoclingEngine(config)
+
+
+def _worker_main(conn, engine_factory, config, log_level, pipeline_options, limits=WorkerLimits()):
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(levelname)s - %(processName)s - %(message)s',
+    )
+    _serve(conn, engine_factory(config), pipeline_options, limits)
+
+
+def _serve(conn, engine, pipeline_options, limits=WorkerLimits()):
+    """Runs jobs received on conn through an ExtractionPipeline until told to stop."""
+    disable_spooling()
+    if limits.kill_rss:
+        threading.Thread(target=_watch_rss, args=(limits.kill_rss,), name="rss-guard", daemon=True).start()
+    send_lock = threading.Lock()
+    state = {"documents": 0, "retiring": False}
+
+    def send(kind, payload):
+        with send_lock:
+            conn.send((kind, payload))
+
+    def on_result(result):
+        with send_lock:
+            conn.send(("done", result))
+            state["documents"] += 1
+            reason = None if state["retiring"] else limits.retire_reason(state["documents"], current_rss())
+            if reason:
+                # The parent stops dispatching here and sends None once it
+                # has read this; jobs already in the pipe still run.
+                state["retiring"] = True
+                conn.send(("retire", reason))
+
+    pipeline = ExtractionPipeline(
+        engine,
+        on_result=on_result,
+        on_start=lambda job: send("started", job),
+        **pipeline_options,
+    )
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            pipeline.submit(job)
+    finally:
+        pipeline.drain()
+        pipeline.close()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs: List[ExtractionJob] = []
+        self.started: List[ExtractionJob] = []
+        self.deadlines: Dict[Any, float] = {}
+        self.retiring = False
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """When the job being converted (the last one started) runs out of time."""
+        if not self.started:
+            return None
+        return self.deadlines.get(self.started[-1].key)
+
+
+class WorkerPool:
+    """
+    Extraction processes that each build one engine and reuse it for many
+    documents.
+
+    The parent keeps scanning, skip logic and commits; workers run an
+    ExtractionPipeline, so each holds up to two jobs (one converting, one
+    being written). When a worker dies, the job it was converting fails and
+    its other jobs are re-queued (once) onto a replacement worker.
+
+    Workers are recycled according to WorkerLimits so memory stays flat over
+    long runs: a worker past its document count or RSS limit finishes its
+    jobs and is replaced. A worker killed for memory (its RSS guard, or the
+    OOM killer's SIGKILL) has its current job retried once on the fresh
+    worker that replaces it, rather than failed.
+
+    With timeouts, a worker still on a job past its budget (measured from
+    the moment it started converting it) is killed; the job fails with the
+    reason and the worker is replaced.
+
+    With share_models, the engine is built and warmed once in a ForkServer
+    and workers (including replacements) are forked from it, sharing its
+    model weights copy-on-write instead of each loading its own.
+    """
+    JOBS_PER_WORKER = 2
+
+    def __init__(
+        self,
+        workers: int,
+        config: Optional[Dict[str, Any]] = None,
+        engine_factory: Optional[Callable[[Optional[Dict[str, Any]]], Any]] = None,
+        writers: int = 1,
+        limits: Optional[WorkerLimits] = None,
+        timeouts: Optional[ConversionTimeouts] = None,
+        share_models: bool = False,
+    ):
+        """
+        Args:
+            workers: Number of worker processes.
+            config: Configuration passed to the engine factory.
+            engine_factory: Picklable callable building an engine from the
+                config; defaults to DoclingEngine.
+            writers: Writer threads per worker.
+            limits: When to recycle workers; defaults to no limits.
+            timeouts: Per-job time budget; defaults to none.
+            share_models: Fork workers from one warmed engine where the
+                platform supports it, rather than spawning each.
+        """
+        self.config = config
+        self.limits = limits or WorkerLimits()
+        self.timeouts = timeouts
+        self.engine_factory = engine_factory or _default_engine_factory
+        self.pipeline_options = {"writers": writers, "max_pending": self.JOBS_PER_WORKER - 1}
+        # Workers are spawned (or forked from a spawned ForkServer), never
+        # forked from here: the parent may hold open SQLite connections and
+        # threads that must not be duplicated.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._server = None
+        if share_models:
+            if fork_supported():
+                self._server = ForkServer(
+                    self.engine_factory, config, logging.getLogger().level, name="ExtractionWorker"
+                )
+            else:
+                logger.warning("Cannot fork workers on this platform; each worker loads its own models")
+        self._backlog: "deque[ExtractionJob]" = deque()
+        self._requeued: set = set()
+        self._workers: List[_Worker] = [self._spawn() for _ in range(max(1, int(workers)))]
+
+    def _spawn(self) -> _Worker:
+        if self._server is not None:
+            parent_conn, process = self._server.fork(_serve, (self.pipeline_options, self.limits))
+            return _Worker(process, parent_conn)
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                child_conn, self.engine_factory, self.config, logging.getLogger().level,
+                self.pipeline_options, self.limits,
+            ),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._backlog) + sum(len(w.jobs) for w in self._workers)
+
+    def _dispatch(self):
+        while self._backlog:
+            active = [w for w in self._workers if not w.retiring]
+            if not active:
+                return
+            worker = min(active, key=lambda w: len(w.jobs))
+            if len(worker.jobs) >= self.JOBS_PER_WORKER:
+                return
+            job = self._backlog.popleft()
+            worker.jobs.append(job)
+            worker.conn.send(job)
+
+    def submit(self, job: ExtractionJob) -> List[ExtractionResult]:
+        """
+        Hands a job to the least loaded worker, waiting if all are full.
+        Returns the results that completed while waiting.
+        """
+        results: List[ExtractionResult] = []
+        while self.in_flight >= self.size * self.JOBS_PER_WORKER:
+            results.extend(self.collect(timeout=None))
+        self._backlog.append(job)
+        self._dispatch()
+        return results
+
+    def collect(self, timeout: Optional[float] = 0) -> List[ExtractionResult]:
+        """
+        Returns results that are ready, waiting up to timeout seconds (None:
+        until at least one is) if none are.
+        """
+        busy = [w for w in self._workers if w.jobs]
+        if not busy:
+            return []
+        handles = {}
+        for w in busy:
+            handles[w.conn] = w
+            handles[w.process.sentinel] = w
+
+        deadlines = [w.deadline for w in busy if w.deadline is not None]
+        if deadlines:
+            until_deadline = max(0.0, min(deadlines) - time.monotonic())
+            timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+
+        results: List[ExtractionResult] = []
+        ready = wait(list(handles), timeout)
+        for worker in {id(handles[h]): handles[h] for h in ready}.values():
+            try:
+                while worker.conn.poll():
+                    kind, payload = worker.conn.recv()
+                    if kind == "started":
+                        worker.started.append(payload)
+                        budget = self.timeouts.for_job(payload) if self.timeouts else None
+                        if budget is not None:
+                            worker.deadlines[payload.key] = time.monotonic() + budget
+                        continue
+                    if kind == "retire":
+                        logger.info(f"Recycling extraction worker {worker.process.name}: {payload}")
+                        worker.retiring = True
+                        worker.conn.send(None)
+                        continue
+                    worker.jobs.remove(payload.job)
+                    if payload.job in worker.started:
+                        worker.started.remove(payload.job)
+                    worker.deadlines.pop(payload.job.key, None)
+                    results.append(payload)
+            except (EOFError, OSError):
+                pass
+            if worker.jobs and not worker.process.is_alive():
+                results.extend(self._reap(worker))
+            elif worker.retiring and not worker.jobs:
+                self._retire(worker)
+
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if worker.jobs and worker.deadline is not None and worker.deadline <= now:
+                results.extend(self._kill(worker))
+        self._dispatch()
+        return results
+
+    def _kill(self, worker: _Worker) -> List[ExtractionResult]:
+        """Kills a worker whose current job ran out of time."""
+        current = worker.started[-1]
+        budget = self.timeouts.for_job(current)
+        logger.error(f"Conversion of {current.source_file} exceeded {budget:.0f}s; killing worker {worker.process.name}")
+        worker.process.kill()
+        return self._reap(worker, reason=f"timed out after {budget:.0f}s")
+
+    def _retire(self, worker: _Worker):
+        """Replaces a worker that has finished its jobs after asking to be recycled."""
+        worker.process.join(timeout=30)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join()
+        worker.conn.close()
+        self._workers[self._workers.index(worker)] = self._spawn()
+
+    def _reap(self, worker: _Worker, reason: Optional[str] = None) -> List[ExtractionResult]:
+        """
+        Replaces a dead worker, failing its current job (with reason, if
+        given) and re-queueing the rest.
+        """
+        worker.process.join(timeout=5)
+        exitcode = worker.process.exitcode
+        current = worker.started[-1] if worker.started else None
+        if reason is None:
+            logger.warning(f"Extraction worker {worker.process.name} exited with code {exitcode} while converting {current.source_file if current else 'nothing'}")
+        worker.conn.close()
+        fresh = self._spawn()
+        self._workers[self._workers.index(worker)] = fresh
+
+        out_of_memory = reason is None and exitcode in (RSS_EXIT_CODE, -signal.SIGKILL)
+        if reason is not None:
+            error, error_type = reason, "Timeout"
+        elif out_of_memory:
+            error, error_type = "worker exceeded its memory limit", "MemoryLimit"
+        else:
+            error, error_type = f"worker exited with code {exitcode}", "WorkerCrash"
+        results = []
+        for job in reversed(worker.jobs):
+            key = job.key
+            if key in self._requeued or (job == current and not out_of_memory):
+                results.append(ExtractionResult(job, error=error, stage="worker", error_type=error_type))
+            elif job == current:
+                # Memory-heavy: give it a fresh worker with nothing else queued ahead.
+                logger.info(f"Retrying {job.source_file} on a fresh worker")
+                self._requeued.add(key)
+                fresh.jobs.append(job)
+                fresh.conn.send(job)
+            else:
+                self._requeued.add(key)
+                self._backlog.appendleft(job)
+        return results
+
+    def drain(self) -> List[ExtractionResult]:
+        """Waits for every in-flight job and returns their results."""
+        results: List[ExtractionResult] = []
+        while self.in_flight:
+            results.extend(self.collect(timeout=None))
+        return results
+
+    def close(self):
+        """Stops the workers; jobs still in flight are abandoned."""
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
+        self._workers = []
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+
+class PageSplitter:
+    """
+    Splits long PDFs into page-window jobs in front of an ExtractionPipeline
+    or WorkerPool, and merges them back.
+
+    Windows are converted independently (in parallel across workers, or one
+    after another in-process, which bounds memory to one window) and saved
+    into the staging folder. Once all windows of a document are in, a merge
+    job builds its outputs; only that job's result is reported, for the
+    original job. Exposes the same submit/collect/drain/close interface.
+    """
+
+    def __init__(self, pool, windows_for: Callable[[ExtractionJob], List[Tuple[int, int]]]):
+        """
+        Args:
+            pool: ExtractionPipeline or WorkerPool that runs the jobs.
+            windows_for: Returns a job's page windows, or [] to convert it whole.
+        """
+        self.pool = pool
+        self.windows_for = windows_for
+        self._split: Dict[str, Dict[str, Any]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, job: ExtractionJob) -> List[ExtractionResult]:
+        windows = self.windows_for(job)
+        if len(windows) <= 1:
+            return self._filter(self.pool.submit(job))
+        logger.info(f"Converting {job.source_file} in {len(windows)} page windows")
+        self._split[str(job.work_dir)] = {"job": job, "windows": windows, "pending": set(windows), "error": None}
+        results: List[ExtractionResult] = []
+        for page_range in windows:
+            results.extend(self.pool.submit(replace(job, page_range=page_range)))
+        return self._filter(results)
+
+    def _filter(self, results: List[ExtractionResult]) -> List[ExtractionResult]:
+        out: List[ExtractionResult] = []
+        for result in results:
+            job = result.job
+            state = self._split.get(str(job.work_dir))
+            if state is None:
+                out.append(result)
+                continue
+            if job.windows:
+                del self._split[str(job.work_dir)]
+                out.append(replace(result, job=state["job"]))
+                continue
+            state["pending"].discard(job.page_range)
+            if result.error is not None and state["error"] is None:
+                state["error"] = replace(
+                    result,
+                    job=state["job"],
+                    error=f"pages {job.page_range[0]}-{job.page_range[1]}: {result.error}",
+                )
+            if state["pending"]:
+                continue
+            if state["error"] is not None:
+                del self._split[str(job.work_dir)]
+                out.append(state["error"])
+            else:
+                merge = replace(state["job"], windows=tuple(state["windows"]))
+                out.extend(self._filter(self.pool.submit(merge)))
+        return out
+
+    def collect(self, timeout: Optional[float] = 0) -> List[ExtractionResult]:
+        return self._filter(self.pool.collect(timeout))
+
+    def drain(self) -> List[ExtractionResult]:
+        results: List[ExtractionResult] = []
+        while True:
+            results.extend(self._filter(self.pool.drain()))
+            if not self._split:
+                return results
+
+    def close(self):
+        self.pool.close()
@@ -16,17 +16,9 @@ if str(_ROOT) not in sys.path:
 
 from followthemoney import model
 
-
-def _hash_file(path: Path) -> Dict[str, Any]:
-    sha1 = hashlib.sha1()
-    sha256 = hashlib.sha256()
-    size = 0
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            size += len(chunk)
-            sha1.update(chunk)
-            sha256.update(chunk)
-    return {"sha1": sha1.hexdigest(), "sha256": sha256.hexdigest(), "size": size}
+from extractor.catalog import Catalog
+from extractor.hashing import HashService
+from extractor.utils import document_shard_key, in_shard, parse_shard, shard_suffix
 
 
 def _stable_id(prefix: str, value: str) -> str:
@@ -51,21 +43,45 @@ def _write_entity(out, entity) -> None:
     out.write(json.dumps(data, ensure_ascii=False) + "\n")
 
 
+def _load_images(doc_dir: Path, manifest: Dict[str, Any]) -> List[Any]:
+    img_meta_path = doc_dir / "images" / "image_metadata.json"
+    if img_meta_path.exists():
+        try:
+            return json.loads(img_meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            return []
+    return manifest.get("images") or []
+
+
 def _build_entities(
     doc_dir: Path,
     manifest: Dict[str, Any],
     include_embeddings: bool,
+    hash_service: Optional[HashService] = None,
 ) -> Tuple[Any, List[Any]]:
+    hash_service = hash_service or HashService()
     doc_stem = manifest.get("document_id") or doc_dir.name
 
     source_path = manifest.get("source_path")
     pdf_path = Path(source_path) if source_path else None
     if pdf_path is None or not pdf_path.exists():
-        pdf_path = _find_pdf(doc_dir)
+        # Archive members have no file of their own; hash them out of the archive.
+        pdf_path = pdf_path if manifest.get("archive") else _find_pdf(doc_dir)
+
+    images_dir = doc_dir / "images"
+    images = _load_images(doc_dir, manifest)
+
+    # Hash the PDF and every image once (cached, in parallel) and reuse the
+    # digests for ids, contentHash and fileSize below.
+    to_hash = [images_dir / img["filename"] for img in images if isinstance(img, dict) and img.get("filename")]
+    to_hash = [p for p in to_hash if p.exists()]
+    if pdf_path is not None:
+        to_hash.append(pdf_path)
+    digests = hash_service.digests_many(to_hash)
 
     sha256 = manifest.get("hash")
-    if not sha256 and pdf_path and pdf_path.exists():
-        sha256 = _hash_file(pdf_path)["sha256"]
+    if not sha256 and pdf_path in digests:
+        sha256 = digests[pdf_path].sha256
 
     doc_id = f"doc-{sha256}" if sha256 else _stable_id("doc", str(doc_dir.absolute()))
 
@@ -78,13 +94,11 @@ def _build_entities(
         mime = mimetypes.guess_type(pdf_path.name)[0] or "application/pdf"
         doc.add("mimeType", mime)
         doc.add("extension", pdf_path.suffix.lstrip(".") or "pdf")
-        try:
-            hashes = _hash_file(pdf_path)
-            doc.add("contentHash", hashes["sha1"])
-            doc.add("fileSize", hashes["size"])
-            doc.add("notes", f"sha256:{hashes['sha256']}")
-        except Exception:
-            pass
+        hashes = digests.get(pdf_path)
+        if hashes is not None:
+            doc.add("contentHash", hashes.sha1)
+            doc.add("fileSize", hashes.size)
+            doc.add("notes", f"sha256:{hashes.sha256}")
 
     if source_path:
         doc.add("sourceUrl", _as_uri(Path(source_path)))
@@ -109,16 +123,6 @@ def _build_entities(
         except Exception:
             pass
 
-    images_dir = doc_dir / "images"
-    img_meta_path = images_dir / "image_metadata.json"
-    if img_meta_path.exists():
-        try:
-            images = json.loads(img_meta_path.read_text(encoding="utf-8"))
-        except Exception:
-            images = []
-    else:
-        images = manifest.get("images") or []
-
     image_entities: List[Any] = []
     for img in images:
         if not isinstance(img, dict):
@@ -128,13 +132,8 @@ def _build_entities(
             continue
 
         img_path = images_dir / filename
-
-        img_sha256 = None
-        if img_path.exists():
-            try:
-                img_sha256 = _hash_file(img_path)["sha256"]
-            except Exception:
-                img_sha256 = None
+        hashes = digests.get(img_path)
+        img_sha256 = hashes.sha256 if hashes is not None else None
 
         img_id = f"img-{img_sha256}" if img_sha256 else _stable_id("img", f"{doc_id}:{filename}")
 
@@ -148,13 +147,10 @@ def _build_entities(
 
         if img_path.exists():
             image_ent.add("sourceUrl", _as_uri(img_path))
-            try:
-                hashes = _hash_file(img_path)
-                image_ent.add("contentHash", hashes["sha1"])
-                image_ent.add("fileSize", hashes["size"])
-                image_ent.add("notes", f"sha256:{hashes['sha256']}")
-            except Exception:
-                pass
+        if hashes is not None:
+            image_ent.add("contentHash", hashes.sha1)
+            image_ent.add("fileSize", hashes.size)
+            image_ent.add("notes", f"sha256:{hashes.sha256}")
 
         if img.get("description"):
             image_ent.add("description", img.get("description"))
@@ -177,27 +173,41 @@ def _build_entities(
     return doc, image_entities
 
 
-def export_target(target_dir: Path, out_path: Path, include_embeddings: bool) -> int:
+def export_target(
+    target_dir: Path,
+    out_path: Path,
+    include_embeddings: bool,
+    shard: Optional[Tuple[int, int]] = None,
+) -> int:
     target_dir = Path(target_dir)
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with out_path.open("w", encoding="utf-8") as out:
-        for manifest_path in sorted(target_dir.rglob("manifest.json")):
-            doc_dir = manifest_path.parent
-            try:
-                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
-            except Exception:
-                continue
-
-            if not isinstance(manifest, dict):
-                continue
-
-            doc, images = _build_entities(doc_dir, manifest, include_embeddings)
-            _write_entity(out, doc)
-            for image_ent in images:
-                _write_entity(out, image_ent)
-
+    with HashService.for_target(target_dir) as hash_service, Catalog.for_target(target_dir) as catalog:
+        with out_path.open("w", encoding="utf-8") as out:
+            for manifest_path in catalog.manifests():
+                doc_dir = manifest_path.parent
+                try:
+                    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+                except Exception:
+                    continue
+
+                if not isinstance(manifest, dict):
+                    continue
+                # Same key as process --shard: the source path relative to --source.
+                shard_key = document_shard_key(
+                    doc_dir.relative_to(target_dir), manifest.get("source_path") or doc_dir.name
+                )
+                if not in_shard(shard_key, shard):
+                    continue
+
+                doc, images = _build_entities(doc_dir, manifest, include_embeddings, hash_service)
+                _write_entity(out, doc)
+                for image_ent in images:
+                    _write_entity(out, image_ent)
+                catalog.mark_exported(doc_dir, doc.id)
+
+        catalog.flush()
     return 0
 
 
@@ -217,10 +227,18 @@ def main(argv: Optional[List[str]] = None) -> int:
         action="store_true",
         help="Include embeddings from image_metadata.json (can be very large)",
     )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only export document folders in shard I of N (1-based); "
+        "default output becomes <target>/followthemoney.I-of-N.ndjson",
+    )
 
     args = parser.parse_args(argv)
-    out_path = args.out or (args.target / "followthemoney.ndjson")
-    return export_target(args.target, out_path, args.include_embeddings)
+    out_path = args.out or (args.target / f"followthemoney{shard_suffix(args.shard)}.ndjson")
+    return export_target(args.target, out_path, args.include_embeddings, shard=args.shard)
 
 
 if __name__ == "__main__":
@@ -11,7 +11,9 @@ _ROOT = Path(__file__).resolve().parents[1]
 if str(_ROOT) not in sys.path:
     sys.path.insert(0, str(_ROOT))
 
+from extractor.catalog import Catalog
 from extractor.inference import infer_stream
+from extractor.utils import parse_shard, shard_suffix
 
 
 def main() -> int:
@@ -23,7 +25,8 @@ def main() -> int:
         "--factual",
         type=Path,
         default=None,
-        help="Input factual NDJSON (default: <target>/followthemoney.ndjson)",
+        help="Input factual NDJSON (default: <target>/followthemoney.ndjson, or with --shard "
+        "the matching <target>/followthemoney.I-of-N.ndjson)",
     )
     parser.add_argument(
         "--out",
@@ -50,6 +53,16 @@ def main() -> int:
         help="Do not generate images/image_enrichment.json (skip image descriptions/embeddings/faces)",
     )
 
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only infer evidence in shard I of N (1-based), keyed by document so a "
+        "document and its images stay together; default output becomes "
+        "<target>/followthemoney.inferred.I-of-N.ndjson",
+    )
+
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -58,18 +71,21 @@ def main() -> int:
         stream=sys.stderr,
     )
 
-    factual = args.factual or (args.target / "followthemoney.ndjson")
-    out = args.out or (args.target / "followthemoney.inferred.ndjson")
+    factual = args.factual or (args.target / f"followthemoney{shard_suffix(args.shard)}.ndjson")
+    out = args.out or (args.target / f"followthemoney.inferred{shard_suffix(args.shard)}.ndjson")
 
-    return infer_stream(
-        factual_ndjson=factual,
-        out_path=out,
-        ollama_host=args.ollama_host,
-        model_name=args.model,
-        max_chars=args.max_chars,
-        verbose=args.verbose,
-        image_enrichment=not args.no_image_enrichment,
-    )
+    with Catalog.for_target(args.target) as catalog:
+        return infer_stream(
+            factual_ndjson=factual,
+            out_path=out,
+            ollama_host=args.ollama_host,
+            model_name=args.model,
+            max_chars=args.max_chars,
+            verbose=args.verbose,
+            image_enrichment=not args.no_image_enrichment,
+            shard=args.shard,
+            catalog=catalog,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from extractor import archives
+from extractor.archives import iter_members, open_member, read_source, resolve_member
+from extractor.cli import cli
+from extractor.discovery import Scanner
+from extractor.duplicates import DuplicateDetector
+from extractor.hashing import hash_file
+from extractor.scaffolding import Scaffolder
+
+
+def _make_zip(path, members):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_iter_members_zip_and_tar(tmp_path):
+    zip_path = _make_zip(tmp_path / "release.zip", {"b/doc2.pdf": b"two", "doc1.pdf": b"one", "dir/": b""})
+    with tarfile.open(tmp_path / "release.tar", "w") as tf:
+        src = tmp_path / "doc3.pdf"
+        src.write_bytes(b"three")
+        tf.add(src, arcname="c/doc3.pdf")
+
+    assert [(m.name, m.size) for m in iter_members(zip_path)] == [("b/doc2.pdf", 3), ("doc1.pdf", 3)]
+    assert [m.name for m in iter_members(tmp_path / "release.tar")] == ["c/doc3.pdf"]
+    assert read_source(tmp_path / "release.tar" / "c" / "doc3.pdf") == b"three"
+
+
+def test_zip_members_read_through_a_handle_per_thread(tmp_path):
+    zip_path = _make_zip(tmp_path / "release.zip", {f"doc{i}.pdf": bytes([i]) * 4096 for i in range(8)})
+    paths = [zip_path / f"doc{i}.pdf" for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for _ in range(5):
+            assert list(pool.map(read_source, paths)) == [bytes([i]) * 4096 for i in range(8)]
+    # Each thread opens its own handle and reuses it.
+    key = archives._key(zip_path)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        other = pool.submit(archives._zip_handle, key).result()
+    assert archives._zip_handle(key) is archives._zip_handle(key) is not other
+    with open_member(resolve_member(paths[0])) as f:
+        assert f.read() == bytes([0]) * 4096
+
+
+def test_compressed_tar_is_unpacked_in_one_pass(tmp_path):
+    with tarfile.open(tmp_path / "release.tar.gz", "w:gz") as tf:
+        for i in range(5):
+            src = tmp_path / f"doc{i}.pdf"
+            src.write_bytes(bytes([i]) * 100)
+            tf.add(src, arcname=f"d/doc{i}.pdf")
+
+    spool = archives._TarSpool()
+    with patch("extractor.archives._tar_spool", spool), patch.object(
+        archives._TarSpool, "_unpack", wraps=spool._unpack
+    ) as unpack:
+        for member in iter_members(tmp_path / "release.tar.gz"):
+            assert read_source(member.path) == bytes([int(member.name[5])]) * 100
+    assert unpack.call_count == 1
+    (unpacked,) = spool._spools.values()
+    assert sorted(p.name for p in (unpacked / "d").iterdir()) == [f"doc{i}.pdf" for i in range(5)]
+    spool.clear()
+    assert not unpacked.exists()
+
+
+def test_spooled_paths_are_pinned_and_workers_do_not_spool(tmp_path):
+    archive = tmp_path / "release.tar.gz"
+    with tarfile.open(archive, "w:gz") as tf:
+        src = tmp_path / "doc.pdf"
+        src.write_bytes(b"%PDF doc")
+        tf.add(src, arcname="doc.pdf")
+
+    spool = archives._TarSpool(max_archives=0)
+    with patch("extractor.archives._tar_spool", spool):
+        assert archives.spooled_path(tmp_path / "doc.pdf") is None
+        unpacked = archives.spooled_path(archive / "doc.pdf")
+        assert unpacked.read_bytes() == b"%PDF doc"
+        # Pinned: other reads do not evict it, releasing it does.
+        assert read_source(archive / "doc.pdf") == b"%PDF doc"
+        assert unpacked.exists()
+        archives.release_spooled(archive / "doc.pdf")
+        assert not unpacked.exists()
+
+        archives.disable_spooling()
+        with patch.object(archives._TarSpool, "_unpack") as unpack:
+            assert read_source(archive / "doc.pdf") == b"%PDF doc"
+            assert archives.spooled_path(archive / "doc.pdf") is None
+        unpack.assert_not_called()
+
+
+def test_iter_members_rejects_unsafe_names(tmp_path):
+    zip_path = _make_zip(tmp_path / "evil.zip", {"../escape.pdf": b"x", "/abs.pdf": b"y", "ok.pdf": b"z"})
+    assert [m.name for m in iter_members(zip_path)] == ["ok.pdf"]
+
+
+def test_scanner_treats_archives_as_directories(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "loose.pdf").write_bytes(b"loose")
+    _make_zip(source / "release.zip", {"a/doc1.pdf": b"one", "a/notes.txt": b"skip", ".hidden/doc.pdf": b"skip"})
+
+    paths = sorted(Scanner(source).scan())
+    assert paths == [source / "loose.pdf", source / "release.zip" / "a" / "doc1.pdf"]
+    assert sorted(Scanner(source, archives=False).scan()) == [source / "loose.pdf"]
+    assert list(Scanner(source / "release.zip").scan()) == [source / "release.zip" / "a" / "doc1.pdf"]
+
+
+def test_members_hash_and_deduplicate_without_unpacking(tmp_path):
+    data = b"%PDF-1.4 identical" * 1000
+    archive = _make_zip(tmp_path / "release.zip", {"doc1.pdf": data})
+    loose = tmp_path / "doc1.pdf"
+    loose.write_bytes(data)
+    member_path = archive / "doc1.pdf"
+
+    assert hash_file(member_path).sha256 == hashlib.sha256(data).hexdigest()
+
+    detector = DuplicateDetector(tmp_path / "dups.sqlite")
+    detector.register(loose, tmp_path / "target" / "doc1")
+    twin = detector.find_twin(member_path)
+    assert twin is not None and twin.source_path == loose
+    detector.close()
+
+
+def test_scaffolder_records_archive_lineage(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    archive = _make_zip(source / "release.zip", {"a/doc1.pdf": b"one"})
+    member_path = archive / "a" / "doc1.pdf"
+
+    scaffolder = Scaffolder(source, tmp_path / "target")
+    target_folder = scaffolder.create_scaffold(member_path)
+    assert target_folder == tmp_path / "target" / "release.zip" / "a" / "doc1"
+
+    scaffolder.link_source(member_path, target_folder)
+    scaffolder.write_manifest(member_path, target_folder)
+
+    assert list(target_folder.iterdir()) == [target_folder / "manifest.json"]
+    manifest = json.loads((target_folder / "manifest.json").read_text())
+    assert manifest["archive"] == {"path": str(archive.absolute()), "member": "a/doc1.pdf"}
+    assert manifest["file_size"] == 3
+    assert manifest["hash"] == hashlib.sha256(b"one").hexdigest()
+    assert resolve_member(member_path).size == 3
+
+
+def test_cli_process_streams_archive_members(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    _make_zip(source / "release.zip", {"a/doc1.pdf": b"one", "a/photo.jpg": b"jpg"})
+    target = tmp_path / "target"
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_docling = MockEngine.return_value
+        mock_docling.save_images.return_value = []
+        runner = CliRunner()
+        result = runner.invoke(cli, ["process", "--source", str(source), "--target", str(target)])
+
+    assert result.exit_code == 0, result.output
+    assert "Successfully processed:   2" in result.output
+    mock_docling.convert.assert_called_once_with(source / "release.zip" / "a" / "doc1.pdf")
+    assert (target / "release.zip" / "a" / "photo" / "manifest.json").exists()
+
+
+def test_cli_process_hands_workers_the_unpacked_tar_member(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    with tarfile.open(source / "release.tar.gz", "w:gz") as tf:
+        src = tmp_path / "doc1.pdf"
+        src.write_bytes(b"%PDF one")
+        tf.add(src, arcname="a/doc1.pdf")
+    target = tmp_path / "target"
+
+    read = []
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_docling = MockEngine.return_value
+        mock_docling.save_images.return_value = []
+        mock_docling.convert.side_effect = lambda path: read.append((path, path.read_bytes()))
+        result = CliRunner().invoke(cli, ["process", "--source", str(source), "--target", str(target)])
+
+    assert result.exit_code == 0, result.output
+    (path, data), = read
+    assert data == b"%PDF one" and path.parent.parent.name.startswith("extractor-tar-")
+    assert not path.exists()  # the spool is deleted at the end of the run
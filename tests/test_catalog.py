@@ -0,0 +1,97 @@
+import json
+
+from click.testing import CliRunner
+
+from extractor.catalog import Catalog
+from extractor.cli import cli
+
+
+def _write_manifest(folder, extracted=True, **fields):
+    folder.mkdir(parents=True)
+    history = [{"step": "discovery", "timestamp": "2026-01-01T00:00:00"}]
+    if extracted:
+        history.append({"step": "extraction", "status": "success", "timestamp": "2026-01-02T00:00:00"})
+    manifest = {"document_id": folder.name, "file_type": "PDF", "processing_history": history}
+    manifest.update(fields)
+    (folder / "manifest.json").write_text(json.dumps(manifest))
+
+
+def test_catalog_tracks_stages(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir()
+    with Catalog.for_target(target) as catalog:
+        assert catalog.authoritative is True
+        catalog.record_discovery(target / "a", {"document_id": "a", "file_type": "PDF"})
+        catalog.record_discovery(target / "b", {"document_id": "b", "file_type": "JPG"})
+        catalog.record_extraction(target / "a", {"page_count": 3, "images": [{}, {}]}, output_bytes=100)
+        catalog.mark_exported(target / "a", "doc-a")
+        catalog.mark_inferred("doc-a")
+        catalog.flush()
+
+        assert catalog.is_extracted(target / "a") is True
+        assert catalog.is_extracted(target / "b") is False
+        assert catalog.folders() == [target / "a", target / "b"]
+        summary = catalog.summary()
+
+    assert summary["documents"] == 2
+    assert summary["extracted"] == 1
+    assert summary["exported"] == 1
+    assert summary["inferred"] == 1
+    assert summary["pages"] == 3
+    assert summary["images"] == 2
+    assert summary["output_bytes"] == 100
+    assert summary["by_type"] == {"JPG": 1, "PDF": 1}
+
+
+def test_catalog_rebuild_from_existing_tree(tmp_path):
+    target = tmp_path / "target"
+    _write_manifest(target / "x" / "done", page_count=2)
+    _write_manifest(target / "x" / "pending", extracted=False)
+    _write_manifest(target / ".extractor" / "hidden")
+
+    with Catalog.for_target(target) as catalog:
+        # Folders predate the catalog, so it cannot vouch for the whole tree yet.
+        assert catalog.authoritative is False
+        assert [p.parent.name for p in catalog.manifests()] == ["done", "pending"]
+
+        assert catalog.rebuild() == 2
+        assert catalog.authoritative is True
+        summary = catalog.summary()
+        assert summary["documents"] == 2
+        assert summary["extracted"] == 1
+        assert summary["pages"] == 2
+
+
+def test_scaffolder_commit_records_extraction(tmp_path):
+    from extractor.scaffolding import Scaffolder
+
+    source = tmp_path / "source"
+    source.mkdir()
+    pdf = source / "doc1.pdf"
+    pdf.write_bytes(b"%PDF")
+    scaffolder = Scaffolder(source, tmp_path / "target")
+    target_folder = scaffolder.create_scaffold(pdf)
+    scaffolder.write_manifest(pdf, target_folder)
+
+    staging = scaffolder.begin_staging(target_folder)
+    (staging / "doc1.md").write_text("# doc1")
+    (staging / "doc1.json").write_text("{}")
+    scaffolder.commit(staging, target_folder)
+
+    catalog = scaffolder.catalog
+    assert catalog.folders() == [target_folder]
+    assert catalog.is_extracted(target_folder) is True
+    assert catalog.summary()["output_bytes"] > 0
+
+
+def test_cli_status(tmp_path):
+    target = tmp_path / "target"
+    _write_manifest(target / "doc1")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["status", "--target", str(target), "--rebuild", "--json"])
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.output.split("\n", 1)[1])
+    assert summary["documents"] == 1
+    assert summary["extracted"] == 1
+    assert summary["complete"] is True
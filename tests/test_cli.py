@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 
 from click.testing import CliRunner
 
+import extractor.cli as cli_module
+from extractor.catalog import Catalog
 from extractor.cli import cli
 
 
@@ -113,3 +115,311 @@ def test_cli_process_error_counts(tmp_path):
     assert result.exit_code == 0
     assert "Disk full" in result.output
     assert "Errors encountered:       1" in result.output
+
+
+def test_cli_process_watch_handles_settled_files(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "image1.png").write_bytes(b"png")
+    late = source_dir / "image2.png"
+    late.write_bytes(b"png2")
+    target_dir = tmp_path / "target"
+
+    with patch("extractor.cli.DoclingEngine"), patch("extractor.cli.Scanner") as MockScanner, patch(
+        "extractor.cli.Watcher"
+    ) as MockWatcher:
+        MockScanner.return_value.scan.return_value = [source_dir / "image1.png"]
+        MockWatcher.return_value.settled_files.return_value = [late]
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["process", "--source", str(source_dir), "--target", str(target_dir), "--watch",
+             "--watch-poll", "--watch-interval", "300"],
+        )
+
+    assert result.exit_code == 0
+    assert "Successfully processed:   2" in result.output
+    assert (target_dir / "image2" / "manifest.json").exists()
+    assert MockWatcher.call_args.kwargs["poll_interval"] == 300
+    assert MockWatcher.call_args.kwargs["use_inotify"] is False
+    MockWatcher.return_value.close.assert_called_once()
+
+
+def test_cli_process_watch_requires_directory(tmp_path):
+    pdf = tmp_path / "doc1.pdf"
+    pdf.touch()
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["process", "--source", str(pdf), "--target", str(tmp_path / "t"), "--watch"]
+    )
+
+    assert result.exit_code == 2
+
+
+def test_cli_process_shards_are_disjoint(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    for i in range(8):
+        (source_dir / f"image{i}.png").write_bytes(b"png")
+    target_dir = tmp_path / "target"
+
+    runner = CliRunner()
+    with patch("extractor.cli.DoclingEngine"):
+        for shard in ("1/2", "2/2"):
+            result = runner.invoke(
+                cli,
+                ["process", "--source", str(source_dir), "--target", str(target_dir), "--shard", shard],
+            )
+            assert result.exit_code == 0
+            assert "Skipped (already exists): 0" in result.output
+
+    assert len(list(target_dir.glob("image*/manifest.json"))) == 8
+
+
+def test_cli_process_uses_selected_profile(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "doc1.pdf").write_bytes(b"%PDF doc1")
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["process", "--profile", "fast", "--source", str(source_dir), "--target", str(tmp_path / "t")],
+        )
+        assert result.exit_code == 0
+        assert MockEngine.call_args[0][0]["docling"]["profile"] == "fast"
+
+        result = runner.invoke(
+            cli,
+            ["process", "--profile", "bogus", "--source", str(source_dir), "--target", str(tmp_path / "t")],
+        )
+    assert result.exit_code == 2
+    assert "Unknown extraction profile 'bogus'" in result.output
+
+
+def test_cli_process_rejects_bad_shard(tmp_path):
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["process", "--source", str(tmp_path), "--target", str(tmp_path / "t"), "--shard", "3/2"]
+    )
+    assert result.exit_code == 2
+
+
+def test_cli_process_largest_first_order(tmp_path):
+    from PIL import Image
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    img = Image.new("RGB", (10, 10))
+    img.save(source_dir / "short.pdf", save_all=True)
+    img.save(source_dir / "long.pdf", save_all=True, append_images=[img] * 5)
+    target_dir = tmp_path / "target"
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_docling = MockEngine.return_value
+        mock_docling.save_images.return_value = []
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["process", "--source", str(source_dir), "--target", str(target_dir), "--order", "largest-first"],
+        )
+
+    assert result.exit_code == 0
+    assert "Scheduled 2 files largest-first" in result.output
+    converted = [c.args[0].name for c in mock_docling.convert.call_args_list]
+    assert converted == ["long.pdf", "short.pdf"]
+
+
+def test_cli_process_with_worker_pool(tmp_path):
+    from extractor.workers import WorkerPool
+    from tests.test_workers import fake_engine_factory
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    for name in ("a", "b", "broken"):
+        (source_dir / f"{name}.pdf").write_bytes(f"%PDF {name}".encode())
+    target_dir = tmp_path / "target"
+
+    def make_pool(workers, config, **kwargs):
+        return WorkerPool(workers, config, engine_factory=fake_engine_factory, **kwargs)
+
+    with patch("extractor.cli.WorkerPool", side_effect=make_pool), patch("extractor.cli.DoclingEngine") as MockEngine:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["process", "--source", str(source_dir), "--target", str(target_dir), "--workers", "2"]
+        )
+
+    assert result.exit_code == 0, result.output
+    MockEngine.assert_not_called()
+    assert "Successfully processed:   2" in result.output
+    assert "Errors encountered:       1" in result.output
+    assert (target_dir / "a" / "commit.json").exists()
+    assert (target_dir / "b" / "b.md").exists()
+    assert not (target_dir / "broken" / "commit.json").exists()
+    # The failure is on record for the next attempt; the staging folder is gone.
+    history = json.loads((target_dir / "broken" / "manifest.json").read_text())["processing_history"]
+    assert history[-1]["status"] == "failed"
+    assert history[-1]["reason"] == "ValueError: cannot parse"
+    assert not (target_dir / ".broken.staging").exists()
+
+
+def test_cli_process_shared_skips_documents_claimed_elsewhere(tmp_path):
+    from extractor.leases import LeaseManager
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    for name in ("a", "b"):
+        (source_dir / f"{name}.pdf").write_bytes(f"%PDF {name}".encode())
+    target_dir = tmp_path / "target"
+    other_node = LeaseManager.for_target(target_dir, owner="other-node")
+    assert other_node.acquire(target_dir / "b")
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_docling = MockEngine.return_value
+        mock_docling.save_images.return_value = []
+        result = CliRunner().invoke(
+            cli, ["process", "--shared", "--source", str(source_dir), "--target", str(target_dir)]
+        )
+    other_node.close()
+
+    assert result.exit_code == 0, result.output
+    assert "Successfully processed:   1" in result.output
+    assert "Claimed by other nodes:   1" in result.output
+    assert [c.args[0].name for c in mock_docling.convert.call_args_list] == ["a.pdf"]
+    assert not list(target_dir.glob(".*.staging"))
+    assert not list((target_dir / ".extractor" / "leases").glob("*.lease"))
+
+
+def test_cli_process_plan_converts_nothing(tmp_path):
+    source_dir = tmp_path / "source"
+    (source_dir / "set1").mkdir(parents=True)
+    (source_dir / "set1" / "a.pdf").write_bytes(b"%PDF a")
+    (source_dir / "set1" / "b.pdf").write_bytes(b"%PDF b")
+    target_dir = tmp_path / "target"
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine, patch("extractor.cli.WorkerPool") as MockPool, patch(
+        "extractor.scheduling.estimate_page_count", return_value=12
+    ):
+        result = CliRunner().invoke(
+            cli, ["process", "--plan", "--source", str(source_dir), "--target", str(target_dir)]
+        )
+
+    assert result.exit_code == 0, result.output
+    MockEngine.assert_not_called()
+    MockPool.assert_not_called()
+    assert "Plan: 2 documents, 2 to process, 0 to skip" in result.output
+    assert "Pages to process: 24" in result.output
+    assert "set1: 2 to process (24 pages), 0 to skip" in result.output
+    assert "ETA:" in result.output
+    assert not target_dir.exists()
+
+
+def test_cli_process_plan_reads_the_discovery_index_without_creating_it(tmp_path):
+    from extractor.discovery import stat_source
+    from extractor.index import DiscoveryIndex
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "a.pdf").write_bytes(b"%PDF a")
+    (source_dir / "b.pdf").write_bytes(b"%PDF b")
+    target_dir = tmp_path / "target"
+    args = ["process", "--plan", "--incremental", "--source", str(source_dir), "--target", str(target_dir)]
+
+    with patch("extractor.scheduling.estimate_page_count", return_value=1):
+        result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    assert "Plan: 2 documents, 2 to process, 0 to skip" in result.output
+    assert not target_dir.exists()
+
+    with DiscoveryIndex.for_target(target_dir) as index:
+        index.record(stat_source(source_dir / "a.pdf"))
+    state = sorted(p.name for p in (target_dir / ".extractor").iterdir())
+    with patch("extractor.scheduling.estimate_page_count", return_value=1):
+        result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    assert "Plan: 1 documents, 1 to process, 0 to skip" in result.output
+    assert sorted(p.name for p in (target_dir / ".extractor").iterdir()) == state
+
+
+def test_cli_process_plan_checks_single_file_output_folder(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "a.pdf").write_bytes(b"%PDF a")
+    target_dir = tmp_path / "target"
+    (target_dir / "a").mkdir(parents=True)
+    (target_dir / "a" / "commit.json").write_text("{}")
+
+    with patch("extractor.cli._output_dir", wraps=cli_module._output_dir) as output_dir, patch(
+        "extractor.scheduling.estimate_page_count", return_value=3
+    ):
+        result = CliRunner().invoke(
+            cli, ["process", "--plan", "--source", str(source_dir / "a.pdf"), "--target", str(target_dir)]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Plan: 1 documents, 0 to process, 1 to skip" in result.output
+    assert output_dir.call_count == 1
+
+
+def test_cli_retry_reprocesses_queued_failures_with_escalation(tmp_path):
+    from extractor.retry import RetryQueue
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "a.pdf").write_bytes(b"%PDF a")
+    (source_dir / "b.pdf").write_bytes(b"%PDF b")
+    target_dir = tmp_path / "target"
+
+    def convert(path, **kwargs):
+        if path.name == "a.pdf":
+            raise RuntimeError("boom")
+        return MagicMock()
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_docling = MockEngine.return_value
+        mock_docling.save_images.return_value = []
+        mock_docling.convert.side_effect = convert
+        result = CliRunner().invoke(cli, ["process", "--source", str(source_dir), "--target", str(target_dir)])
+    assert "Errors encountered:       1" in result.output
+
+    with RetryQueue.for_target(target_dir) as queue:
+        [failure] = queue.failures()
+        assert (failure.source_path.name, failure.stage, failure.error_type) == ("a.pdf", "convert", "RuntimeError")
+        # Pretend the same-settings retry already failed too.
+        queue.record_failure(failure.source_path, source_dir, failure.target_folder, "convert", "RuntimeError", "boom", "same")
+
+    report = CliRunner().invoke(cli, ["retry", "--target", str(target_dir), "--report"])
+    assert "1  convert/RuntimeError: boom" in report.output
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        MockEngine.return_value.save_images.return_value = []
+        result = CliRunner().invoke(cli, ["retry", "--target", str(target_dir)])
+
+    assert result.exit_code == 0, result.output
+    assert "(no_ocr)" in result.output
+    assert MockEngine.call_args.args[0]["docling"]["do_ocr"] is False
+    assert [c.args[0].name for c in MockEngine.return_value.convert.call_args_list] == ["a.pdf"]
+    assert "Successfully processed:   1" in result.output
+    assert (target_dir / "a" / "commit.json").exists()
+    with RetryQueue.for_target(target_dir) as queue:
+        assert len(queue) == 0
+
+
+def test_cli_process_fresh_target_catalog_is_authoritative(tmp_path):
+    source_dir = tmp_path / "source"
+    (source_dir / "a" / "b").mkdir(parents=True)
+    (source_dir / "a" / "b" / "doc1.pdf").write_bytes(b"%PDF-1.4\n")
+    target_dir = tmp_path / "target"
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        MockEngine.return_value.save_images.return_value = []
+        result = CliRunner().invoke(
+            cli, ["process", "--source", str(source_dir), "--target", str(target_dir)]
+        )
+
+    assert result.exit_code == 0, result.output
+    with Catalog.for_target(target_dir) as catalog:
+        assert catalog.authoritative
+        assert catalog.folders() == [target_dir / "a" / "b" / "doc1"]
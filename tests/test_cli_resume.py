@@ -69,3 +69,28 @@ def test_process_command_force_reprocesses(MockScanner, MockDoclingEngine, tmp_p
     assert result.exit_code == 0
     # Should HAVE called convert
     mock_docling.convert.assert_called_once()
+
+@patch("extractor.cli.DoclingEngine")
+def test_process_command_incremental_skips_unchanged(MockDoclingEngine, tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "image1.png").write_bytes(b"png")
+    target_dir = tmp_path / "target"
+
+    runner = CliRunner()
+    args = ['process', '--source', str(source_dir), '--target', str(target_dir), '--incremental']
+
+    result1 = runner.invoke(cli, args)
+    assert result1.exit_code == 0
+    assert "Successfully processed:   1" in result1.output
+
+    (source_dir / "image2.png").write_bytes(b"png2")
+
+    with patch("extractor.scaffolding.Scaffolder.is_processed") as mock_is_processed:
+        mock_is_processed.return_value = False
+        result2 = runner.invoke(cli, args)
+
+    assert result2.exit_code == 0
+    # Only the new file reaches the skip checks / processing
+    assert mock_is_processed.call_count == 1
+    assert "Successfully processed:   1" in result2.output
@@ -19,3 +19,22 @@ def test_config_structure():
     assert "layout_model" in config["docling"]
     assert config["docling"]["ocr_model"] == "https://huggingface.co/zai-org/GLM-OCR"
     assert config["docling"]["layout_model"] == "https://huggingface.co/docling-project/docling-layout-heron-101"
+
+
+def test_config_lists_the_builtin_profiles():
+    from extractor.docling_engine import PROFILES
+
+    with open(CONFIG_PATH, "r") as f:
+        text = f.read()
+    config = yaml.safe_load(text)
+    assert config["docling"]["profile"] == "balanced"
+
+    # The commented docling.profiles block shows the presets as defined in code.
+    lines = text.splitlines()
+    start = lines.index("  # profiles:")
+    block = []
+    for line in lines[start:]:
+        if not line.startswith("  #"):
+            break
+        block.append(line[len("  # "):])
+    assert yaml.safe_load("\n".join(block))["profiles"] == PROFILES
@@ -48,3 +48,36 @@ def test_scanner_ignores_hidden_files(tmp_path):
     
     scanner = Scanner(source_dir)
     assert list(scanner.scan()) == []
+
+def test_scanner_prunes_hidden_directories(tmp_path):
+    source_dir = tmp_path / "source"
+    hidden_dir = source_dir / ".cache" / "nested"
+    hidden_dir.mkdir(parents=True)
+    (hidden_dir / "doc.pdf").touch()
+    (source_dir / "visible.pdf").touch()
+
+    scanner = Scanner(source_dir)
+    assert list(scanner.scan()) == [source_dir / "visible.pdf"]
+
+def test_scanner_entries_carry_size_and_mtime(tmp_path):
+    source_dir = tmp_path / "source"
+    nested_dir = source_dir / "a" / "b"
+    nested_dir.mkdir(parents=True)
+    pdf = nested_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+
+    scanner = Scanner(source_dir, max_workers=2)
+    entries = list(scanner.scan_entries())
+
+    assert len(entries) == 1
+    assert entries[0].path == pdf
+    assert entries[0].size == 9
+    assert entries[0].mtime_ns == pdf.stat().st_mtime_ns
+
+def test_scanner_single_file_source(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    pdf.touch()
+    (tmp_path / "notes.txt").touch()
+
+    assert list(Scanner(pdf).scan()) == [pdf]
+    assert list(Scanner(tmp_path / "notes.txt").scan()) == []
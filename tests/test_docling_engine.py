@@ -1,3 +1,4 @@
+import json
 import pytest
 from pathlib import Path
 from extractor.docling_engine import DoclingEngine
@@ -111,31 +112,6 @@ def test_docling_engine_save_images_returns_metadata(tmp_path):
     assert "page_1_img_1.png" in str(metadata[0]["filename"])
 
 
-def test_docling_engine_save_images_pdfimages_fallback(tmp_path):
-    engine = DoclingEngine()
-    mock_result = MagicMock()
-    output_dir = tmp_path
-
-    mock_result.document.pictures = []
-    mock_result.input = MagicMock(file=tmp_path / "test.pdf")
-    mock_result.input.file.write_bytes(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
-
-    def fake_run(cmd, check, stdout, stderr):
-        # simulate pdfimages output naming: <prefix>-001-000.png
-        prefix = Path(cmd[-1])
-        (prefix.parent / f"{prefix.name}-001-000.png").write_bytes(b"\x89PNG\r\n\x1a\n")
-
-    with patch("shutil.which", return_value="/usr/bin/pdfimages"), patch(
-        "subprocess.run", side_effect=fake_run
-    ):
-        meta = engine.save_images(mock_result, output_dir)
-
-    assert len(meta) == 1
-    assert meta[0]["page_no"] == 1
-    assert meta[0]["bbox"] is None
-    assert meta[0]["filename"] == "page_1_img_1.png"
-    assert (output_dir / "page_1_img_1.png").exists()
-
 def test_docling_engine_manifest(tmp_path):
     engine = DoclingEngine()
     mock_result = MagicMock()
@@ -191,3 +167,285 @@ def test_docling_engine_manifest_preserves_discovery_metadata(tmp_path):
     assert merged["file_size"] == discovery_manifest["file_size"]
     assert any(step.get("step") == "discovery" for step in merged.get("processing_history", []))
     assert any(step.get("step") == "extraction" for step in merged.get("processing_history", []))
+
+def test_docling_engine_convert_streams_archive_member(tmp_path):
+    import zipfile
+    from docling.datamodel.base_models import DocumentStream
+
+    archive = tmp_path / "release.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a/doc1.pdf", b"%PDF-1.4")
+
+    engine = DoclingEngine()
+    with patch.object(engine.converter, 'convert', return_value=MagicMock()) as mock_convert:
+        engine.convert(archive / "a" / "doc1.pdf")
+
+    stream = mock_convert.call_args[0][0]
+    assert isinstance(stream, DocumentStream)
+    assert stream.name == "doc1.pdf"
+    assert stream.stream.read() == b"%PDF-1.4"
+
+
+def test_page_windows():
+    from extractor.docling_engine import page_windows
+    assert page_windows(None) == []
+    assert page_windows(400) == []
+    assert page_windows(250, {"docling": {"split_pages": 200, "window_pages": 100}}) == [(1, 100), (101, 200), (201, 250)]
+    assert page_windows(5000, {"docling": {"split_pages": 0}}) == []
+
+
+def test_docling_engine_merge_windows_keeps_absolute_pages(tmp_path):
+    from docling_core.types.doc import DoclingDocument, DocItemLabel, Size
+
+    engine = DoclingEngine()
+    paths = []
+    for start, end in ((1, 2), (3, 4)):
+        doc = DoclingDocument(name="big")
+        for page_no in range(start, end + 1):
+            doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+            doc.add_text(label=DocItemLabel.TEXT, text=f"page {page_no}")
+        paths.append(tmp_path / f"{start}.json")
+        engine.save_window(MagicMock(document=doc), paths[-1])
+
+    merged = engine.merge_windows(Path("/data/big.pdf"), paths)
+    assert merged.pages == [1, 2, 3, 4]
+    assert merged.input.file == Path("/data/big.pdf")
+    assert merged.document.name == "big"
+    assert [t.text for t in merged.document.texts] == ["page 1", "page 2", "page 3", "page 4"]
+
+
+def test_docling_engine_windows_save_pictures_and_merge_without_payloads(tmp_path):
+    from docling_core.types.doc import BoundingBox, DoclingDocument, ImageRef, ProvenanceItem, Size
+    from PIL import Image
+
+    engine = DoclingEngine({"images": {}})
+    windows = tmp_path / ".windows"
+    paths = []
+    for start, end in ((1, 2), (3, 4)):
+        doc = DoclingDocument(name="big")
+        for page_no in range(start, end + 1):
+            doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+            prov = ProvenanceItem(page_no=page_no, bbox=BoundingBox(l=0, t=10, r=10, b=0), charspan=(0, 0))
+            doc.add_picture(image=ImageRef.from_pil(Image.new("RGB", (4, 4), "red"), dpi=72), prov=prov)
+        paths.append(windows / f"{start}-{end}.json")
+        engine.save_window(MagicMock(document=doc), paths[-1])
+        # The window's pictures are files; its document only references them.
+        assert "data:image" not in paths[-1].read_text()
+        assert sorted(p.name for p in (windows / f"{start}-{end}.images").glob("*.png")) == [
+            f"page_{start}_img_1.png", f"page_{end}_img_2.png"
+        ]
+
+    merged = engine.merge_windows(Path("/data/big.pdf"), paths)
+    assert [str(p.image.uri) for p in merged.document.pictures] == [
+        "images/page_1_img_1.png", "images/page_2_img_2.png", "images/page_3_img_3.png", "images/page_4_img_4.png"
+    ]
+
+    meta = engine.save_images(merged, tmp_path / "doc" / "images")
+    assert [m["filename"] for m in meta] == ["page_1_img_1.png", "page_2_img_2.png", "page_3_img_3.png", "page_4_img_4.png"]
+    assert [m["page_no"] for m in meta] == [1, 2, 3, 4]
+    assert all(Path(m["path"]).exists() for m in meta)
+    assert not list(windows.glob("*.images/*.png"))
+
+
+def test_docling_engine_windows_number_pictures_like_a_whole_document(tmp_path):
+    from docling_core.types.doc import BoundingBox, DoclingDocument, ImageRef, ProvenanceItem, Size
+    from PIL import Image
+
+    def window(start, end, with_image):
+        doc = DoclingDocument(name="big")
+        for page_no in range(start, end + 1):
+            doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+            prov = ProvenanceItem(page_no=page_no, bbox=BoundingBox(l=0, t=10, r=10, b=0), charspan=(0, 0))
+            image = ImageRef.from_pil(Image.new("RGB", (4, 4), "red"), dpi=72) if with_image(page_no) else None
+            doc.add_picture(image=image, prov=prov)
+        return doc
+
+    engine = DoclingEngine({"images": {}})
+    has_image = lambda page_no: page_no != 2  # page 2's picture has no image
+    paths = []
+    for start, end in ((1, 2), (3, 4)):
+        paths.append(tmp_path / ".windows" / f"{start}-{end}.json")
+        engine.save_window(MagicMock(document=window(start, end, has_image)), paths[-1])
+    merged = engine.merge_windows(Path("/data/big.pdf"), paths, [(1, 2), (3, 4)])
+    windowed = engine.save_images(merged, tmp_path / "windowed" / "images")
+
+    whole = MagicMock(document=DoclingDocument.concatenate([window(1, 2, has_image), window(3, 4, has_image)]))
+    expected = engine.save_images(whole, tmp_path / "whole" / "images")
+
+    assert [m["filename"] for m in windowed] == [m["filename"] for m in expected] == [
+        "page_1_img_1.png", "page_3_img_3.png", "page_4_img_4.png"
+    ]
+    # Both reference the image files from their JSON rather than embedding them.
+    for result, folder in ((merged, "windowed"), (whole, "whole")):
+        engine.save_json(result, tmp_path / folder / "big.json")
+        text = (tmp_path / folder / "big.json").read_text()
+        assert "data:image" not in text and "images/page_3_img_3.png" in text
+
+
+def test_docling_engine_windows_missing_pages_keep_page_numbers(tmp_path):
+    from docling_core.types.doc import DoclingDocument, DocItemLabel, ProvenanceItem, BoundingBox, Size
+
+    engine = DoclingEngine()
+    paths = []
+    # Page 3, the first of the second window, failed to convert.
+    for (start, end), pages in (((1, 2), (1, 2)), ((3, 5), (4, 5))):
+        doc = DoclingDocument(name="big")
+        for page_no in pages:
+            doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+            prov = ProvenanceItem(page_no=page_no, bbox=BoundingBox(l=0, t=10, r=10, b=0), charspan=(0, 0))
+            doc.add_text(label=DocItemLabel.TEXT, text=f"page {page_no}", prov=prov)
+        paths.append(tmp_path / f"{start}.json")
+        engine.save_window(MagicMock(document=doc), paths[-1])
+
+    merged = engine.merge_windows(Path("/data/big.pdf"), paths, [(1, 2), (3, 5)])
+    assert merged.pages == [1, 2, 4, 5]
+    assert [(t.text, t.prov[0].page_no) for t in merged.document.texts] == [
+        ("page 1", 1), ("page 2", 2), ("page 4", 4), ("page 5", 5)
+    ]
+
+
+def test_docling_engine_converts_page_runs_with_only_the_models_they_need(tmp_path):
+    from types import SimpleNamespace
+    from docling_core.types.doc import DoclingDocument, DocItemLabel, Size
+    from extractor.page_analysis import PageProfile
+
+    def profile(page, ocr, tables):
+        return PageProfile(page, 0 if ocr else 500, 0.1, 1.0 if ocr else 0.0, 0, 0, ocr, tables)
+
+    profiles = [profile(1, False, False), profile(2, False, False), profile(3, True, True), profile(4, False, True)]
+    calls = []
+
+    class Converter:
+        def __init__(self, mode):
+            self.mode = mode
+
+        def convert(self, source, page_range):
+            calls.append((self.mode, page_range))
+            doc = DoclingDocument(name="mixed")
+            for page_no in range(page_range[0], page_range[1] + 1):
+                doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+                doc.add_text(label=DocItemLabel.TEXT, text=f"page {page_no}")
+            return SimpleNamespace(document=doc, input=SimpleNamespace(file=source))
+
+    engine = DoclingEngine({"docling": {"page_analysis": {"min_run_pages": 1}}})
+    pdf = tmp_path / "mixed.pdf"
+    with patch("extractor.docling_engine.analyse_pages", return_value=profiles), \
+            patch.object(engine, "converter_for", side_effect=lambda ocr, tables: Converter((ocr, tables))):
+        result = engine.convert(pdf)
+
+    assert calls == [((False, False), (1, 2)), ((True, True), (3, 3)), ((False, True), (4, 4))]
+    assert result.pages == [1, 2, 3, 4]
+    assert [t.text for t in result.document.texts] == ["page 1", "page 2", "page 3", "page 4"]
+
+    engine.generate_manifest(result, tmp_path / "manifest.json", [])
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [(p["page"], p["ocr"], p["tables"]) for p in manifest["page_analysis"]] == [
+        (1, False, False), (2, False, False), (3, True, True), (4, False, True)
+    ]
+
+    # Page windows carry their profiles through save_window/merge_windows.
+    engine.save_window(result, tmp_path / "windows" / "1-4.json")
+    merged = engine.merge_windows(pdf, [tmp_path / "windows" / "1-4.json"])
+    assert merged.page_analysis == profiles
+
+
+def test_docling_engine_page_runs_in_a_window_keep_absolute_pages(tmp_path):
+    from types import SimpleNamespace
+    from docling_core.types.doc import DoclingDocument, Size
+    from extractor.page_analysis import PageProfile
+
+    def profile(page, ocr):
+        return PageProfile(page, 0 if ocr else 500, 0.1, 1.0 if ocr else 0.0, 0, 0, ocr, False)
+
+    class Converter:
+        def convert(self, source, page_range):
+            doc = DoclingDocument(name="big")
+            for page_no in range(page_range[0], page_range[1] + 1):
+                if page_no != 103:  # fails to convert
+                    doc.add_page(page_no=page_no, size=Size(width=612, height=792))
+            return SimpleNamespace(document=doc, input=SimpleNamespace(file=source))
+
+    engine = DoclingEngine({"docling": {"page_analysis": {"min_run_pages": 1}}})
+    profiles = [profile(101, False), profile(102, False), profile(103, True), profile(104, True)]
+    with patch("extractor.docling_engine.analyse_pages", return_value=profiles), \
+            patch.object(engine, "converter_for", return_value=Converter()):
+        result = engine.convert(tmp_path / "big.pdf", page_range=(101, 104))
+
+    assert result.pages == [101, 102, 104]
+
+
+def test_docling_engine_converter_for_builds_one_converter_per_model_set():
+    from docling.datamodel.base_models import InputFormat
+
+    engine = DoclingEngine({"docling": {"do_ocr": False}})
+    # OCR stays off as configured, so that is the configured converter.
+    assert engine.converter_for(True, True) is engine.converter
+    no_tables = engine.converter_for(True, False)
+    assert no_tables is not engine.converter and engine.converter_for(False, False) is no_tables
+    options = no_tables.format_to_options[InputFormat.PDF].pipeline_options
+    assert not options.do_ocr and not options.do_table_structure
+    assert engine.pipeline_options.do_table_structure
+
+
+def test_docling_engine_converts_a_single_page_run_in_one_pass(tmp_path):
+    from extractor.page_analysis import PageProfile
+
+    profiles = [PageProfile(page, 500, 0.1, 0.0, 0, 0, False, True) for page in range(1, 4)]
+    engine = DoclingEngine()
+    converter = MagicMock()
+    with patch("extractor.docling_engine.analyse_pages", return_value=profiles), \
+            patch.object(engine, "converter_for", return_value=converter) as converter_for:
+        result = engine.convert(tmp_path / "doc.pdf")
+
+    converter_for.assert_called_once_with(False, True)
+    converter.convert.assert_called_once_with(tmp_path / "doc.pdf")
+    assert result is converter.convert.return_value
+
+    # With OCR and tables both off there is nothing to profile pages for.
+    assert not DoclingEngine({"docling": {"do_ocr": False, "do_table_structure": False}}).adaptive_pages
+
+
+def test_apply_profile_overlays_settings_and_config_profiles():
+    from extractor.docling_engine import apply_profile
+
+    config = {
+        "docling": {
+            "layout_model": "https://huggingface.co/docling-project/docling-layout-heron-101",
+            "num_threads": 8,
+            "profiles": {"fast": {"num_threads": 2}, "scans": {"do_ocr": True, "adaptive_pages": False}},
+        }
+    }
+    fast = apply_profile(config, "fast")["docling"]
+    assert fast["profile"] == "fast" and fast["do_ocr"] is False and fast["table_mode"] == "fast"
+    assert fast["num_threads"] == 2 and "profiles" not in fast
+    assert fast["layout_model"].endswith("docling-layout-heron")
+
+    balanced = apply_profile(config)["docling"]
+    assert balanced["profile"] == "balanced" and balanced["num_threads"] == 8
+    assert balanced["layout_model"].endswith("docling-layout-heron-101")
+    assert apply_profile(config, "scans")["docling"]["adaptive_pages"] is False
+    assert apply_profile({"docling": {"profile": "accurate"}})["docling"]["images_scale"] == 2.0
+    # The caller's configuration is left alone.
+    assert "profile" not in config["docling"] and "profiles" in config["docling"]
+
+    with pytest.raises(ValueError, match="Unknown extraction profile 'bogus'"):
+        apply_profile(config, "bogus")
+
+
+def test_docling_engine_applies_profile_settings_and_stamps_manifest(tmp_path):
+    from docling.datamodel.pipeline_options import TableFormerMode
+    from extractor.docling_engine import DOCLING_LAYOUT_HERON, apply_profile
+
+    engine = DoclingEngine(apply_profile({"docling": {}}, "fast"))
+    options = engine.pipeline_options
+    assert options.do_ocr is False
+    assert options.table_structure_options.mode == TableFormerMode.FAST
+    assert options.generate_picture_images is False
+    assert options.layout_options.model_spec == DOCLING_LAYOUT_HERON
+
+    mock_result = MagicMock()
+    mock_result.pages = [1, 2]
+    engine.generate_manifest(mock_result, tmp_path / "manifest.json", [])
+    models = json.loads((tmp_path / "manifest.json").read_text())["models"]
+    assert models["profile"] == "fast"
+    assert models["settings"]["table_mode"] == "fast" and models["settings"]["do_ocr"] is False
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from extractor.document_io import (
+    check_json_format,
+    document_path,
+    find_document,
+    iter_document,
+    iter_items,
+    load_document,
+    write_document,
+)
+
+
+def _document():
+    return {
+        "schema_name": "DoclingDocument",
+        "name": "doc1",
+        "pictures": [{"image": {"uri": "data:image/png;base64," + "QUJD" * 5000}, "caption": "a \"quoted\" [x] {y} \\"}],
+        "texts": [{"text": f"line {i} é \\ \" ] }}", "page": i, "score": i / 3} for i in range(200)],
+        "tables": [],
+        "pages": {"1": {"size": {"width": 612.0, "height": 792.0}}},
+        "version": 1.5,
+    }
+
+
+@pytest.mark.parametrize("json_format", ["pretty", "json", "gzip"])
+def test_write_and_read_back(tmp_path, json_format):
+    data = _document()
+    path = document_path(tmp_path / "doc1.json", json_format)
+    write_document(data, path, json_format)
+
+    assert find_document(tmp_path, "doc1") == path
+    assert load_document(path) == data
+    assert dict(iter_document(path)) == data
+    # Small chunks put value and escape boundaries everywhere.
+    assert list(iter_items(path, "texts", chunk_size=7)) == data["texts"]
+    assert list(iter_items(path, "tables", chunk_size=7)) == []
+    assert dict(iter_document(path, keys=["name", "version"], chunk_size=5)) == {"name": "doc1", "version": 1.5}
+
+
+def test_compact_json_is_smaller_than_pretty(tmp_path):
+    data = _document()
+    write_document(data, tmp_path / "pretty.json", "pretty")
+    write_document(data, tmp_path / "compact.json", "json")
+    write_document(data, tmp_path / "doc.json.gz", "gzip")
+    assert json.loads((tmp_path / "compact.json").read_text()) == data
+    sizes = [(tmp_path / name).stat().st_size for name in ("pretty.json", "compact.json", "doc.json.gz")]
+    assert sizes == sorted(sizes, reverse=True)
+
+
+@pytest.mark.parametrize("json_format,module", [("zstd", "zstandard"), ("msgpack", "msgpack")])
+def test_optional_formats(tmp_path, json_format, module):
+    pytest.importorskip(module)
+    data = _document()
+    path = document_path(tmp_path / "doc1.json", json_format)
+    write_document(data, path, json_format)
+    assert load_document(path) == data
+    assert list(iter_items(path, "texts")) == data["texts"]
+    assert dict(iter_document(path, keys=["name"])) == {"name": "doc1"}
+
+
+def test_document_paths_and_formats(tmp_path):
+    assert document_path(tmp_path / "a.b.json", "gzip") == tmp_path / "a.b.json.gz"
+    assert document_path(tmp_path / "a.json.gz", "msgpack") == tmp_path / "a.msgpack"
+    assert find_document(tmp_path, "a") is None
+    with pytest.raises(ValueError, match="Unknown JSON format 'xml'"):
+        check_json_format("xml")
+
+
+def test_truncated_document_raises(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(_document())[:-40])
+    with pytest.raises(ValueError):
+        list(iter_document(path, chunk_size=64))
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+from unittest.mock import patch
+
+from extractor.duplicates import DuplicateDetector, head_tail_hash, link_or_copy
+from extractor.scaffolding import Scaffolder
+
+
+def test_find_twin_matches_identical_content(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "sub" / "b.pdf"
+    b.parent.mkdir()
+    a.write_bytes(b"%PDF-1.4\n" + b"x" * 200_000)
+    b.write_bytes(a.read_bytes())
+
+    detector = DuplicateDetector(tmp_path / "dup.sqlite")
+    assert detector.find_twin(b) is None
+
+    detector.register(a, tmp_path / "target" / "a")
+    twin = detector.find_twin(b)
+    detector.close()
+
+    assert twin is not None
+    assert twin.source_path == a.absolute()
+    assert twin.target_folder == tmp_path / "target" / "a"
+
+
+def test_find_twin_rejects_same_size_different_content(tmp_path):
+    a = tmp_path / "a.pdf"
+    head_diff = tmp_path / "head.pdf"
+    middle_diff = tmp_path / "middle.pdf"
+    body = bytearray(b"y" * 300_000)
+    a.write_bytes(bytes(body))
+    head_diff.write_bytes(b"z" + bytes(body[1:]))
+    body[150_000] = ord("z")
+    middle_diff.write_bytes(bytes(body))
+
+    assert head_tail_hash(a, 300_000) != head_tail_hash(head_diff, 300_000)
+    assert head_tail_hash(a, 300_000) == head_tail_hash(middle_diff, 300_000)
+
+    detector = DuplicateDetector(tmp_path / "dup.sqlite")
+    detector.register(a, tmp_path / "target" / "a")
+    assert detector.find_twin(head_diff) is None
+    assert detector.find_twin(middle_diff) is None
+    detector.close()
+
+
+def test_find_twin_with_known_sha256_skips_reading_the_file(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "b.pdf"
+    a.write_bytes(b"%PDF-1.4 same")
+    b.write_bytes(b"%PDF-1.4 same")
+    detector = DuplicateDetector(tmp_path / "dup.sqlite")
+    detector.register(a, tmp_path / "target" / "a")
+    sha256 = hashlib.sha256(b"%PDF-1.4 same").hexdigest()
+
+    with patch("extractor.duplicates.head_tail_hash") as head_tail, patch("extractor.duplicates.full_hash") as full:
+        twin = detector.find_twin(b, sha256=sha256)
+        assert detector.find_twin(a, sha256=sha256) is None  # a file is not its own twin
+        assert detector.find_twin(b, sha256="0" * 64) is None
+    detector.close()
+
+    head_tail.assert_not_called()
+    full.assert_not_called()
+    assert twin.source_path == a.absolute() and twin.sha256 == sha256
+
+
+def test_head_tail_cache_is_bounded_and_notices_rewrites(tmp_path):
+    detector = DuplicateDetector(tmp_path / "dup.sqlite")
+    detector.HEAD_TAIL_CACHE_SIZE = 2
+    paths = [tmp_path / f"{i}.pdf" for i in range(3)]
+    for path in paths:
+        path.write_bytes(b"%PDF " + path.name.encode())
+        detector._head_tail(path, path.stat().st_size)
+    assert [key[0] for key in detector._head_tail_cache] == paths[1:]
+
+    first = paths[1]
+    before = detector._head_tail(first, first.stat().st_size)
+    first.write_bytes(b"%PDF X.pdf")
+    os.utime(first, ns=(1, 1))
+    assert detector._head_tail(first, first.stat().st_size) == head_tail_hash(first, first.stat().st_size) != before
+    detector.close()
+
+
+def test_register_persists_across_instances(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "b.pdf"
+    a.write_bytes(b"same bytes")
+    b.write_bytes(b"same bytes")
+
+    DuplicateDetector.for_target(tmp_path / "target").register(a, tmp_path / "target" / "a")
+
+    detector = DuplicateDetector.for_target(tmp_path / "target")
+    assert detector.find_twin(b).source_path == a.absolute()
+    detector.close()
+
+
+def test_link_or_copy_hardlinks(tmp_path):
+    src = tmp_path / "src.md"
+    src.write_text("hello")
+    dst = tmp_path / "dst.md"
+    dst.write_text("stale")
+
+    link_or_copy(src, dst)
+
+    assert dst.read_text() == "hello"
+    assert dst.stat().st_ino == src.stat().st_ino
+
+
+def test_materialise_duplicate(tmp_path):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    source.mkdir()
+    canonical = source / "a.pdf"
+    duplicate = source / "b.pdf"
+    canonical.write_bytes(b"%PDF-1.4 same")
+    duplicate.write_bytes(b"%PDF-1.4 same")
+
+    scaffolder = Scaffolder(source, target)
+    twin_dir = scaffolder.create_scaffold(canonical)
+    (twin_dir / "a.md").write_text("# a")
+    (twin_dir / "a.json").write_text("{}")
+    (twin_dir / "images").mkdir()
+    (twin_dir / "images" / "page_1_img_1.png").write_bytes(b"png")
+    (twin_dir / "images" / "image_metadata.json").write_text("[]")
+    (twin_dir / "manifest.json").write_text(
+        json.dumps(
+            {
+                "document_id": "a",
+                "page_count": 3,
+                "images": [{"filename": "page_1_img_1.png", "page_no": 1, "path": "old"}],
+            }
+        )
+    )
+
+    detector = DuplicateDetector.for_target(target)
+    detector.register(canonical, twin_dir)
+    twin = detector.find_twin(duplicate)
+    detector.close()
+
+    out_dir = scaffolder.create_scaffold(duplicate)
+    scaffolder.write_manifest(duplicate, out_dir)
+    scaffolder.materialise_duplicate(twin, duplicate, out_dir)
+
+    assert (out_dir / "b.md").read_text() == "# a"
+    assert (out_dir / "images" / "page_1_img_1.png").exists()
+    manifest = json.loads((out_dir / "manifest.json").read_text())
+    assert manifest["document_id"] == "b"
+    assert manifest["page_count"] == 3
+    assert manifest["duplicate_of"]["document_id"] == "a"
+    assert manifest["images"][0]["path"] == str(out_dir / "images" / "page_1_img_1.png")
+    assert scaffolder.is_extraction_complete(out_dir, "b") is True
@@ -3,6 +3,9 @@ import subprocess
 import sys
 from pathlib import Path
 
+from extractor.catalog import Catalog
+from extractor.utils import in_shard
+
 
 def test_export_followthemoney_ndjson(tmp_path):
     target = tmp_path / "target"
@@ -64,3 +67,53 @@ def test_export_followthemoney_ndjson(tmp_path):
 
     assert "proof" in img.get("properties", {})
     assert doc["id"] in img["properties"]["proof"]
+
+    with Catalog.for_target(target) as catalog:
+        assert catalog.summary()["exported"] == 1
+
+
+def test_export_followthemoney_shards_are_disjoint(tmp_path):
+    target = tmp_path / "target"
+    for i in range(6):
+        doc_dir = target / f"doc{i}"
+        doc_dir.mkdir(parents=True)
+        manifest = {"document_id": f"doc{i}", "hash": f"h{i}"}
+        (doc_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    script_path = (
+        Path(__file__).resolve().parent.parent / "scripts" / "export_followthemoney.py"
+    )
+
+    ids = []
+    for shard in ("1/2", "2/2"):
+        subprocess.run(
+            [sys.executable, str(script_path), "--target", str(target), "--shard", shard],
+            check=True,
+        )
+        out_path = target / f"followthemoney.{shard.replace('/', '-of-')}.ndjson"
+        ids.append({json.loads(line)["id"] for line in out_path.read_text().splitlines()})
+
+    assert ids[0].isdisjoint(ids[1])
+    assert ids[0] | ids[1] == {f"doc-h{i}" for i in range(6)}
+
+
+def test_export_followthemoney_shards_like_process(tmp_path):
+    target = tmp_path / "target"
+    for i in range(8):
+        doc_dir = target / "a" / "b" / f"doc{i}"
+        doc_dir.mkdir(parents=True)
+        manifest = {"document_id": f"doc{i}", "hash": f"h{i}", "source_path": f"/nas/a/b/doc{i}.pdf"}
+        (doc_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    script_path = (
+        Path(__file__).resolve().parent.parent / "scripts" / "export_followthemoney.py"
+    )
+    subprocess.run(
+        [sys.executable, str(script_path), "--target", str(target), "--shard", "1/2"],
+        check=True,
+    )
+
+    # process --shard keys on the path relative to --source: a/b/docN.pdf
+    out_path = target / "followthemoney.1-of-2.ndjson"
+    ids = {json.loads(line)["id"] for line in out_path.read_text().splitlines()}
+    assert ids == {f"doc-h{i}" for i in range(8) if in_shard(f"a/b/doc{i}.pdf", (1, 2))}
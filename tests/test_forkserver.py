@@ -0,0 +1,61 @@
+import os
+import signal
+
+import pytest
+
+from extractor.forkserver import ForkServer
+
+
+class Model:
+    loads = 0
+
+    def __init__(self, config):
+        self.config = config
+        self.warm = False
+
+    def warm_up(self):
+        Model.loads += 1
+        self.warm = True
+        self.pid = os.getpid()
+
+
+def build_model(config):
+    return Model(config)
+
+
+def broken_factory(config):
+    raise ValueError("no weights")
+
+
+def report(conn, model, code):
+    conn.send((model.warm, model.loads, model.pid, os.getpid(), model.config))
+    if conn.recv() == "exit":
+        os._exit(code)
+
+
+def test_forks_share_the_warmed_engine():
+    with ForkServer(build_model, {"name": "m"}) as server:
+        seen = []
+        for code in (0, 7):
+            conn, process = server.fork(report, (code,))
+            seen.append(conn.recv())
+            conn.send("exit")
+            process.join(10)
+            assert process.exitcode == code
+            assert not process.is_alive()
+            conn.close()
+
+        conn, process = server.fork(report, (0,))
+        conn.recv()
+        process.kill()
+        process.join(10)
+        assert process.exitcode == -signal.SIGKILL
+
+    (warm, loads, engine_pid, pid_a, config), (_, _, _, pid_b, _) = seen
+    assert warm and loads == 1 and config == {"name": "m"}
+    assert len({engine_pid, pid_a, pid_b}) == 3
+
+
+def test_engine_errors_are_raised_at_start():
+    with pytest.raises(RuntimeError, match="ValueError: no weights"):
+        ForkServer(broken_factory)
@@ -0,0 +1,52 @@
+import hashlib
+import os
+from unittest.mock import patch
+
+from extractor.hashing import HashService, hash_file
+
+
+def test_hash_file_single_pass_digests(tmp_path):
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    path = tmp_path / "big.bin"
+    path.write_bytes(content)
+
+    digests = hash_file(path, buffer_size=1024 * 1024)
+
+    assert digests.sha1 == hashlib.sha1(content).hexdigest()
+    assert digests.sha256 == hashlib.sha256(content).hexdigest()
+    assert digests.size == len(content)
+
+
+def test_hash_service_reuses_cache_until_file_changes(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"version one")
+    cache = tmp_path / "hashes.sqlite"
+
+    first = HashService(cache).digests(path)
+
+    with patch("extractor.hashing.hash_file") as mock_hash:
+        service = HashService(cache)
+        assert service.digests(path) == first
+        mock_hash.assert_not_called()
+        service.close()
+
+    path.write_bytes(b"version two, longer")
+    changed = HashService(cache).digests(path)
+    assert changed.sha256 == hashlib.sha256(b"version two, longer").hexdigest()
+
+
+def test_hash_service_digests_many_skips_missing(tmp_path):
+    paths = []
+    for i in range(5):
+        p = tmp_path / f"img{i}.png"
+        p.write_bytes(bytes([i]) * 100)
+        paths.append(p)
+    missing = tmp_path / "missing.png"
+
+    service = HashService.for_target(tmp_path / "target", max_workers=3)
+    result = service.digests_many(paths + [missing])
+    service.close()
+
+    assert set(result) == set(paths)
+    assert result[paths[2]].sha256 == hashlib.sha256(bytes([2]) * 100).hexdigest()
+    assert (tmp_path / "target" / ".extractor" / "hashes.sqlite").exists()
@@ -0,0 +1,76 @@
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image
+
+from extractor.docling_engine import DoclingEngine
+from extractor.image_store import ImageEncoder, ImageStore, pixel_hash
+
+
+def _picture(image, page_no):
+    picture = MagicMock()
+    picture.image = MagicMock(pil_image=image)
+    prov = MagicMock(page_no=page_no)
+    prov.bbox.as_tuple.return_value = (0, 0, 10, 10)
+    picture.prov = [prov]
+    return picture
+
+
+def test_image_store_keeps_one_copy_per_pixel_content(tmp_path):
+    store = ImageStore(tmp_path / "store")
+    encoder = ImageEncoder()
+    red = Image.new("RGB", (8, 8), "red")
+
+    key, path = store.put(red, encoder)
+    again, same = store.put(red.copy(), encoder)
+    other, _ = store.put(Image.new("RGB", (8, 8), "blue"), encoder)
+
+    assert key == again == pixel_hash(red)
+    assert same == path == tmp_path / "store" / key[:2] / f"{key}.png"
+    assert other != key
+    assert len(list((tmp_path / "store").glob("*/*"))) == 2
+    assert not list((tmp_path / "store").glob("*/.*.tmp"))
+
+
+def test_image_store_keeps_encoded_bytes_by_their_hash(tmp_path):
+    store = ImageStore(tmp_path / "store")
+
+    key, path = store.put_bytes(b"\xff\xd8jpeg", ".jpg")
+    again, same = store.put_bytes(b"\xff\xd8jpeg", ".jpg")
+
+    assert key == again == hashlib.sha256(b"\xff\xd8jpeg").hexdigest()
+    assert path == same == tmp_path / "store" / key[:2] / f"{key}.jpg"
+    assert path.read_bytes() == b"\xff\xd8jpeg"
+
+
+def test_image_encoder_from_config():
+    encoder = ImageEncoder.from_config({"format": "WebP", "webp_lossless": False, "webp_quality": 75})
+    assert encoder.suffix == ".webp"
+    assert not encoder.webp_lossless and encoder.webp_quality == 75
+    with pytest.raises(ValueError):
+        ImageEncoder.from_config({"format": "gif"})
+
+
+def test_docling_engine_save_images_links_into_store(tmp_path):
+    engine = DoclingEngine({"images": {"format": "webp", "store_dir": str(tmp_path / "store"), "encode_threads": 2}})
+    logo = Image.new("RGB", (16, 16), "green")
+    docs = []
+    for name in ("doc1", "doc2"):
+        result = MagicMock()
+        result.document.pictures = [_picture(logo.copy(), 1), _picture(Image.new("L", (4, 4), 128), 2)]
+        docs.append(engine.save_images(result, tmp_path / name / "images"))
+
+    for meta in docs:
+        assert [m["filename"] for m in meta] == ["page_1_img_1.webp", "page_2_img_2.webp"]
+        assert meta[0]["content_hash"] == pixel_hash(logo)
+        assert meta[0]["bbox"] == (0, 0, 10, 10)
+
+    # Both documents' copies of the logo are links to one stored file.
+    stored = engine.image_store.path_for(pixel_hash(logo), ".webp")
+    first = tmp_path / "doc1" / "images" / "page_1_img_1.webp"
+    assert first.stat().st_ino == stored.stat().st_ino
+    assert stored.stat().st_nlink == 3
+    assert len(list((tmp_path / "store").glob("*/*.webp"))) == 2
+    with Image.open(first) as image:
+        assert image.format == "WEBP" and image.size == (16, 16)
@@ -0,0 +1,44 @@
+import os
+
+from extractor.discovery import Scanner
+from extractor.index import DiscoveryIndex
+
+
+def test_index_records_and_detects_unchanged(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "doc1.pdf").write_bytes(b"one")
+
+    with DiscoveryIndex.for_target(tmp_path / "target") as index:
+        entries = list(Scanner(source_dir).scan_entries())
+        assert len(entries) == 1
+        assert index.is_unchanged(entries[0]) is False
+
+        index.record(entries[0], "abc")
+        assert index.is_unchanged(entries[0]) is True
+        assert index.lookup(entries[0].path)["hash"] == "abc"
+
+    assert (tmp_path / "target" / ".extractor" / "discovery.sqlite").exists()
+
+
+def test_scanner_incremental_yields_only_new_or_changed(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    old = source_dir / "old.pdf"
+    changed = source_dir / "changed.pdf"
+    old.write_bytes(b"old")
+    changed.write_bytes(b"changed")
+
+    index = DiscoveryIndex(tmp_path / "index.sqlite")
+    for entry in Scanner(source_dir).scan_entries():
+        index.record(entry)
+
+    new = source_dir / "new.pdf"
+    new.write_bytes(b"new")
+    st = changed.stat()
+    os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    found = set(Scanner(source_dir, index=index).scan())
+    index.close()
+
+    assert found == {new, changed}
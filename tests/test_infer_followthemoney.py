@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 
 import extractor.inference as inf
+from extractor.utils import in_shard
 
 
 class DummyClient:
@@ -90,3 +91,35 @@ def test_infer_stream_from_image_description(tmp_path, monkeypatch):
 
     assert any(pid in (event["properties"].get("involved") or []) for pid in people)
     assert any(aid in (event["properties"].get("addressEntity") or []) for aid in addrs)
+
+
+def test_iter_factual_evidence_shards_images_with_their_document(tmp_path):
+    factual = tmp_path / "followthemoney.ndjson"
+    rows = []
+    for i in range(10):
+        doc_id = f"doc-{i}"
+        rows.append({"id": doc_id, "schema": "Document", "properties": {"bodyText": [f"body {i}"]}})
+        rows.append(
+            {
+                "id": f"img-{i}",
+                "schema": "Image",
+                "properties": {"description": [f"image {i}"], "proof": [doc_id]},
+            }
+        )
+    factual.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+
+    seen = []
+    for shard in ((1, 3), (2, 3), (3, 3)):
+        ids = {e.proof_id for e in inf.iter_factual_evidence(factual, shard=shard)}
+        for i in range(10):
+            assert (f"doc-{i}" in ids) == (f"img-{i}" in ids)
+        seen.append(ids)
+
+    assert sum(len(s) for s in seen) == 20
+    assert set().union(*seen) == {r["id"] for r in rows}
+
+    # With the catalog's keys, documents follow their source path like process.
+    keys = {f"doc-{i}": f"a/doc{i}.pdf" for i in range(10)}
+    ids = {e.proof_id for e in inf.iter_factual_evidence(factual, shard=(1, 3), shard_keys=keys)}
+    expected = {i for i in range(10) if in_shard(f"a/doc{i}.pdf", (1, 3))}
+    assert ids == {f"doc-{i}" for i in expected} | {f"img-{i}" for i in expected}
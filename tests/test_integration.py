@@ -88,16 +88,58 @@ def test_full_pipeline_extraction(tmp_path):
         mock_instance.convert.assert_called_with(pdf_path)
         
         output_dir = target_root / "test"
+        # Outputs are written to a staging folder and committed into output_dir
+        staging_dir = target_root / ".test.staging"
         
         # Check save_markdown call
         mock_instance.save_markdown.assert_called()
         args, _ = mock_instance.save_markdown.call_args
-        assert args[1] == output_dir / "test.md"
+        assert args[1] == staging_dir / "test.md"
         
         # Check save_json call
         mock_instance.save_json.assert_called()
         args, _ = mock_instance.save_json.call_args
-        assert args[1] == output_dir / "test.json"
+        assert args[1] == staging_dir / "test.json"
         
         # Check manifest call
-        mock_instance.generate_manifest.assert_called()
\ No newline at end of file
+        mock_instance.generate_manifest.assert_called()
+
+        assert (output_dir / "commit.json").exists()
+        assert (output_dir / "manifest.json").exists()
+        assert not staging_dir.exists()
+def test_full_pipeline_links_duplicate_pdfs(tmp_path):
+    source_root = tmp_path / "source"
+    target_root = tmp_path / "target"
+    (source_root / "a").mkdir(parents=True)
+    (source_root / "b").mkdir(parents=True)
+    (source_root / "a" / "doc1.pdf").write_bytes(b"%PDF-1.4 identical")
+    (source_root / "b" / "copy.pdf").write_bytes(b"%PDF-1.4 identical")
+
+    def save_text(result, output_path):
+        output_path.write_text("out")
+
+    def generate_manifest(result, output_path, image_metadata):
+        data = json.loads(output_path.read_text())
+        data["images"] = image_metadata
+        output_path.write_text(json.dumps(data))
+
+    with patch("extractor.cli.DoclingEngine") as MockEngine:
+        mock_instance = MockEngine.return_value
+        mock_instance.save_markdown.side_effect = save_text
+        mock_instance.save_json.side_effect = save_text
+        mock_instance.save_images.return_value = []
+        mock_instance.generate_manifest.side_effect = generate_manifest
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["process", "--source", str(source_root), "--target", str(target_root)]
+        )
+
+    assert result.exit_code == 0
+    assert mock_instance.convert.call_count == 1
+    assert "Duplicates linked:        1" in result.output
+
+    folders = [target_root / "a" / "doc1", target_root / "b" / "copy"]
+    manifests = [json.loads((f / "manifest.json").read_text()) for f in folders]
+    assert sum("duplicate_of" in m for m in manifests) == 1
+    assert (folders[1] / "copy.md").exists()
@@ -0,0 +1,78 @@
+import os
+import time
+from unittest.mock import patch
+
+from extractor.leases import LeaseManager
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    folder = tmp_path / "a" / "doc"
+    with LeaseManager.for_target(tmp_path, owner="node1") as one, LeaseManager.for_target(tmp_path, owner="node2") as two:
+        assert one.acquire(folder)
+        assert one.acquire(folder)  # re-entrant for the holder
+        assert not two.acquire(folder)
+        assert one.holds(folder) and not two.holds(folder)
+
+        one.release(folder)
+        assert not one.holds(folder)
+        assert two.acquire(folder)
+
+
+def test_expired_lease_is_reclaimed_once(tmp_path):
+    folder = tmp_path / "doc"
+    dead = LeaseManager.for_target(tmp_path, owner="dead", ttl=60)
+    assert dead.acquire(folder)
+    lease_path = dead._lease_path(folder)
+    stale = time.time() - 120
+    os.utime(lease_path, (stale, stale))
+
+    alive = LeaseManager.for_target(tmp_path, owner="alive", ttl=60)
+    late = LeaseManager.for_target(tmp_path, owner="late", ttl=60)
+    assert alive.acquire(folder)
+    assert not late.acquire(folder)
+    assert alive.holds(folder)
+    # The old owner finds out before committing and leaves the lease alone.
+    assert not dead.holds(folder)
+    dead.release(folder)
+    assert lease_path.exists()
+    assert not list(lease_path.parent.glob("*.stale"))
+    for manager in (dead, alive, late):
+        manager.close()
+    assert not lease_path.exists()
+
+
+def test_reclaim_racing_another_node_leaves_its_lease_alone(tmp_path):
+    folder = tmp_path / "doc"
+    dead = LeaseManager.for_target(tmp_path, owner="dead", ttl=60)
+    assert dead.acquire(folder)
+    lease_path = dead._lease_path(folder)
+    stale = time.time() - 120
+    os.utime(lease_path, (stale, stale))
+
+    slow = LeaseManager.for_target(tmp_path, owner="slow", ttl=60)
+    fast = LeaseManager.for_target(tmp_path, owner="fast", ttl=60)
+    expired = slow._expired
+
+    def reclaimed_meanwhile(path):
+        # fast reclaims the lease after slow saw it expired, before slow renames it.
+        result = expired(path)
+        assert fast.acquire(folder)
+        return result
+
+    with patch.object(slow, "_expired", side_effect=reclaimed_meanwhile):
+        assert not slow.acquire(folder)
+
+    assert fast.holds(folder) and not slow.holds(folder)
+    assert [p.name for p in lease_path.parent.iterdir()] == [lease_path.name]
+    fast.close()
+    slow.close()
+
+
+def test_heartbeat_keeps_lease_alive(tmp_path):
+    folder = tmp_path / "doc"
+    with LeaseManager.for_target(tmp_path, owner="node1", ttl=1, heartbeat=0.1) as one:
+        assert one.acquire(folder)
+        time.sleep(1.5)
+        with LeaseManager.for_target(tmp_path, owner="node2", ttl=1) as two:
+            assert not two.acquire(folder)
+        assert one.holds(folder)
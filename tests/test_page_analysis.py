@@ -0,0 +1,104 @@
+from extractor.page_analysis import PageProfile, PageThresholds, analyse_pages, page_runs
+
+
+def _pdf(pages):
+    """Builds a PDF whose pages are the given content streams (Helvetica as /F1, a 1x1 image as /Im1)."""
+    objs = [
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray"
+        b" /BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream",
+    ]
+    pages_id = len(objs) + 2 * len(pages) + 1
+    kids = []
+    for content in pages:
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objs.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 1 0 R >> /XObject << /Im1 2 0 R >> >> >>" % (pages_id, len(objs))
+        )
+        kids.append(len(objs))
+    objs.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    objs.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, len(objs), xref)
+    return bytes(out)
+
+
+def _text(lines, x=72, y=720):
+    return b"BT /F1 11 Tf %d %d Td 14 TL %s ET" % (x, y, b" ".join(b"(%s) Tj T*" % line.encode() for line in lines))
+
+
+PROSE = _text(["This page was produced digitally and has a complete text layer."] * 4)
+SCAN = b"q 612 0 0 792 0 0 cm /Im1 Do Q"
+TABLE = b"\n".join(
+    [_text(["Schedule of payments"])]
+    + [b" ".join(_text([cell], x, 600 - 20 * i) for cell, x in ((f"Item {i}", 72), (f"{i}00.00", 250), (f"2019-0{i + 1}", 400)))
+       for i in range(5)]
+)
+RULED = PROSE + b"\n" + b"\n".join(b"72 %d m 500 %d l S" % (y, y) for y in range(300, 420, 20))
+
+
+def test_analyse_pages_classifies_digital_scanned_and_tabular_pages(tmp_path):
+    pdf = tmp_path / "mixed.pdf"
+    pdf.write_bytes(_pdf([PROSE, SCAN, PROSE + b"\n" + SCAN, TABLE, RULED, b""]))
+
+    profiles = analyse_pages(str(pdf))
+    assert [(p.page, p.ocr, p.tables) for p in profiles] == [
+        (1, False, False),  # born-digital prose
+        (2, True, True),    # scan without text layer
+        (3, True, True),    # scan under a text layer
+        (4, False, True),   # columns of text
+        (5, False, True),   # rule lines
+        (6, True, True),    # nothing to read from the text layer
+    ]
+    assert profiles[0].text_chars > 200 and profiles[0].image_coverage == 0
+    assert profiles[1].image_coverage == 1.0
+    assert profiles[3].aligned_rows == 5
+    assert profiles[4].rule_lines == 6
+
+    assert page_runs(profiles) == [
+        ((1, 1), (False, False)),
+        ((2, 3), (True, True)),
+        ((4, 5), (False, True)),
+        ((6, 6), (True, True)),
+    ]
+
+
+def test_page_runs_merges_short_runs_into_the_costlier_mode():
+    def profile(page, ocr, tables):
+        return PageProfile(page, 0, 0.0, 0.0, 0, 0, ocr, tables)
+
+    # Text and scanned pages alternating: one run per page without merging.
+    alternating = [profile(n, n % 2 == 0, n % 2 == 0) for n in range(1, 101)]
+    assert len(page_runs(alternating)) == 100
+    runs = page_runs(alternating, min_run_pages=8)
+    assert len(runs) <= 100 // 8 + 1
+    assert all(last - first + 1 >= 8 for (first, last), _ in runs)
+    assert [page for (first, last), _ in runs for page in range(first, last + 1)] == list(range(1, 101))
+    # Each merged run gets the models any of its pages needs.
+    assert runs == [((1, 100), (True, True))]
+
+    # Long runs keep their own models; a short tail joins the run before it.
+    pages = [profile(n, False, False) for n in range(1, 21)] + [profile(n, True, True) for n in range(21, 41)]
+    pages += [profile(41, False, True)]
+    assert page_runs(pages, min_run_pages=8) == [((1, 20), (False, False)), ((21, 41), (True, True))]
+
+
+def test_analyse_pages_reads_bytes_and_page_ranges():
+    data = _pdf([SCAN, PROSE, PROSE])
+    assert [p.page for p in analyse_pages(data, (2, 3))] == [2, 3]
+    assert analyse_pages(b"not a pdf") is None
+
+
+def test_page_thresholds_from_config():
+    thresholds = PageThresholds.from_config({"page_analysis": {"min_chars": "10", "image_coverage": 0.5, "bogus": 1}})
+    assert thresholds == PageThresholds(min_chars=10, image_coverage=0.5)
+    assert PageThresholds.from_config(None) == PageThresholds()
@@ -0,0 +1,116 @@
+import io
+from unittest.mock import MagicMock
+
+import pypdfium2
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+
+from extractor.docling_engine import DoclingEngine
+from extractor.pdf_images import pdf_page_count, read_embedded_images
+
+
+def _image_pdf(path):
+    """Writes a two-page PDF: a JPEG photo on page 1, a Flate-encoded chart on page 2. Returns the JPEG."""
+    pdf = pypdfium2.PdfDocument.new()
+    jpeg = io.BytesIO()
+    Image.new("RGB", (20, 10), "red").save(jpeg, format="JPEG")
+    data = jpeg.getvalue()
+    jpeg.seek(0)
+
+    page = pdf.new_page(612, 792)
+    photo = pypdfium2.PdfImage.new(pdf)
+    photo.load_jpeg(jpeg, inline=True)
+    photo.set_matrix(pypdfium2.PdfMatrix().scale(200, 100).translate(72, 600))
+    page.insert_obj(photo)
+    page.gen_content()
+
+    page = pdf.new_page(612, 792)
+    chart = pypdfium2.PdfImage.new(pdf)
+    chart.set_bitmap(pypdfium2.PdfBitmap.from_pil(Image.new("RGB", (8, 8), "blue")))
+    chart.set_matrix(pypdfium2.PdfMatrix().scale(100, 100).translate(50, 50))
+    page.insert_obj(chart)
+    page.gen_content()
+
+    pdf.save(str(path))
+    pdf.close()
+    return data
+
+
+def _form_image_pdf(path):
+    """Writes a page whose only image sits in a form XObject drawn at 2x, offset by (100, 300)."""
+    inner = pypdfium2.PdfDocument.new()
+    page = inner.new_page(200, 100)
+    image = pypdfium2.PdfImage.new(inner)
+    image.set_bitmap(pypdfium2.PdfBitmap.from_pil(Image.new("RGB", (8, 8), "blue")))
+    image.set_matrix(pypdfium2.PdfMatrix().scale(100, 50).translate(10, 20))
+    page.insert_obj(image)
+    page.gen_content()
+
+    pdf = pypdfium2.PdfDocument.new()
+    page = pdf.new_page(612, 792)
+    xobject = pdfium_c.FPDF_NewXObjectFromPage(pdf, inner, 0)
+    form = pdfium_c.FPDF_NewFormObjectFromXObject(xobject)
+    pdfium_c.FPDFPageObj_SetMatrix(form, pypdfium2.PdfMatrix().scale(2, 2).translate(100, 300).to_raw())
+    pdfium_c.FPDFPage_InsertObject(page, form)
+    pdfium_c.FPDF_CloseXObject(xobject)
+    page.gen_content()
+    pdf.save(str(path))
+    pdf.close()
+    inner.close()
+
+
+def _image_only_result(pdf_path):
+    result = MagicMock()
+    result.document.pictures = []
+    result.input = MagicMock(file=pdf_path)
+    return result
+
+
+def test_read_embedded_images_passes_jpeg_through_with_bboxes(tmp_path):
+    jpeg = _image_pdf(tmp_path / "scan.pdf")
+    assert pdf_page_count(str(tmp_path / "scan.pdf")) == 2
+
+    photo, chart = read_embedded_images(str(tmp_path / "scan.pdf"), (1, 2))
+    assert (photo.page_no, photo.bbox, photo.suffix) == (1, (72.0, 600.0, 272.0, 700.0), ".jpg")
+    assert photo.data == jpeg and photo.image is None
+    assert (chart.page_no, chart.bbox, chart.data) == (2, (50.0, 50.0, 150.0, 150.0), None)
+    assert chart.image.size == (8, 8)
+
+    assert read_embedded_images(str(tmp_path / "scan.pdf"), (2, 5)) == [chart]
+    (tmp_path / "broken.pdf").write_bytes(b"%PDF-1.4\n")
+    assert read_embedded_images(str(tmp_path / "broken.pdf"), (1, 1)) == []
+
+
+def test_read_embedded_images_maps_form_images_to_page_space(tmp_path):
+    _form_image_pdf(tmp_path / "form.pdf")
+
+    [image] = read_embedded_images(str(tmp_path / "form.pdf"), (1, 1))
+
+    assert image.bbox == (120.0, 340.0, 320.0, 440.0)
+
+
+def test_docling_engine_save_images_reads_embedded_images(tmp_path):
+    jpeg = _image_pdf(tmp_path / "scan.pdf")
+    engine = DoclingEngine({"images": {"pages_per_task": 1}})
+    output_dir = tmp_path / "images"
+
+    meta = engine.save_images(_image_only_result(tmp_path / "scan.pdf"), output_dir)
+
+    assert [m["filename"] for m in meta] == ["page_1_img_1.jpg", "page_2_img_2.png"]
+    assert [m["bbox"] for m in meta] == [(72.0, 600.0, 272.0, 700.0), (50.0, 50.0, 150.0, 150.0)]
+    assert (output_dir / "page_1_img_1.jpg").read_bytes() == jpeg
+    with Image.open(output_dir / "page_2_img_2.png") as image:
+        assert image.size == (8, 8)
+    assert sorted(p.name for p in output_dir.iterdir()) == ["page_1_img_1.jpg", "page_2_img_2.png"]
+
+
+def test_docling_engine_embedded_images_go_through_store(tmp_path):
+    _image_pdf(tmp_path / "scan.pdf")
+    engine = DoclingEngine({"images": {"store_dir": str(tmp_path / "store")}})
+
+    first = engine.save_images(_image_only_result(tmp_path / "scan.pdf"), tmp_path / "a")
+    second = engine.save_images(_image_only_result(tmp_path / "scan.pdf"), tmp_path / "b")
+
+    assert [m["content_hash"] for m in first] == [m["content_hash"] for m in second]
+    assert len(list((tmp_path / "store").glob("*/*"))) == 2
+    assert (tmp_path / "a" / "page_1_img_1.jpg").stat().st_nlink == 3
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from extractor.catalog import Catalog
+from extractor.planning import Planner
+from extractor.scaffolding import Scaffolder
+from extractor.scheduling import CostModel
+
+
+def _tree(tmp_path):
+    source = tmp_path / "source"
+    for rel in ("DataSet 1/a.pdf", "DataSet 1/b.pdf", "DataSet 2/c.pdf", "DataSet 2/photo.jpg"):
+        (source / rel).parent.mkdir(parents=True, exist_ok=True)
+        (source / rel).write_bytes(b"x" * 100)
+    target = tmp_path / "target"
+    scaffolder = Scaffolder(source, target)
+    # a.pdf is already extracted
+    done = scaffolder.get_target_folder(source / "DataSet 1/a.pdf")
+    done.mkdir(parents=True)
+    (done / "commit.json").write_text("{}")
+    return source, scaffolder
+
+
+def test_planner_reports_totals_and_eta(tmp_path):
+    source, scaffolder = _tree(tmp_path)
+    files = sorted(source.rglob("*.*"))
+    planner = Planner(scaffolder, CostModel(pages_per_second=1.0, bytes_per_second=float("inf"), overhead_seconds=0.0))
+    with patch("extractor.scheduling.estimate_page_count", return_value=10):
+        summary = planner.plan(files, workers=2).summary()
+
+    assert (summary["documents"], summary["process"], summary["skip"]) == (4, 3, 1)
+    assert summary["pages"] == 20
+    assert summary["by_folder"]["DataSet 1"] == {"process": 1, "skip": 1, "bytes": 100, "pages": 10}
+    assert summary["by_type"]["IMAGE"] == {"process": 1, "skip": 0, "bytes": 100, "pages": 0}
+    assert summary["eta_seconds"] == 10.0  # 20 pages (the JPG has none) over 2 workers
+    assert not summary["measured"]
+
+
+def test_planner_uses_measured_throughput(tmp_path):
+    source, scaffolder = _tree(tmp_path)
+    with Catalog.for_target(tmp_path / "target") as catalog:
+        catalog.record_run("2026-01-01T00:00:00", seconds=100, documents=10, pages=400, workers=2)
+        pages_per_second = catalog.pages_per_second()
+    assert pages_per_second == 2.0
+
+    with patch("extractor.scheduling.estimate_page_count", return_value=10):
+        summary = Planner(scaffolder).plan(sorted(source.rglob("*.pdf")), pages_per_second=pages_per_second).summary()
+    assert summary["eta_seconds"] == 10.0
+    assert summary["measured"]
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from extractor.hashing import HashService, hash_file
+from extractor.prefetch import Prefetcher, StagingCache
+
+
+def _sources(tmp_path, count=4, size=1000):
+    source = tmp_path / "nas"
+    source.mkdir()
+    paths = []
+    for i in range(count):
+        path = source / f"doc{i}.pdf"
+        path.write_bytes(bytes([i]) * size)
+        paths.append(path)
+    return paths
+
+
+def test_prefetcher_hashes_ahead_in_order(tmp_path):
+    paths = _sources(tmp_path)
+    service = HashService(tmp_path / "hashes.sqlite")
+    prefetcher = Prefetcher(service, depth=2)
+
+    yielded = list(prefetcher.iterate(paths, wanted=lambda p: p.name != "doc3.pdf"))
+    assert yielded == paths
+
+    # Discovery hashing is served from the digests computed while prefetching.
+    with patch("extractor.hashing.hash_file", side_effect=AssertionError("re-read")):
+        for path in paths[:3]:
+            assert service.digests(path) == hash_file(path)
+    assert prefetcher.local_path(paths[0]) is None
+    service.close()
+
+
+def test_prefetcher_copies_into_bounded_staging_cache(tmp_path):
+    paths = _sources(tmp_path, size=1000)
+    cache = StagingCache(tmp_path / "ssd", max_bytes=2500)
+    prefetcher = Prefetcher(HashService(), depth=4, cache=cache)
+
+    for path in prefetcher.iterate(paths):
+        local = prefetcher.local_path(path)
+        assert local.name == path.name
+        assert local.read_bytes() == path.read_bytes()
+    # Everything is pinned until released, even over budget.
+    assert cache.size == 4000
+
+    for path in paths[:2]:
+        local = prefetcher.local_path(path)
+        prefetcher.release(path)
+    assert cache.size == 2000
+    assert not local.exists()
+    assert prefetcher.local_path(paths[3]).exists()
+
+    # A new cache over the same directory picks up the surviving copies.
+    assert StagingCache(tmp_path / "ssd", max_bytes=2500).size == 2000
@@ -0,0 +1,59 @@
+from extractor.retry import RetryQueue, failure_signature, strategy_config
+
+
+def test_retry_queue_counts_attempts_and_escalates(tmp_path):
+    with RetryQueue.for_target(tmp_path) as queue:
+        pdf = tmp_path / "src" / "a.pdf"
+        queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "convert", "RuntimeError", "boom")
+        [failure] = queue.failures()
+        assert (failure.attempts, failure.strategy, failure.next_strategy) == (1, "initial", "same")
+
+        queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "worker", "Timeout", "timed out after 300s", "same")
+        queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "worker", "Timeout", "timed out after 300s", "no_ocr")
+        [failure] = queue.failures()
+        assert (failure.attempts, failure.stage, failure.next_strategy) == (3, "worker", "page_split")
+
+        queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "worker", "Timeout", "timed out after 300s", "page_split")
+        assert queue.failures()[0].next_strategy is None
+
+        queue.resolve(pdf)
+        assert len(queue) == 0
+
+
+def test_failing_process_again_does_not_escalate(tmp_path):
+    with RetryQueue.for_target(tmp_path) as queue:
+        pdf = tmp_path / "src" / "a.pdf"
+        for _ in range(3):
+            queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "convert", "RuntimeError", "boom")
+        [failure] = queue.failures()
+        assert (failure.attempts, failure.retries, failure.next_strategy) == (3, 0, "same")
+
+        queue.record_failure(pdf, tmp_path / "src", tmp_path / "a", "convert", "RuntimeError", "boom", "same")
+        assert queue.failures()[0].next_strategy == "no_ocr"
+
+
+def test_strategy_config_does_not_touch_the_original():
+    config = {"docling": {"ocr_model": "x"}}
+    assert strategy_config(config, "same") is config
+    assert strategy_config(config, "no_ocr")["docling"] == {"ocr_model": "x", "do_ocr": False}
+    split = strategy_config(config, "page_split")["docling"]
+    assert (split["split_pages"], split["window_pages"]) == (1, 10)
+    assert config == {"docling": {"ocr_model": "x"}}
+
+
+def test_failures_cluster_by_cause(tmp_path):
+    with RetryQueue.for_target(tmp_path) as queue:
+        for i, size in enumerate((1200, 980)):
+            queue.record_failure(
+                tmp_path / f"{i}.pdf", tmp_path, tmp_path / str(i), "convert", "ValueError",
+                f"ValueError: page {i + 3} of '/data/set/{i}.pdf' has invalid size {size}",
+            )
+        queue.record_failure(tmp_path / "c.pdf", tmp_path, tmp_path / "c", "worker", "WorkerCrash", "worker exited with code -11")
+        clusters = queue.clusters()
+
+    assert [(c["stage"], c["error_type"], c["count"]) for c in clusters] == [
+        ("convert", "ValueError", 2),
+        ("worker", "WorkerCrash", 1),
+    ]
+    assert clusters[0]["signature"] == "ValueError: page N of '…' has invalid size N"
+    assert failure_signature("cannot open /tmp/x.pdf") == "cannot open <path>"
@@ -98,4 +98,58 @@ def test_is_processed_returns_true_if_manifest_exists(tmp_path):
     target_folder.mkdir()
     (target_folder / "manifest.json").touch()
     
-    assert scaffolder.is_processed(target_folder) is True
\ No newline at end of file
+    assert scaffolder.is_processed(target_folder) is True
+
+def test_record_failure_keeps_history_and_committed_outputs(tmp_path):
+    source_root = tmp_path / "source"
+    source_root.mkdir()
+    pdf = source_root / "doc.pdf"
+    pdf.write_bytes(b"%PDF doc")
+    target_root = tmp_path / "target"
+    scaffolder = Scaffolder(source_root, target_root)
+    folder = scaffolder.get_target_folder(pdf)
+
+    staging = scaffolder.begin_staging(folder)
+    scaffolder.write_manifest(pdf, staging)
+    scaffolder.record_failure(staging, folder, "timed out after 300s")
+
+    assert not staging.exists()
+    history = scaffolder.read_manifest(folder)["processing_history"]
+    assert [h["status"] for h in history] == ["success", "failed"]
+    assert history[-1]["reason"] == "timed out after 300s"
+    assert scaffolder.catalog.summary()["failed"] == 1
+
+    # The next attempt starts from the manifest carrying the failure.
+    staging = scaffolder.begin_staging(folder)
+    assert scaffolder.read_manifest(staging)["processing_history"][-1]["status"] == "failed"
+    scaffolder.commit(staging, folder)
+    committed = (folder / "manifest.json").read_text()
+    staging = scaffolder.begin_staging(folder)
+    scaffolder.record_failure(staging, folder, "worker exited with code -11")
+    assert (folder / "manifest.json").read_text() == committed
+
+
+def test_nodes_stage_into_folders_of_their_own(tmp_path):
+    source_root = tmp_path / "source"
+    source_root.mkdir()
+    pdf = source_root / "doc.v2.pdf"
+    pdf.write_bytes(b"%PDF doc")
+    target_root = tmp_path / "target"
+    one = Scaffolder(source_root, target_root, owner="host.example:12:ab")
+    two = Scaffolder(source_root, target_root, owner="other:34:cd")
+    folder = one.get_target_folder(pdf)
+
+    staging = one.begin_staging(folder)
+    (staging / "doc.v2.md").write_text("one")
+    other = two.begin_staging(folder)
+
+    assert staging.name == ".doc.v2.host_example_12_ab.staging"
+    assert staging.exists() and other != staging
+    assert one.final_folder(staging) == two.final_folder(other) == folder
+    one.write_manifest(pdf, staging)
+    assert one.catalog.summary()["documents"] == 1
+
+    # A node that lost its claim discards its staging folder instead of committing it.
+    assert one.commit(staging, folder, still_owned=lambda: False) is None
+    assert not staging.exists() and not folder.exists()
+    assert two.commit(other, folder, still_owned=lambda: True) == folder
@@ -54,6 +54,14 @@ def test_is_extraction_complete_missing_json(scaffolder, tmp_path):
     (target_folder / "doc1.md").touch()
     assert scaffolder.is_extraction_complete(target_folder, "doc1") is False
 
+def test_is_extraction_complete_accepts_compressed_json(scaffolder, tmp_path):
+    target_folder = tmp_path / "target" / "doc1"
+    target_folder.mkdir(parents=True)
+    (target_folder / "manifest.json").write_text("{}")
+    (target_folder / "doc1.md").touch()
+    (target_folder / "doc1.json.gz").touch()
+    assert scaffolder.is_extraction_complete(target_folder, "doc1") is True
+
 def test_is_extraction_complete_missing_image(scaffolder, tmp_path):
     target_folder = tmp_path / "target" / "doc1"
     target_folder.mkdir(parents=True)
@@ -103,3 +111,65 @@ def test_is_extraction_complete_no_images_success(scaffolder, tmp_path):
     
     # No images required, so image_metadata.json is not required
     assert scaffolder.is_extraction_complete(target_folder, "doc1") is True
+
+def _stage_document(scaffolder, target_folder, images=()):
+    staging = scaffolder.begin_staging(target_folder)
+    (staging / "doc1.md").write_text("# doc1")
+    (staging / "doc1.json").write_text("{}")
+    manifest = {"images": [{"filename": name, "path": str(staging / "images" / name)} for name in images]}
+    if images:
+        (staging / "images").mkdir()
+        for name in images:
+            (staging / "images" / name).write_bytes(b"png")
+        (staging / "images" / "image_metadata.json").write_text(json.dumps(manifest["images"]))
+    (staging / "manifest.json").write_text(json.dumps(manifest))
+    return staging
+
+def test_commit_moves_staging_into_place_with_marker(scaffolder, tmp_path):
+    target_folder = tmp_path / "target" / "doc1"
+    staging = _stage_document(scaffolder, target_folder, images=["page_1_img_1.png"])
+
+    assert scaffolder.is_extraction_complete(target_folder, "doc1") is False
+    scaffolder.commit(staging, target_folder)
+
+    assert not staging.exists()
+    assert (target_folder / scaffolder.COMMIT_MARKER).exists()
+    manifest = json.loads((target_folder / "manifest.json").read_text())
+    assert manifest["images"][0]["path"] == str(target_folder / "images" / "page_1_img_1.png")
+    metadata = json.loads((target_folder / "images" / "image_metadata.json").read_text())
+    assert metadata[0]["path"] == str(target_folder / "images" / "page_1_img_1.png")
+    assert scaffolder.is_extraction_complete(target_folder, "doc1") is True
+    assert scaffolder.is_extraction_complete(target_folder, "doc1", deep_verify=True) is True
+
+def test_commit_marker_is_trusted_unless_deep_verify(scaffolder, tmp_path):
+    target_folder = tmp_path / "target" / "doc1"
+    scaffolder.commit(_stage_document(scaffolder, target_folder), target_folder)
+
+    (target_folder / "doc1.md").write_text("tampered")
+    assert scaffolder.is_extraction_complete(target_folder, "doc1") is True
+    assert scaffolder.is_extraction_complete(target_folder, "doc1", deep_verify=True) is False
+
+    (target_folder / "doc1.md").unlink()
+    assert scaffolder.is_extraction_complete(target_folder, "doc1", deep_verify=True) is False
+
+def test_commit_replaces_previous_folder_and_preserves_enrichment(scaffolder, tmp_path):
+    target_folder = tmp_path / "target" / "doc1"
+    scaffolder.commit(_stage_document(scaffolder, target_folder, images=["old.png"]), target_folder)
+    (target_folder / "images" / "image_enrichment.json").write_text("[]")
+
+    staging = _stage_document(scaffolder, target_folder, images=["new.png"])
+    scaffolder.commit(staging, target_folder)
+
+    assert (target_folder / "images" / "new.png").exists()
+    assert not (target_folder / "images" / "old.png").exists()
+    assert (target_folder / "images" / "image_enrichment.json").exists()
+    assert not (tmp_path / "target" / ".doc1.old").exists()
+
+def test_begin_staging_carries_manifest(scaffolder, tmp_path):
+    target_folder = tmp_path / "target" / "doc1"
+    target_folder.mkdir(parents=True)
+    (target_folder / "manifest.json").write_text(json.dumps({"hash": "abc"}))
+
+    staging = scaffolder.begin_staging(target_folder)
+    assert json.loads((staging / "manifest.json").read_text()) == {"hash": "abc"}
+    assert not (scaffolder.begin_staging(target_folder, keep_manifest=False) / "manifest.json").exists()
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from PIL import Image
+
+from extractor.scheduling import CostModel, Scheduler, WorkItem, estimate_page_count
+
+
+def _make_pdf(path: Path, pages: int):
+    img = Image.new("RGB", (20, 20), "white")
+    img.save(path, save_all=True, append_images=[img] * (pages - 1))
+
+
+def test_estimate_page_count(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    _make_pdf(pdf, 4)
+    assert estimate_page_count(pdf) == 4
+
+
+def test_estimate_page_count_unreadable(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    assert estimate_page_count(broken) is None
+
+
+def test_schedule_orders_largest_first(tmp_path):
+    small = tmp_path / "small.pdf"
+    large = tmp_path / "large.pdf"
+    image = tmp_path / "photo.png"
+    _make_pdf(small, 1)
+    _make_pdf(large, 12)
+    Image.new("RGB", (5, 5)).save(image)
+
+    work = Scheduler().schedule([small, image, large])
+
+    assert [item.path for item in work] == [large, small, image]
+    assert work[0].page_count == 12
+    assert work[-1].page_count is None
+
+
+def test_cost_model_from_config_and_custom_callable(tmp_path):
+    model = CostModel.from_config({"scheduling": {"pages_per_second": 2, "overhead_seconds": 0}})
+    item = WorkItem(path=Path("x.pdf"), size=0, page_count=10)
+    assert model(item) == 5.0
+
+    pdf = tmp_path / "doc.pdf"
+    _make_pdf(pdf, 3)
+    scheduler = Scheduler(cost_model=lambda item: 42.0)
+    assert scheduler.estimate(pdf).cost == 42.0
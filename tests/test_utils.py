@@ -1,7 +1,7 @@
 import pytest
 import hashlib
 from pathlib import Path
-from extractor.utils import get_file_metadata
+from extractor.utils import get_file_metadata, in_shard, parse_shard, shard_suffix
 
 def test_get_file_metadata(tmp_path):
     # Create a test file with known content
@@ -23,3 +23,21 @@ def test_get_file_metadata_nonexistent(tmp_path):
     non_existent = tmp_path / "nope.txt"
     with pytest.raises(FileNotFoundError):
         get_file_metadata(non_existent)
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("0/4", "5/4", "1/0", "a/b", "3"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+def test_in_shard_partitions_keys():
+    keys = [f"vol{i % 7}/doc{i}.pdf" for i in range(1000)]
+    owners = [[n for n in range(1, 5) if in_shard(k, (n, 4))] for k in keys]
+
+    # Every key belongs to exactly one shard and shards are roughly balanced
+    assert all(len(o) == 1 for o in owners)
+    sizes = [sum(o == [n] for o in owners) for n in range(1, 5)]
+    assert min(sizes) > 200
+    assert in_shard("anything", None) is True
+    assert shard_suffix((2, 4)) == ".2-of-4"
+    assert shard_suffix(None) == ""
@@ -0,0 +1,95 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from extractor.discovery import Scanner
+from extractor.watch import Watcher
+
+
+def _first_settled(watcher, timeout=10.0):
+    stop = threading.Event()
+    timer = threading.Timer(timeout, stop.set)
+    timer.start()
+    try:
+        for path in watcher.settled_files(stop):
+            return path
+    finally:
+        timer.cancel()
+        watcher.close()
+    return None
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_yields_new_settled_file(tmp_path, use_inotify):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "existing.pdf").touch()
+
+    watcher = Watcher(Scanner(source_dir), settle_seconds=0.2, poll_interval=0.1, use_inotify=use_inotify)
+
+    nested = source_dir / "batch"
+    nested.mkdir()
+    new_pdf = nested / "new.pdf"
+    new_pdf.write_bytes(b"%PDF-1.4\n")
+    (nested / "notes.txt").write_text("ignored")
+
+    assert _first_settled(watcher) == new_pdf
+
+
+def test_watcher_waits_for_size_to_settle(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    watcher = Watcher(Scanner(source_dir), settle_seconds=0.5, poll_interval=0.1, use_inotify=False)
+
+    growing = source_dir / "growing.pdf"
+    growing.write_bytes(b"a")
+
+    appended = threading.Event()
+
+    def append():
+        with open(growing, "ab") as f:
+            f.write(b"b" * 10)
+        appended.set()
+
+    writer = threading.Timer(0.3, append)
+    writer.start()
+
+    assert _first_settled(watcher) == growing
+    # The file must not be handed on before the second write landed.
+    assert appended.is_set()
+    writer.join()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_expands_settled_archive(tmp_path, use_inotify):
+    import zipfile
+
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    watcher = Watcher(Scanner(source_dir), settle_seconds=0.2, poll_interval=0.1, use_inotify=use_inotify)
+
+    archive = source_dir / "release.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a/doc1.pdf", b"%PDF-1.4\n")
+
+    assert _first_settled(watcher) == archive / "a" / "doc1.pdf"
+
+
+def test_polling_rewalks_only_every_poll_interval(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    watcher = Watcher(Scanner(source_dir), use_inotify=False)
+    backend = watcher._backend
+    assert watcher.poll_interval == Watcher.POLL_INTERVAL and watcher.tick == 1.0
+
+    new_pdf = source_dir / "new.pdf"
+    new_pdf.write_bytes(b"%PDF-1.4\n")
+    with patch.object(backend, "_take_snapshot", wraps=backend._take_snapshot) as snapshot:
+        assert backend.read(0) == set()
+        snapshot.assert_not_called()
+
+        backend._scanned_at -= Watcher.POLL_INTERVAL
+        assert backend.read(0) == {new_pdf}
+        assert snapshot.call_count == 1
+    watcher.close()
@@ -0,0 +1,253 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from extractor.workers import ConversionTimeouts, ExtractionJob, ExtractionPipeline, PageSplitter, WorkerLimits, WorkerPool
+
+
+class FakeResult:
+    def __init__(self, source_file, pages=None):
+        self.source_file = source_file
+        self.pages = pages
+
+
+class FakeEngine:
+    """Picklable stand-in for DoclingEngine; 'crash' in a file name kills the worker."""
+
+    instances = 0
+
+    def __init__(self, config):
+        FakeEngine.instances += 1
+        self.pid = os.getpid()
+        self.config = config
+
+    def convert(self, source_file, page_range=None):
+        if "crash" in source_file.name:
+            os._exit(3)
+        if "broken" in source_file.name:
+            raise ValueError("cannot parse")
+        if "hang" in source_file.name:
+            time.sleep(60)
+        if "hog" in source_file.name:
+            marker = source_file.with_suffix(".attempted")
+            if not marker.exists() or "always" in source_file.name:
+                marker.touch()
+                hog = bytearray(300 * 1024 * 1024)
+                hog[::4096] = b"x" * len(hog[::4096])
+                time.sleep(10)
+        if page_range and "badpage" in source_file.name and page_range[0] > 1:
+            raise ValueError("bad page")
+        return FakeResult(source_file, list(range(page_range[0], page_range[1] + 1)) if page_range else None)
+
+    def save_window(self, result, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(result.pages))
+
+    def merge_windows(self, source_file, window_paths, page_ranges=None):
+        pages = [p for path in window_paths for p in json.loads(path.read_text())]
+        return FakeResult(source_file, pages)
+
+    def save_markdown(self, result, path):
+        path.write_text(f"# {result.source_file.stem}")
+
+    def save_json(self, result, path):
+        path.write_text(json.dumps({"engine_pid": self.pid, "worker_pid": os.getpid(), "instances": FakeEngine.instances, "pages": result.pages}))
+
+    def save_images(self, result, output_dir):
+        return []
+
+    def generate_manifest(self, result, path, image_metadata):
+        path.write_text(json.dumps({"images": image_metadata}))
+
+
+def fake_engine_factory(config):
+    return FakeEngine(config)
+
+
+def _job(tmp_path, name):
+    work_dir = tmp_path / f".{name}.staging"
+    work_dir.mkdir()
+    return ExtractionJob(tmp_path / f"{name}.pdf", work_dir, tmp_path / name)
+
+
+def test_worker_pool_reuses_one_engine_per_worker(tmp_path):
+    jobs = [_job(tmp_path, f"doc{i}") for i in range(6)]
+    results = []
+    with WorkerPool(2, config={"docling": {}}, engine_factory=fake_engine_factory) as pool:
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    assert sorted(r.job.source_file.name for r in results) == sorted(j.source_file.name for j in jobs)
+    assert all(r.error is None for r in results)
+    outputs = [json.loads((j.work_dir / f"{j.source_file.stem}.json").read_text()) for j in jobs]
+    # Each worker built its engine once, however many documents it converted.
+    assert {o["instances"] for o in outputs} == {1}
+    assert len({o["engine_pid"] for o in outputs}) <= 2
+
+
+def test_worker_pool_forks_workers_from_one_warmed_engine(tmp_path):
+    jobs = [_job(tmp_path, f"doc{i}") for i in range(6)]
+    results = []
+    with WorkerPool(2, engine_factory=fake_engine_factory, share_models=True) as pool:
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    assert all(r.error is None for r in results) and len(results) == 6
+    outputs = [json.loads((j.work_dir / f"{j.source_file.stem}.json").read_text()) for j in jobs]
+    # One engine, built in the fork server and inherited by every worker.
+    assert {o["instances"] for o in outputs} == {1}
+    assert len({o["engine_pid"] for o in outputs}) == 1
+    assert {o["engine_pid"] for o in outputs}.isdisjoint(o["worker_pid"] for o in outputs)
+
+
+@pytest.mark.parametrize("share_models", [False, True])
+def test_worker_pool_isolates_errors_and_crashes(tmp_path, share_models):
+    jobs = [_job(tmp_path, name) for name in ("broken", "crash", "ok")]
+    with WorkerPool(1, engine_factory=fake_engine_factory, share_models=share_models) as pool:
+        results = []
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    errors = {r.job.source_file.name: r.error for r in results}
+    assert errors["broken.pdf"] == "ValueError: cannot parse"
+    assert errors["crash.pdf"] == "worker exited with code 3"
+    assert errors["ok.pdf"] is None
+    assert Path(jobs[2].work_dir / "ok.md").exists()
+
+
+class SlowWriterEngine(FakeEngine):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.events = []
+
+    def convert(self, source_file):
+        self.events.append(("convert", source_file.stem))
+        return super().convert(source_file)
+
+    def save_markdown(self, result, path):
+        time.sleep(0.2)
+        self.events.append(("written", result.source_file.stem))
+        super().save_markdown(result, path)
+
+
+def test_pipeline_overlaps_conversion_with_writing(tmp_path):
+    engine = SlowWriterEngine()
+    jobs = [_job(tmp_path, f"doc{i}") for i in range(3)]
+    results = []
+    with ExtractionPipeline(engine, writers=2, max_pending=2) as pipeline:
+        for job in jobs:
+            results.extend(pipeline.submit(job))
+        results.extend(pipeline.drain())
+
+    assert sorted(r.job.source_file.stem for r in results) == ["doc0", "doc1", "doc2"]
+    assert all(r.error is None for r in results)
+    # doc1 converted while doc0 was still being written...
+    assert engine.events.index(("convert", "doc1")) < engine.events.index(("written", "doc0"))
+    # ...but doc2 waited for a free slot (max_pending=2).
+    assert engine.events.index(("convert", "doc2")) > engine.events.index(("written", "doc0"))
+
+
+def test_pipeline_reports_conversion_and_write_errors(tmp_path):
+    engine = FakeEngine(None)
+    engine.save_images = lambda result, output_dir: (_ for _ in ()).throw(OSError("disk full"))
+    with ExtractionPipeline(engine) as pipeline:
+        results = pipeline.submit(_job(tmp_path, "broken"))
+        results += pipeline.submit(_job(tmp_path, "doc"))
+        results += pipeline.drain()
+
+    errors = {r.job.source_file.stem: r.error for r in results}
+    assert errors == {"broken": "ValueError: cannot parse", "doc": "OSError: disk full"}
+
+
+def test_page_splitter_converts_windows_and_merges(tmp_path):
+    jobs = [_job(tmp_path, name) for name in ("long", "short", "badpage")]
+    windows = {"long": [(1, 2), (3, 4), (5, 5)], "short": [], "badpage": [(1, 3), (4, 6)]}
+    splitter = PageSplitter(
+        ExtractionPipeline(FakeEngine({}), writers=2), lambda job: windows[job.source_file.stem]
+    )
+    results = []
+    with splitter:
+        for job in jobs:
+            results.extend(splitter.submit(job))
+        results.extend(splitter.drain())
+
+    # One result per original job; window jobs are not reported.
+    assert sorted(r.job.source_file.name for r in results) == ["badpage.pdf", "long.pdf", "short.pdf"]
+    errors = {r.job.source_file.stem: r.error for r in results}
+    assert errors["long"] is None and errors["short"] is None
+    assert errors["badpage"] == "pages 4-6: ValueError: bad page"
+    assert all(r.job.page_range is None and not r.job.windows for r in results)
+
+    long_job = jobs[0]
+    assert json.loads((long_job.work_dir / "long.json").read_text())["pages"] == [1, 2, 3, 4, 5]
+    assert not (long_job.work_dir / ".windows").exists()
+
+
+def test_worker_limits_from_config():
+    limits = WorkerLimits.from_config({"max_documents_per_worker": 10, "max_worker_rss_mb": 100})
+    assert limits == WorkerLimits(10, 100 * 1024 * 1024, 150 * 1024 * 1024)
+    assert limits.retire_reason(10, None) == "converted 10 documents"
+    assert limits.retire_reason(1, 200 * 1024 * 1024) == "RSS 200 MB above 100 MB"
+    assert limits.retire_reason(1, 50 * 1024 * 1024) is None
+    assert WorkerLimits.from_config({"max_documents_per_worker": 0, "max_worker_rss_mb": 0}) == WorkerLimits()
+
+
+@pytest.mark.parametrize("share_models", [False, True])
+def test_worker_pool_recycles_workers_after_max_documents(tmp_path, share_models):
+    jobs = [_job(tmp_path, f"doc{i}") for i in range(5)]
+    results = []
+    limits = WorkerLimits(max_documents=2)
+    with WorkerPool(1, engine_factory=fake_engine_factory, limits=limits, share_models=share_models) as pool:
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    assert all(r.error is None for r in results) and len(results) == 5
+    pids = [json.loads((j.work_dir / f"{j.source_file.stem}.json").read_text())["worker_pid"] for j in jobs]
+    # A fresh process after every two documents (plus whatever was already in its pipe).
+    assert len(set(pids)) >= 2
+
+
+@pytest.mark.parametrize("share_models", [False, True])
+def test_worker_pool_retries_memory_heavy_document_on_fresh_worker(tmp_path, share_models):
+    jobs = [_job(tmp_path, name) for name in ("hog", "always-hog", "ok")]
+    limits = WorkerLimits(kill_rss=200 * 1024 * 1024)
+    with WorkerPool(1, engine_factory=fake_engine_factory, limits=limits, share_models=share_models) as pool:
+        results = []
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    errors = {r.job.source_file.stem: r.error for r in results}
+    assert errors == {"hog": None, "always-hog": "worker exceeded its memory limit", "ok": None}
+
+
+def test_conversion_timeouts_scale_with_pages(tmp_path):
+    timeouts = ConversionTimeouts(base=60, per_page=2, default_pages=10)
+    job = _job(tmp_path, "doc")
+    assert timeouts.for_job(job) == 80
+    assert timeouts.for_job(ExtractionJob(job.source_file, job.work_dir, job.output_dir, page_count=100)) == 260
+    assert timeouts.for_job(ExtractionJob(job.source_file, job.work_dir, job.output_dir, page_range=(1, 5))) == 70
+    assert ConversionTimeouts.from_config({"timeout_seconds": 0, "timeout_seconds_per_page": 0}).for_job(job) is None
+
+
+@pytest.mark.parametrize("share_models", [False, True])
+def test_worker_pool_kills_hung_conversion(tmp_path, share_models):
+    jobs = [_job(tmp_path, name) for name in ("hang", "ok")]
+    start = time.monotonic()
+    timeouts = ConversionTimeouts(base=2, per_page=0)
+    with WorkerPool(1, engine_factory=fake_engine_factory, timeouts=timeouts, share_models=share_models) as pool:
+        results = []
+        for job in jobs:
+            results.extend(pool.submit(job))
+        results.extend(pool.drain())
+
+    assert time.monotonic() - start < 30
+    errors = {r.job.source_file.stem: r.error for r in results}
+    assert errors == {"hang": "timed out after 2s", "ok": None}